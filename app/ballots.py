@@ -0,0 +1,106 @@
+"""
+Exact counting of reaction poll ballots, streamed from the voters of every option reaction.
+"""
+
+import asyncio
+from typing import AsyncIterator, Optional, Union
+
+from discord import Message, Object, Reaction
+
+from app.poll_state import VotePolicy
+
+PAGE_SIZE = 100 # The most users Discord returns per reaction users request
+
+class BallotCount:
+    """
+    The counted ballots of a reaction poll.
+
+    ### Attributes:
+        `counts (dict)`: A dictionary mapping emoji to their (possibly weighted) votes.
+        `voters (int)`: The number of unique voters, bots excluded.
+        `spoiled (int)`: The number of voters whose ballot broke the vote limit and was not counted.
+        `missing (list)`: The option emoji the bot's own reaction is missing from.
+        `requests (int)`: The number of user pages fetched.
+    """
+    def __init__(self, emojis: list[str]):
+        self.counts: dict[str, Union[int, float]] = {emoji: 0 for emoji in emojis}
+        self.voters = 0
+        self.spoiled = 0
+        self.missing: list[str] = []
+        self.requests = 0
+
+async def voter_pages(reaction: Reaction, page_size: int = PAGE_SIZE) -> AsyncIterator[list[int]]:
+    """
+    Yields the IDs of the human users who reacted with `reaction`, a page at a time.
+
+    Only one page of users is held at once, however many users reacted.
+
+    ### Args:
+        `reaction (discord.Reaction)`: The reaction to stream the users of.
+        `page_size (int)`: The number of users requested per page.
+    """
+    after: Optional[Object] = None
+    remaining = reaction.count
+    while remaining > 0:
+        # Asking for no more than the users left saves discord.py a trailing request for an empty page
+        limit = min(page_size, remaining)
+        page = [user async for user in reaction.users(limit=limit, after=after)]
+        if not page:
+            return
+        yield [user.id for user in page if not user.bot]
+        if len(page) < limit:
+            return
+        remaining -= len(page)
+        after = Object(id=max(user.id for user in page))  # Pages may come newest first
+
+async def count_ballots(message: Message, emojis: list[str], policy: Optional[VotePolicy] = None,
+                        concurrency: int = 4, page_size: int = PAGE_SIZE) -> BallotCount:
+    """
+    Counts the ballots of a reaction poll from the users of each option reaction.
+
+    The users of up to `concurrency` options are streamed at once. Each voter is kept as a
+    bitmask of the options they voted for, so memory grows with the number of voters rather than
+    the number of reactions, and duplicate voters and vote limits can be applied exactly.
+
+    ### Args:
+        `message (discord.Message)`: The freshly fetched poll message.
+        `emojis (list[str])`: The option emoji of the poll, in order.
+        `policy (Optional[VotePolicy])`: How ballots are counted. Defaults to one vote per option, no limit.
+        `concurrency (int)`: The maximum number of reactions streamed at the same time.
+        `page_size (int)`: The number of users requested per page.
+
+    ### Returns:
+        `count (BallotCount)`: The counted votes of every option.
+    """
+    policy = policy if policy is not None else VotePolicy()
+    count = BallotCount(emojis)
+    reactions = {str(reaction.emoji): reaction for reaction in message.reactions}
+    count.missing = [emoji for emoji in emojis if emoji not in reactions or not reactions[emoji].me]
+
+    ballots: dict[int, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def stream(index: int, reaction: Reaction) -> None:
+        bit = 1 << index
+        async with semaphore:
+            async for page in voter_pages(reaction, page_size):
+                count.requests += 1
+                for user_id in page:
+                    ballots[user_id] = ballots.get(user_id, 0) | bit
+
+    await asyncio.gather(*(stream(index, reactions[emoji]) for index, emoji in enumerate(emojis)
+                           if emoji in reactions and reactions[emoji].count > int(reactions[emoji].me)))
+
+    count.voters = len(ballots)
+    for ballot in ballots.values():
+        votes = ballot.bit_count()
+        if policy.max_votes is not None and votes > policy.max_votes:
+            count.spoiled += 1
+            continue
+        weight = 1 / votes if policy.split else 1
+        for index, emoji in enumerate(emojis):
+            if ballot >> index & 1:
+                count.counts[emoji] += weight
+    if policy.split:  # Keep split votes that add up to a whole number comparable with it
+        count.counts = {emoji: round(votes, 6) for emoji, votes in count.counts.items()}
+    return count
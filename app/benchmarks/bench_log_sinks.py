@@ -0,0 +1,59 @@
+"""
+Measures how much logging to a slow sink adds to event-loop latency, with and without the background writer.
+
+Run with `python -m app.benchmarks.bench_log_sinks`.
+"""
+
+import asyncio
+import sys
+import time
+
+from app.logger import INFO_LOG, configure_logging, shutdown_logging
+from app.loop_lag import LoopLagMonitor
+
+class SlowStream:
+    """A stream that takes a millisecond per write, like a slow disk or container log driver."""
+    def write(self, text: str) -> None:
+        time.sleep(0.001)
+
+    def flush(self) -> None:
+        pass
+
+async def log_burst(messages: int, enqueue: bool) -> dict[str, float]:
+    """
+    Logs `messages` records to a slow stream while sampling the loop lag.
+
+    ### Returns:
+        `results (dict)`: The mean and max loop lag and the time per log call, in milliseconds.
+    """
+    configure_logging(level="INFO", enqueue=enqueue, stream=SlowStream())
+
+    monitor = LoopLagMonitor(interval=0.001)
+    sampler = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.01)
+    monitor.reset()
+
+    start = time.perf_counter()
+    for index in range(messages):
+        INFO_LOG(f"Message {index}", context="BENCH")
+        if index % 10 == 0:
+            await asyncio.sleep(0)  # Let the monitor run between batches, as real handlers would
+    elapsed = time.perf_counter() - start
+
+    sampler.cancel()
+    drain_start = time.perf_counter()
+    shutdown_logging()
+    drain = time.perf_counter() - drain_start
+    return {"mean lag (ms)": monitor.mean * 1e3, "max lag (ms)": monitor.max * 1e3,
+            "per call (ms)": elapsed / messages * 1e3, "shutdown flush (ms)": drain * 1e3}
+
+def run(messages: int = 500) -> dict[str, dict[str, float]]:
+    """Runs the burst with the sink written inline and through the background writer."""
+    results = {"inline": asyncio.run(log_burst(messages, enqueue=False)),
+               "background": asyncio.run(log_burst(messages, enqueue=True))}
+    configure_logging()
+    return results
+
+if __name__ == "__main__":
+    for mode, results in run().items():
+        print(f"{mode:<11} " + "  ".join(f"{name}: {value:.3f}" for name, value in results.items()), file=sys.stderr)
@@ -0,0 +1,65 @@
+"""
+Measures the per-call overhead of the logger before and after the fast path.
+
+Run with `python -m app.benchmarks.bench_logger`.
+"""
+
+import inspect
+import os
+import sys
+import timeit
+
+from loguru import logger
+
+from app.logger import logger as app_logger
+from app.logger import DEBUG_LOG, INFO_LOG
+
+def legacy_get_context() -> str:
+    """The original `get_context`, which built `inspect.stack()` on every call."""
+    stack = inspect.stack()
+    for frame_info in stack:
+        filename = os.path.basename(frame_info.filename)
+        if filename != os.path.basename(__file__):
+            return filename
+    return "APP"
+
+def legacy_log(message: str, context: str = None, level: str = "INFO") -> None:
+    """The original `log`, which resolved the context and formatted the message at every level."""
+    if context is None:
+        context = legacy_get_context()
+    final_message = f"[{context}] {message}"
+    match level.upper():
+        case "DEBUG":
+            logger.opt(depth=2).debug(final_message)
+        case _:
+            logger.opt(depth=2).info(final_message)
+
+def measure(statement, number: int) -> float:
+    """Returns the best per-call time in microseconds over five runs."""
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+def run(number: int = 2000) -> dict[str, float]:
+    """
+    Runs the logger benchmarks against a sink that discards every message.
+
+    ### Returns:
+        `results (dict)`: A dictionary mapping benchmark names to microseconds per call.
+    """
+    app_logger.set_level("INFO")
+    logger.remove()
+    logger.add(lambda _: None, level="INFO")
+
+    results = {
+        "get_context (legacy inspect.stack)": measure(legacy_get_context, number),
+        "get_context (cached frame walk)": measure(app_logger.get_context, number),
+        "INFO without context (legacy)": measure(lambda: legacy_log("message"), number),
+        "INFO without context": measure(lambda: INFO_LOG("message"), number),
+        "INFO with context": measure(lambda: INFO_LOG("message", context="BENCH"), number),
+        "DEBUG filtered out (legacy)": measure(lambda: legacy_log("message", level="DEBUG"), number),
+        "DEBUG filtered out": measure(lambda: DEBUG_LOG("message"), number),
+    }
+    return results
+
+if __name__ == "__main__":
+    for name, microseconds in run().items():
+        print(f"{name:<40} {microseconds:>10.2f} us/call", file=sys.stderr)
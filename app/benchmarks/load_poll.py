@@ -0,0 +1,166 @@
+"""
+Load tests the Poll cog end to end against the fake Discord backend.
+
+Scenarios:
+    guilds:    Posts and announces the polls of many guilds at once, e.g. 1,000 guilds.
+    reactions: Streams reaction events at a fixed rate into live polls, e.g. 50,000 per minute.
+
+Run with `python -m app.benchmarks.load_poll guilds --guilds 1000`
+or `python -m app.benchmarks.load_poll reactions --rate 50000 --duration 10`.
+"""
+
+import argparse
+import asyncio
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from discord import RawReactionActionEvent
+
+from app.fake_discord import FakeDiscordServer, create_bot, start_bot, stop_bot
+from app.logger import configure_logging
+from app.loop_lag import LoopLagMonitor
+from app.storage import PollStore
+
+def peak_rss_mb() -> float:
+    """The peak resident memory of the process in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(samples: list[float], fraction: float) -> float:
+    """Returns the `fraction` percentile of `samples`, or 0 if there are none."""
+    if not samples:
+        return 0.0
+    return sorted(samples)[min(len(samples) - 1, int(len(samples) * fraction))]
+
+async def start(server: FakeDiscordServer, directory: str, seed_interval: float):
+    """Starts the bot against `server` with a fresh poll store and waits for its Poll cog."""
+    bot = create_bot(PollStore(f"{directory}/polls.db"), guild_ready_timeout=0.5)
+    task = await start_bot(bot, server, timeout=600.0)
+    poll = bot.get_cog("Poll")
+    poll.seeder.interval = seed_interval
+    return bot, task, poll
+
+async def run_guilds(guilds: int = 1000, latency: float = 0.0, seed_interval: float = 0.0) -> dict[str, float]:
+    """
+    Posts the poll of `guilds` guilds, then fast-forwards to their results.
+
+    ### Returns:
+        `results (dict)`: Timings in seconds, request throughput and peak memory.
+    """
+    async with FakeDiscordServer(latency=latency) as server:
+        guild_list = [server.add_guild(f"Guild {index}") for index in range(guilds)]
+        with tempfile.TemporaryDirectory() as directory:
+            monitor = LoopLagMonitor(interval=0.01)
+            sampler = asyncio.create_task(monitor.run())
+
+            started = time.perf_counter()
+            bot, task, poll = await start(server, directory, seed_interval)
+            ready = time.perf_counter() - started
+
+            channels = [server.channel_named(guild, "spooky-saturday") for guild in guild_list]
+            def count(predicate) -> int:
+                return sum(any(predicate(message) for message in channel.messages.values()) for channel in channels)
+
+            # Results are due 5 seconds after each poll in testing mode, so early guilds may finish first
+            await server.wait_for(lambda: count(lambda message: len(message.reactions) == len(poll.options)) == guilds,
+                                  timeout=3600.0)
+            posted = time.perf_counter() - started
+
+            poll.scheduler.advance(60)
+            await server.wait_for(lambda: count(lambda message: message.embeds) == guilds, timeout=3600.0)
+            finished = time.perf_counter() - started
+
+            sampler.cancel()
+            requests = sum(server.requests.values())
+            await stop_bot(bot, task)
+
+    return {"ready (s)": ready, "all polls posted (s)": posted, "all results sent (s)": finished,
+            "requests": requests, "requests/s": requests / finished,
+            "mean loop lag (ms)": monitor.mean * 1e3, "max loop lag (ms)": monitor.max * 1e3,
+            "peak RSS (MB)": peak_rss_mb()}
+
+async def run_reactions(rate: int = 50000, duration: float = 10.0, guilds: int = 10) -> dict[str, float]:
+    """
+    Streams `rate` reaction events per minute for `duration` seconds into the live polls of `guilds` guilds.
+
+    ### Returns:
+        `results (dict)`: Event throughput, gateway-to-handler latency percentiles and peak memory.
+    """
+    events = int(rate * duration / 60)
+    async with FakeDiscordServer() as server:
+        guild_list = [server.add_guild(f"Guild {index}") for index in range(guilds)]
+        with tempfile.TemporaryDirectory() as directory:
+            bot, task, poll = await start(server, directory, 0.0)
+            emojis = list(poll.options.values())
+            members_per_guild = events // (guilds * len(emojis)) + 1
+            voters = {guild.id: [server.add_member(guild, f"voter-{index}") for index in range(members_per_guild)]
+                      for guild in guild_list}
+            await server.wait_for(lambda: all(guild.id in poll.poll and poll.poll[guild.id].active
+                                              for guild in guild_list), timeout=600.0)
+            for guild in guild_list:
+                poll.scheduler.cancel(guild.id)  # Keep the polls open for the whole run
+            messages = [server.messages[poll.poll[guild.id].message_id] for guild in guild_list]
+
+            sent_at: dict[tuple[int, str], float] = {}
+            latencies: list[float] = []
+
+            async def on_raw_reaction_add(payload: RawReactionActionEvent) -> None:
+                sent = sent_at.pop((payload.user_id, str(payload.emoji)), None)
+                if sent is not None:
+                    latencies.append(time.perf_counter() - sent)
+            bot.add_listener(on_raw_reaction_add)
+
+            monitor = LoopLagMonitor(interval=0.01)
+            sampler = asyncio.create_task(monitor.run())
+            tick = 0.01
+            per_tick = rate / 60 * tick
+            started = time.perf_counter()
+            for index in range(events):
+                if index and index % max(1, int(per_tick)) == 0:
+                    await asyncio.sleep(max(0.0, started + index / per_tick * tick - time.perf_counter()))
+                message = messages[index % guilds]
+                user = voters[message.channel.guild.id][index // (guilds * len(emojis))]
+                emoji = emojis[(index // guilds) % len(emojis)]
+                sent_at[(user.id, emoji)] = time.perf_counter()
+                server.react(user, message, emoji)
+            sent = time.perf_counter() - started
+            await server.wait_for(lambda: len(latencies) >= events, timeout=600.0)
+            elapsed = time.perf_counter() - started
+            sampler.cancel()
+
+            counted = sum(sum(poll.tallies[message.id].counts.values()) for message in messages)
+            await stop_bot(bot, task)
+
+    return {"events": events, "counted": counted, "send rate (/min)": events / sent * 60,
+            "handled rate (/min)": events / elapsed * 60,
+            "p50 latency (ms)": statistics.median(latencies) * 1e3,
+            "p99 latency (ms)": percentile(latencies, 0.99) * 1e3,
+            "max latency (ms)": max(latencies) * 1e3,
+            "mean loop lag (ms)": monitor.mean * 1e3, "peak RSS (MB)": peak_rss_mb()}
+
+def main() -> None:
+    """Runs a scenario from the command line and prints its results."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    scenarios = parser.add_subparsers(dest="scenario", required=True)
+    guilds = scenarios.add_parser("guilds")
+    guilds.add_argument("--guilds", type=int, default=1000)
+    guilds.add_argument("--latency", type=float, default=0.0, help="Seconds added to every REST response")
+    guilds.add_argument("--seed-interval", type=float, default=0.0, help="Seconds between seeded reactions")
+    reactions = scenarios.add_parser("reactions")
+    reactions.add_argument("--rate", type=int, default=50000, help="Reaction events per minute")
+    reactions.add_argument("--duration", type=float, default=10.0)
+    reactions.add_argument("--guilds", type=int, default=10)
+    args = parser.parse_args()
+
+    configure_logging(level="WARNING")
+    if args.scenario == "guilds":
+        results = asyncio.run(run_guilds(args.guilds, args.latency, args.seed_interval))
+    else:
+        results = asyncio.run(run_reactions(args.rate, args.duration, args.guilds))
+    for name, value in results.items():
+        print(f"{name:<22} {value:.3f}" if isinstance(value, float) else f"{name:<22} {value}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
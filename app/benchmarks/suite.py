@@ -0,0 +1,236 @@
+"""
+An offline microbenchmark suite for the Poll and logger hot paths, with JSON baselines.
+
+Run the suite and save a baseline with `python -m app.benchmarks.suite run --save`,
+and compare a later run against it with `python -m app.benchmarks.suite compare`.
+The comparison exits with status 1 if any benchmark is slower than the baseline by more than the threshold.
+"""
+
+import argparse
+import asyncio
+import datetime
+import inspect
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Optional, Union
+from unittest.mock import AsyncMock, MagicMock
+
+from discord import TextChannel
+from loguru import logger
+
+from app.logger import logger as app_logger
+from app.logger import DEBUG_LOG, INFO_LOG, configure_logging
+from app.poll import Poll
+from app.poll_state import GuildPoll
+from app.storage import PollStore
+from app.tally import PollTally
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+Benchmark = Callable[[], Union[None, Awaitable[None]]]
+
+def measure(function: Benchmark, number: int, repeat: int = 5) -> float:
+    """
+    Returns the best per-call time of `function` in microseconds over `repeat` runs of `number` calls.
+
+    Functions returning a coroutine are awaited inside a single event loop, so starting the loop is not measured.
+    """
+    async def run_async() -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await function()
+        return time.perf_counter() - start
+
+    def run_sync() -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        return time.perf_counter() - start
+
+    first = function()  # Warm up, and find out whether the function is asynchronous
+    if inspect.isawaitable(first):
+        with asyncio.Runner() as runner:
+            runner.run(first)
+            timings = [runner.run(run_async()) for _ in range(repeat)]
+    else:
+        timings = [run_sync() for _ in range(repeat)]
+    return min(timings) / number * 1e6
+
+def make_options(options: int) -> dict[str, str]:
+    """Creates `options` poll options."""
+    return {f"Game {index}": chr(0x1F400 + index) for index in range(options)}
+
+def make_poll(store: PollStore) -> Poll:
+    """Creates a Poll cog with a mocked bot and the options of the catalog file."""
+    return Poll(MagicMock(), store=store)
+
+def bench_calculate_results(poll: Poll) -> dict[str, float]:
+    """`calculate_results` at varying option and vote counts."""
+    results = {}
+    for options in (4, 16, 64):
+        option_map = make_options(options)
+        for votes in (0, 1000, 100000):
+            tally = PollTally(1, option_map.values())
+            tally.set_counts({emoji: votes // options + (index == 0)
+                              for index, emoji in enumerate(option_map.values())})
+            results[f"calculate_results[{options} options, {votes} votes]"] = measure(
+                lambda: poll.calculate_results(tally, option_map), 2000)
+
+        async def vote_and_render() -> None:
+            tally.add(emoji)
+            await poll.calculate_results(tally, option_map)
+            tally.remove(emoji)
+        emoji = next(iter(option_map.values()))
+        results[f"calculate_results[{options} options, after a vote]"] = measure(vote_and_render, 2000)
+    return results
+
+def bench_get_wait_time(poll: Poll) -> dict[str, float]:
+    """`get_wait_time` for the poll and results days."""
+    return {"get_wait_time[monday 0:00]": measure(lambda: poll.get_wait_time("monday", 0), 2000),
+            "get_wait_time[saturday 20:00]": measure(lambda: poll.get_wait_time("saturday", 20), 2000)}
+
+def bench_save_load(directory: str) -> dict[str, float]:
+    """
+    `save_poll` of every guild and `load_poll` round-trips through the poll store.
+
+    `load_poll` reads on the store's worker thread so it never blocks the event loop. The round trip
+    to that thread is a fixed cost per load, so it makes up most of the 10 guild case.
+    """
+    results = {}
+    for entries, number in ((10, 50), (1000, 5), (100000, 1)):
+        store = PollStore(os.path.join(directory, f"round-trip-{entries}.db"), flush_delay=0)
+        poll = make_poll(store)
+        for guild_id in range(entries):
+            guild_poll = poll.poll[guild_id] = GuildPoll(guild_id, poll.options)
+            guild_poll.start(guild_id * 10, guild_id * 100)
+
+        async def round_trip() -> None:
+            for guild_id in poll.poll:
+                poll.save_poll(guild_id)
+            await store.flush()
+            await poll.load_poll()
+
+        results[f"save_poll+load_poll[{entries} guilds]"] = measure(round_trip, number, repeat=3)
+        store.close()
+    return results
+
+def bench_get_poll_message(poll: Poll) -> dict[str, float]:
+    """`get_poll_message` against a mocked channel, from the message cache and fetched fresh."""
+    message = MagicMock(id=100, created_at=datetime.datetime.now())
+    channel = MagicMock(spec=TextChannel)
+    channel.id = 10
+    channel.fetch_message = AsyncMock(return_value=message)
+    poll.bot.get_channel = MagicMock(return_value=channel)
+    poll.poll[1] = GuildPoll(1, poll.options)
+    poll.poll[1].start(10, 100)
+    poll.messages.put(message)
+
+    return {"get_poll_message[cached]": measure(lambda: poll.get_poll_message(1), 2000),
+            "get_poll_message[fresh fetch]": measure(lambda: poll.get_poll_message(1, fresh=True), 2000)}
+
+def bench_log() -> dict[str, float]:
+    """`app.logger.log` with the context given and resolved, and below the minimum level."""
+    app_logger.set_level("INFO")
+    logger.remove()
+    logger.add(lambda _: None, level="INFO", format=app_logger.TEXT_FORMAT)
+    results = {"log[context given]": measure(lambda: INFO_LOG("message", context="BENCH"), 5000),
+               "log[context resolved]": measure(lambda: INFO_LOG("message"), 5000),
+               "log[filtered out]": measure(lambda: DEBUG_LOG("message"), 5000)}
+    return results
+
+def run(only: Optional[str] = None) -> dict[str, float]:
+    """
+    Runs every benchmark, or those whose group name contains `only`.
+
+    ### Returns:
+        `results (dict)`: A dictionary mapping benchmark names to microseconds per call.
+    """
+    configure_logging(level="WARNING", enqueue=False)
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        store = PollStore(os.path.join(directory, "polls.db"))
+        poll = make_poll(store)
+        groups: dict[str, Callable[[], dict[str, float]]] = {
+            "calculate_results": lambda: bench_calculate_results(make_poll(store)),
+            "get_wait_time": lambda: bench_get_wait_time(poll),
+            "save_load": lambda: bench_save_load(directory),
+            "get_poll_message": lambda: bench_get_poll_message(poll),
+            "log": bench_log,
+        }
+        for name, group in groups.items():
+            if only is None or only in name:
+                results.update(group())
+        store.close()
+    configure_logging()
+    return results
+
+def save_baseline(results: dict[str, float], path: str = BASELINE_PATH) -> None:
+    """Saves benchmark results as a JSON baseline, along with the machine they were measured on."""
+    with open(path, "w") as f:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                   "created": datetime.datetime.now().isoformat(timespec="seconds"),
+                   "results": results}, f, indent=2)
+        f.write("\n")
+
+def load_baseline(path: str = BASELINE_PATH) -> dict[str, float]:
+    """Loads the results of a JSON baseline."""
+    with open(path, "r") as f:
+        return json.load(f)["results"]
+
+def compare(baseline: dict[str, float], results: dict[str, float],
+            threshold: float = DEFAULT_THRESHOLD) -> list[tuple[str, float, float, float]]:
+    """
+    Compares benchmark results against a baseline.
+
+    ### Args:
+        `baseline (dict)`: The baseline microseconds per call of each benchmark.
+        `results (dict)`: The new microseconds per call of each benchmark.
+        `threshold (float)`: The relative slowdown above which a benchmark is flagged, e.g. 0.25 for 25%.
+
+    ### Returns:
+        `regressions (list)`: The `(name, baseline, result, change)` of every flagged benchmark, worst first.
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None or before <= 0:
+            continue
+        change = result / before - 1
+        if change > threshold:
+            regressions.append((name, before, result, change))
+    return sorted(regressions, key=lambda regression: -regression[3])
+
+def main() -> None:
+    """Runs the suite from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=("run", "compare"))
+    parser.add_argument("--only", help="Only run the benchmark groups whose name contains this")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="The JSON baseline to save to or compare with")
+    parser.add_argument("--save", action="store_true", help="Save the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="The relative slowdown that is flagged as a regression")
+    args = parser.parse_args()
+
+    results = run(args.only)
+    baseline = load_baseline(args.baseline) if args.mode == "compare" else {}
+    for name, microseconds in results.items():
+        before = baseline.get(name)
+        change = f"{microseconds / before - 1:+7.1%}" if before else ""
+        print(f"{name:<48} {microseconds:>12.2f} us/call {change}", file=sys.stderr)
+
+    if args.save:
+        save_baseline(results, args.baseline)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+    if args.mode == "compare":
+        regressions = compare(baseline, results, args.threshold)
+        for name, before, after, change in regressions:
+            print(f"REGRESSION {name}: {before:.2f} -> {after:.2f} us/call ({change:+.1%})", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
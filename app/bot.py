@@ -0,0 +1,85 @@
+"""
+The Spooky Saturday bot and its startup, shared by `main.py` and the fake Discord harness.
+"""
+
+import asyncio
+import os
+from typing import Optional
+
+from discord.ext import commands
+
+from app.logger import INFO_LOG, ERROR_LOG
+from app.supervisor import TaskSupervisor
+from app import metrics
+from app.loop_lag import LoopLagMonitor
+from app.extensions import load_poll_extension
+
+class SpookyBot(commands.AutoShardedBot):
+    """
+    The bot, with a supervisor running its background tasks.
+
+    The bot connects every shard Discord recommends in one process, unless `shard_ids` and
+    `shard_count` are set before it starts, as they are in the worker processes of a sharded deployment.
+
+    ### Attributes:
+        `supervisor (TaskSupervisor)`: Runs the Poll cog's scheduler loop, restarting it if it crashes.
+        `metrics (Optional[MetricsServer])`: Serves the bot's Prometheus metrics once it is ready.
+        `metrics_port (Optional[int])`: The port metrics are served on, 0 for any free port, or None to read `METRICS_PORT`.
+        `loop_lag (LoopLagMonitor)`: Samples the event loop lag into the loop lag gauge once the bot is ready.
+        `profiler (Optional[Profiler])`: Captures profiles of the running bot on demand, created by the first `!profile`.
+        `testing (bool)`: Whether the Poll cog bypasses the poll's date-time check.
+        `testing_guild (Optional[int])`: The only guild the date-time check is bypassed in, or None for every guild.
+        `poll_store (Optional[PollStore])`: The store the Poll cog saves to, or None for the default one.
+        `poll_reloading (bool)`: Whether the Poll extension is being reloaded.
+        `poll_handoff (Optional[Poll])`: The unloaded Poll cog whose state the reloaded one takes over.
+    """
+    def __init__(self, testing: bool = False, testing_guild: Optional[int] = None,
+                 metrics_port: Optional[int] = None, **kwargs):
+        super().__init__(http_trace=metrics.http_trace(), **kwargs)
+        self.supervisor = TaskSupervisor()
+        self.startup_lock = asyncio.Lock()
+        self.metrics: Optional[metrics.MetricsServer] = None
+        self.metrics_port = metrics_port
+        self.loop_lag = LoopLagMonitor(interval=1.0, on_sample=metrics.LOOP_LAG.set)
+        self.profiler = None
+        self.testing = testing
+        self.testing_guild = testing_guild
+        self.poll_store = None
+        self.poll_reloading = False
+        self.poll_handoff = None
+
+    async def on_ready(self) -> None:
+        """
+        Loads the Poll extension and starts the bot's background tasks.
+
+        on_ready fires again after the bot reconnects, so the Poll extension is only loaded the first time
+        and its scheduler loop is only started if it is not already running.
+        """
+        INFO_LOG(f"Logged in as {self.user.name} at {[guild.name for guild in self.guilds]}")
+        async with self.startup_lock:
+            await load_poll_extension(self)
+            await self.start_metrics()
+        self.supervisor.start("poll-scheduler", lambda: self.get_cog("Poll").send_spooky_saturday(self.testing))
+        self.supervisor.start("loop-lag", self.loop_lag.run)
+
+    async def start_metrics(self) -> None:
+        """
+        Starts the metrics endpoint on `METRICS_HOST`:`metrics_port` if it is not running. Without a `metrics_port`,
+        the port is read from `METRICS_PORT`, serving on localhost:9108 by default.
+        """
+        if self.metrics is not None:
+            return
+        port = self.metrics_port if self.metrics_port is not None else int(os.getenv("METRICS_PORT", metrics.DEFAULT_PORT))
+        server = metrics.MetricsServer(os.getenv("METRICS_HOST", "127.0.0.1"), port)
+        try:
+            await server.start()
+        except OSError as e:
+            ERROR_LOG(f"Unable to serve metrics on {server.host}:{server.port}: {e}")
+            return
+        self.metrics = server
+
+    async def close(self) -> None:
+        await self.supervisor.stop()
+        if self.metrics is not None:
+            await self.metrics.stop()
+        await super().close()
@@ -0,0 +1,166 @@
+"""
+The catalog of poll options, loaded from a JSON file and hot-reloaded when it changes.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from typing import Callable, ItemsView, Iterator, KeysView, Mapping, Optional, ValuesView
+
+from app.logger import ERROR_LOG, INFO_LOG, SUCCESS_LOG
+from app.poll_state import GuildID
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "options.json")
+MAX_OPTIONS = 20 # The most unique reactions Discord allows on a message
+
+class CatalogError(ValueError):
+    """Raised when a catalog file or lineup is invalid."""
+
+class Lineup(Mapping):
+    """
+    An immutable, validated set of poll options, mapping game names to their corresponding emoji in poll order.
+
+    Lineups are interned by `compile_lineup`, so every guild with the same options shares one
+    lineup, and with it the tally slots compiled for its emoji, and active polls save a reference
+    to their lineup instead of a copy.
+
+    ### Attributes:
+        `id (str)`: A content hash identifying the lineup.
+    """
+    __slots__ = ("_options", "id")
+
+    def __init__(self, options: Mapping[str, str]):
+        self._options = dict(options)
+        self.id = hashlib.sha1(json.dumps(list(self._options.items())).encode()).hexdigest()[:16]
+
+    def __getitem__(self, name: str) -> str:
+        return self._options[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._options)
+
+    def __len__(self) -> int:
+        return len(self._options)
+
+    def keys(self) -> KeysView[str]:
+        return self._options.keys()
+
+    def values(self) -> ValuesView[str]:
+        return self._options.values()
+
+    def items(self) -> ItemsView[str, str]:
+        return self._options.items()
+
+    def __repr__(self) -> str:
+        return f"Lineup({self._options!r})"
+
+_lineups: dict[tuple[tuple[str, str], ...], Lineup] = {}
+
+def compile_lineup(options: Mapping[str, str]) -> Lineup:
+    """
+    Validates `options` and returns the shared lineup for them.
+
+    ### Args:
+        `options (Mapping)`: A mapping of game names to their corresponding emoji.
+
+    ### Returns:
+        `lineup (Lineup)`: The lineup, shared with every other caller passing the same options.
+
+    ### Raises:
+        `CatalogError`: If there are no options, too many options, or an empty or repeated name or emoji.
+    """
+    if not isinstance(options, Mapping):
+        raise CatalogError("A lineup must map game names to emoji")
+    key = tuple(options.items())
+    try:
+        lineup = _lineups.get(key)
+    except TypeError as e:
+        raise CatalogError(f"Invalid options: {e}") from e
+    if lineup is not None:
+        return lineup  # Only valid lineups are interned
+
+    for name, emoji in key:
+        if not isinstance(name, str) or not isinstance(emoji, str) or not name.strip() or not emoji.strip():
+            raise CatalogError(f"Invalid option {name!r}: {emoji!r}")
+    if not 0 < len(key) <= MAX_OPTIONS:
+        raise CatalogError(f"A lineup must have between 1 and {MAX_OPTIONS} options, not {len(key)}")
+    if len(set(options.values())) != len(key):
+        raise CatalogError("Every option in a lineup needs its own emoji")
+
+    lineup = _lineups[key] = Lineup(options)
+    return lineup
+
+class OptionCatalog:
+    """
+    The poll lineup of every guild: a default lineup and optional per-guild lineups.
+
+    The catalog file is JSON of the form `{"default": {name: emoji, ...}, "guilds": {guild_id: {name: emoji, ...}}}`.
+    A file that fails validation is rejected as a whole and the previous catalog stays in use.
+    A catalog created with `path=None` and `options` gives every guild those options, e.g. in tests.
+
+    ### Attributes:
+        `path (Optional[str])`: The catalog file, or None for a fixed catalog.
+        `default (Lineup)`: The lineup of guilds without their own.
+        `guilds (dict)`: A dictionary mapping guild IDs to their own lineup.
+        `version (int)`: Incremented every time a changed catalog is loaded.
+    """
+    def __init__(self, path: Optional[str] = DEFAULT_PATH, options: Optional[Mapping[str, str]] = None):
+        self.path = path
+        self.default: Optional[Lineup] = compile_lineup(options) if options is not None else None
+        self.guilds: dict[GuildID, Lineup] = {}
+        self.version = 0
+        self._mtime: Optional[float] = None
+        self.reload()
+
+    def lineup(self, guild_id: Optional[GuildID] = None) -> Lineup:
+        """Returns the lineup of `guild_id`, or the default lineup."""
+        return self.guilds.get(guild_id, self.default)
+
+    def reload(self) -> bool:
+        """
+        Loads the catalog file if it changed since it was last loaded.
+
+        ### Returns:
+            `changed (bool)`: Whether a new catalog was loaded.
+
+        ### Raises:
+            `CatalogError`: If there is no catalog loaded yet and the file is missing or invalid.
+        """
+        if self.path is None:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+            if mtime == self._mtime:
+                return False
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            default = compile_lineup(data["default"])
+            guilds = {int(guild_id): compile_lineup(options) for guild_id, options in data.get("guilds", {}).items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            if self.default is None:
+                raise CatalogError(f"Unable to load the option catalog {self.path}: {e}") from e
+            ERROR_LOG(f"Keeping the current option catalog, {self.path} is invalid: {e}")
+            return False
+
+        self.default, self.guilds, self._mtime = default, guilds, mtime
+        self.version += 1
+        SUCCESS_LOG(f"Loaded option catalog {self.path}: {len(default)} default options, "
+                    f"{len(guilds)} guild lineups")
+        return True
+
+    async def watch(self, on_change: Callable[[], None], interval: float = 5.0,
+                    stop: Callable[[], bool] = lambda: False) -> None:
+        """
+        Reloads the catalog whenever its file changes, checking every `interval` seconds.
+
+        ### Args:
+            `on_change (Callable)`: Called without arguments after a changed catalog is loaded.
+            `interval (float)`: The number of seconds between checks.
+            `stop (Callable)`: Returns True once watching should stop.
+        """
+        INFO_LOG(f"Watching option catalog {self.path} for changes")
+        while not stop():
+            await asyncio.sleep(interval)
+            if self.reload():
+                on_change()
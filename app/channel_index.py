@@ -0,0 +1,85 @@
+"""
+An index resolving the poll channel of every guild, kept current from gateway channel events.
+"""
+
+from typing import Callable, Optional
+
+from discord import Guild, TextChannel
+from discord.abc import GuildChannel
+
+from app.poll_state import GuildID, ChannelID
+
+ChannelTarget = Callable[[GuildID], tuple[Optional[ChannelID], str]]
+
+class ChannelIndex:
+    """
+    Maps each guild to the text channel its polls are posted in.
+
+    A guild's channel is either configured explicitly by ID or found by name. Each guild's
+    channels are scanned once when the guild is indexed; afterwards the index only changes
+    when a channel is created, renamed or deleted.
+
+    ### Attributes:
+        `target (ChannelTarget)`: Returns the `(configured_channel_id, channel_name)` a guild's poll channel should match.
+    """
+    def __init__(self, target: ChannelTarget):
+        self.target = target
+        self._channels: dict[GuildID, ChannelID] = {}
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def get(self, guild_id: GuildID) -> Optional[ChannelID]:
+        """Returns the poll channel of `guild_id`, or None if the guild has no matching channel."""
+        return self._channels.get(guild_id)
+
+    def matches(self, channel: GuildChannel) -> bool:
+        """Whether `channel` is a valid poll channel for its guild."""
+        if not isinstance(channel, TextChannel):
+            return False
+        configured_channel_id, channel_name = self.target(channel.guild.id)
+        if configured_channel_id is not None:
+            return channel.id == configured_channel_id
+        return channel.name == channel_name
+
+    def index_guild(self, guild: Guild) -> Optional[ChannelID]:
+        """
+        Scans the text channels of `guild` for its poll channel.
+
+        ### Args:
+            `guild (discord.Guild)`: The guild to index.
+
+        ### Returns:
+            `channel_id (Optional[ChannelID])`: The guild's poll channel, or None if it has none.
+        """
+        for channel in guild.text_channels:
+            if self.matches(channel):
+                self._channels[guild.id] = channel.id
+                return channel.id
+        self._channels.pop(guild.id, None)
+        return None
+
+    def remove_guild(self, guild_id: GuildID) -> None:
+        """Removes `guild_id` from the index."""
+        self._channels.pop(guild_id, None)
+
+    def channel_created(self, channel: GuildChannel) -> None:
+        """Indexes a newly created channel if its guild has no poll channel yet."""
+        if channel.guild.id not in self._channels and self.matches(channel):
+            self._channels[channel.guild.id] = channel.id
+
+    def channel_updated(self, before: GuildChannel, after: GuildChannel) -> None:
+        """Reindexes the guild of a renamed channel if the rename affects its poll channel."""
+        if before.name == after.name:
+            return
+        if self._channels.get(after.guild.id) == after.id:
+            if not self.matches(after):
+                self.index_guild(after.guild)  # The poll channel was renamed away
+        else:
+            self.channel_created(after)
+
+    def channel_deleted(self, channel: GuildChannel) -> None:
+        """Reindexes the guild of a deleted channel if it was the guild's poll channel."""
+        if self._channels.get(channel.guild.id) == channel.id:
+            self._channels.pop(channel.guild.id)
+            self.index_guild(channel.guild)
@@ -0,0 +1,48 @@
+"""
+Loads the Poll cog as a discord.py extension, and reloads it with new code without losing its state.
+"""
+
+import time
+
+from discord.ext.commands import Bot
+
+from app.logger import INFO_LOG
+
+POLL_EXTENSION = "app.poll"
+
+async def load_poll_extension(bot: Bot) -> None:
+    """Loads the Poll extension, unless it is already loaded."""
+    if POLL_EXTENSION not in bot.extensions:
+        await bot.load_extension(POLL_EXTENSION)
+
+async def reload_poll_extension(bot: Bot) -> float:
+    """
+    Reloads the code of the Poll extension while the bot stays connected.
+
+    The unloaded cog hands its live state to the reloaded one: the poll state of every guild,
+    the tallies, the message cache, the scheduler with its pending deadlines, the outbox and
+    the open poll store. The scheduler loop keeps running and calls the new cog's jobs from
+    then on, so nothing is refetched and no deadline moves. If the new code fails to load,
+    discord.py loads the old module again, which takes the state back the same way.
+
+    Only `app.poll` is reloaded. The modules it imports keep the code they were started with.
+
+    ### Args:
+        `bot (commands.Bot)`: The bot to reload the extension of.
+
+    ### Returns:
+        `seconds (float)`: How long the reload took.
+
+    ### Raises:
+        `discord.ext.commands.ExtensionError`: If the extension is not loaded or its new code fails to load.
+    """
+    start = time.perf_counter()
+    bot.poll_reloading = True
+    try:
+        await bot.reload_extension(POLL_EXTENSION)
+    finally:
+        bot.poll_reloading = False
+        bot.poll_handoff = None
+    seconds = time.perf_counter() - start
+    INFO_LOG(f"Reloaded {POLL_EXTENSION} in {seconds * 1000:.1f}ms")
+    return seconds
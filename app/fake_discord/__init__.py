@@ -0,0 +1,4 @@
+# pylint: disable=all
+from .state import FakeUser, FakeGuild, FakeChannel, FakeMessage
+from .server import FakeDiscordServer
+from .harness import create_bot, start_bot, stop_bot
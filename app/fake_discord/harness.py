@@ -0,0 +1,74 @@
+"""
+Helpers to run the bot with the Poll cog against the fake Discord backend.
+"""
+
+import asyncio
+from typing import Optional
+
+from discord.ext import commands
+
+from app.bot import SpookyBot
+from app.memory import lean_options
+from app.fake_discord.server import FakeDiscordServer, point_discord_at
+from app.storage import PollStore
+
+def create_bot(store: PollStore, testing: bool = True, guild_ready_timeout: float = 0.05,
+               shard_ids: Optional[list[int]] = None, shard_count: Optional[int] = None) -> SpookyBot:
+    """
+    Creates the bot `main.py` runs, with the lean runtime profile, saving to `store`. It starts up the same way:
+    the Poll extension is loaded and its scheduler, the loop lag monitor and the metrics endpoint are started
+    once ready, however often `on_ready` fires, and closing the bot stops them and unloads the Poll cog.
+    Metrics are served on any free port, so several bots can run at once.
+
+    ### Args:
+        `store (PollStore)`: The store the Poll cog saves to.
+        `testing (bool)`: Whether to bypass the poll's date-time check. Defaults to True.
+        `guild_ready_timeout (float)`: How long discord.py waits for more guilds before it is ready.
+        `shard_ids (Optional[list[int]])`: The shards to connect, or None for all of them.
+        `shard_count (Optional[int])`: The total number of shards, or None for the number recommended by the backend.
+
+    ### Returns:
+        `bot (SpookyBot)`: The bot.
+    """
+    bot = SpookyBot(testing, metrics_port=0, command_prefix="!", guild_ready_timeout=guild_ready_timeout,
+                    shard_ids=shard_ids, shard_count=shard_count, **lean_options())
+    bot.poll_store = store
+    return bot
+
+async def start_bot(bot: commands.Bot, server: FakeDiscordServer, timeout: float = 10.0) -> asyncio.Task:
+    """
+    Logs the bot in to the fake backend and waits until the Poll cog is running, i.e. it has loaded
+    its saved polls and added every guild.
+
+    ### Returns:
+        `task (asyncio.Task)`: The task running the bot, to pass to `stop_bot`.
+    """
+    task = asyncio.create_task(bot.start(server.token))
+    def running() -> bool:
+        poll = bot.get_cog("Poll")
+        return poll is not None and all(guild.id in poll.poll for guild in bot.guilds)
+
+    await server.wait_for(lambda: task.done() or running(), timeout)
+    if task.done():
+        task.result()  # Raise the login or connection error
+    return task
+
+async def stop_bot(bot: commands.Bot, task: asyncio.Task) -> None:
+    """Closes the bot, which stops its tasks, unloads the Poll cog and closes its store, and waits for it to stop."""
+    await bot.close()
+    await asyncio.wait_for(task, timeout=5.0)
+
+def run_shard_worker(url: str, db_path: str, index: int, shard_ids: list[int], shard_count: int,
+                     token: str = "fake-token") -> None:
+    """
+    Runs a bot for `shard_ids` against the fake backend serving on `url` until the process is stopped.
+    Meant as the target of a `ShardCoordinator`, bound to the backend with `functools.partial`.
+    """
+    point_discord_at(url)
+
+    async def run() -> None:
+        bot = create_bot(PollStore(db_path, flush_delay=0), shard_ids=shard_ids, shard_count=shard_count)
+        async with bot:
+            await bot.start(token)
+
+    asyncio.run(run())
@@ -0,0 +1,465 @@
+"""
+An in-process stand-in for the Discord REST API and gateway that discord.py can connect to.
+"""
+
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Callable, Optional
+from urllib.parse import unquote
+
+import yarl
+from aiohttp import WSMsgType, web
+from discord.gateway import DiscordWebSocket
+from discord.http import Route
+
+from app.logger import DEBUG_LOG, INFO_LOG
+from app.fake_discord.state import FakeChannel, FakeGuild, FakeMessage, FakeUser, snowflake
+
+API_PATH = "/api/v10"
+HEARTBEAT_INTERVAL = 41250
+
+def json_response(data: Any, status: int = 200, headers: Optional[dict[str, str]] = None) -> web.Response:
+    """Returns a JSON response with the bare content type discord.py expects."""
+    return web.Response(body=json.dumps(data).encode(), status=status,
+                        headers={"Content-Type": "application/json", **(headers or {})})
+
+def point_discord_at(url: str) -> tuple[str, yarl.URL]:
+    """
+    Points discord.py's REST API and gateway URLs at the fake backend serving on `url`, e.g. in a worker process.
+
+    ### Returns:
+        `previous (tuple)`: The previous `(api_base, gateway_url)`, to restore them with `restore_discord_urls`.
+    """
+    previous = (Route.BASE, DiscordWebSocket.DEFAULT_GATEWAY)
+    Route.BASE = url + API_PATH
+    DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(url.replace("http", "ws", 1) + "/gateway")
+    return previous
+
+def restore_discord_urls(previous: tuple[str, yarl.URL]) -> None:
+    """Restores the URLs returned by `point_discord_at`."""
+    Route.BASE, DiscordWebSocket.DEFAULT_GATEWAY = previous
+
+class GatewaySession:
+    """
+    One gateway connection. Events are queued and written by a single task, so they arrive in order.
+
+    ### Attributes:
+        `ws (web.WebSocketResponse)`: The websocket of the connection.
+        `shard (tuple)`: The `(shard_id, shard_count)` the connection identified as.
+        `session_id (str)`: The ID of the gateway session.
+        `sequence (int)`: The sequence number of the last dispatched event.
+    """
+    def __init__(self, ws: web.WebSocketResponse):
+        self.ws = ws
+        self.shard: tuple[int, int] = (0, 1)
+        self.session_id = str(snowflake())
+        self.sequence = 0
+        self.identified = False
+        self._queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self._writer = asyncio.create_task(self._write())
+
+    def covers(self, guild_id: Optional[int]) -> bool:
+        """Whether events of `guild_id` are sent to this connection's shard."""
+        return guild_id is None or (guild_id >> 22) % self.shard[1] == self.shard[0]
+
+    def send(self, op: int, data: Any = None) -> None:
+        """Queues a non-dispatch payload."""
+        self._queue.put_nowait(json.dumps({"op": op, "d": data, "s": None, "t": None}))
+
+    def dispatch(self, event: str, data: Any) -> None:
+        """Queues a dispatch (op 0) event with the next sequence number."""
+        self.sequence += 1
+        self._queue.put_nowait(json.dumps({"op": 0, "d": data, "s": self.sequence, "t": event}))
+
+    async def _write(self) -> None:
+        while (payload := await self._queue.get()) is not None:
+            if self.ws.closed:
+                return
+            await self.ws.send_str(payload)
+
+    async def close(self) -> None:
+        """Stops the writer and closes the websocket."""
+        self._queue.put_nowait(None)
+        await self._writer
+        await self.ws.close()
+
+class FakeDiscordServer:
+    """
+    A fake Discord backend with simulated guilds, channels, messages, reactions and native polls.
+
+    It serves the REST routes and gateway events the bot uses over real HTTP and websocket
+    connections on localhost, so an unmodified `discord.ext.commands.Bot` can log in and run
+    against it. Starting the server points discord.py's API and gateway URLs at it until it
+    is stopped. Latency and 429 responses can be injected to exercise rate limit handling.
+
+    ### Attributes:
+        `token (str)`: The bot token the server accepts.
+        `bot_user (FakeUser)`: The bot's account.
+        `owner (FakeUser)`: The owner of the bot's application and every guild.
+        `guilds (dict)`: A dictionary mapping guild IDs to the simulated guilds.
+        `latency (float)`: The number of seconds added to every REST response.
+        `rate_limit_chance (float)`: The chance of a REST request being answered with a 429.
+        `retry_after (float)`: The number of seconds 429 responses ask the client to wait.
+        `reaction_interval (float)`: The minimum number of seconds between reactions added in the same channel.
+        `shards (int)`: The number of shards recommended by `/gateway/bot`.
+        `requests (Counter)`: The number of REST requests served per route.
+        `rate_limited (int)`: The number of 429 responses sent.
+        `dispatched (int)`: The number of gateway events dispatched.
+    """
+    def __init__(self, latency: float = 0.0, rate_limit_chance: float = 0.0, retry_after: float = 0.05,
+                 reaction_interval: float = 0.0, shards: int = 1, seed: int = 0, token: str = "fake-token"):
+        self.token = token
+        self.bot_user = FakeUser("SpookySaturdayBot", bot=True)
+        self.owner = FakeUser("Owner")
+        self.users: dict[int, FakeUser] = {self.bot_user.id: self.bot_user, self.owner.id: self.owner}
+        self.guilds: dict[int, FakeGuild] = {}
+        self.channels: dict[int, FakeChannel] = {}
+        self.messages: dict[int, FakeMessage] = {}
+        self.latency = latency
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.reaction_interval = reaction_interval
+        self.shards = shards
+        self.requests: Counter[str] = Counter()
+        self.rate_limited = 0
+        self.dispatched = 0
+        self.sessions: list[GatewaySession] = []
+        self.url = ""
+        self._random = random.Random(seed)
+        self._last_reaction: dict[int, float] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._patched: Optional[tuple[str, yarl.URL]] = None
+
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/gateway", self._gateway)
+        app.router.add_get(API_PATH + "/gateway", self._get_gateway)
+        app.router.add_get(API_PATH + "/gateway/bot", self._get_gateway)
+        app.router.add_get(API_PATH + "/users/@me", self._get_me)
+        app.router.add_get(API_PATH + "/oauth2/applications/@me", self._get_application)
+        app.router.add_post(API_PATH + "/channels/{channel_id}/messages", self._create_message)
+        app.router.add_get(API_PATH + "/channels/{channel_id}/messages/{message_id}", self._get_message)
+        app.router.add_patch(API_PATH + "/channels/{channel_id}/messages/{message_id}", self._edit_message)
+        app.router.add_delete(API_PATH + "/channels/{channel_id}/messages/{message_id}", self._delete_message)
+        app.router.add_get(API_PATH + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}",
+                           self._get_reactions)
+        app.router.add_put(API_PATH + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user}",
+                           self._add_reaction)
+        app.router.add_delete(API_PATH + "/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user}",
+                              self._remove_reaction)
+        self._app = app
+
+    async def __aenter__(self) -> "FakeDiscordServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Starts serving on `host:port` (any free port by default) and points discord.py at the server."""
+        self._runner = web.AppRunner(self._app, access_log=None, shutdown_timeout=1.0)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1] # pylint: disable=protected-access
+        self.url = f"http://{host}:{bound_port}"
+
+        self._patched = point_discord_at(self.url)
+        INFO_LOG(f"Fake Discord listening on {self.url}", context="FAKE")
+
+    async def stop(self) -> None:
+        """Closes every gateway connection, stops serving and restores discord.py's URLs."""
+        for session in list(self.sessions):
+            await session.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._patched is not None:
+            restore_discord_urls(self._patched)
+            self._patched = None
+
+    @property
+    def gateway_url(self) -> str:
+        """The URL of the gateway websocket."""
+        return self.url.replace("http", "ws", 1) + "/gateway"
+
+    # World building
+
+    def add_guild(self, name: str, channels: tuple[str, ...] = ("general", "spooky-saturday"),
+                  members: int = 0) -> FakeGuild:
+        """
+        Adds a guild the bot is in. Connected bots receive it as a guild they have joined.
+
+        ### Args:
+            `name (str)`: The name of the guild.
+            `channels (tuple)`: The names of the guild's text channels.
+            `members (int)`: The number of simulated members to add besides the owner and the bot.
+
+        ### Returns:
+            `guild (FakeGuild)`: The new guild.
+        """
+        guild = FakeGuild(name, self.owner)
+        guild.members[self.bot_user.id] = self.bot_user
+        self.guilds[guild.id] = guild
+        for channel_name in channels:
+            self.add_channel(guild, channel_name, dispatch=False)
+        for index in range(members):
+            self.add_member(guild, f"member-{index}")
+        self.dispatch("GUILD_CREATE", guild.to_payload(), guild.id)
+        return guild
+
+    def remove_guild(self, guild: FakeGuild) -> None:
+        """Removes the bot from a guild."""
+        del self.guilds[guild.id]
+        for channel_id in guild.channels:
+            self.channels.pop(channel_id, None)
+        self.dispatch("GUILD_DELETE", {"id": str(guild.id)}, guild.id)
+
+    def add_channel(self, guild: FakeGuild, name: str, dispatch: bool = True) -> FakeChannel:
+        """Adds a text channel to a guild."""
+        channel = FakeChannel(guild, name)
+        guild.channels[channel.id] = self.channels[channel.id] = channel
+        if dispatch:
+            self.dispatch("CHANNEL_CREATE", channel.to_payload(), guild.id)
+        return channel
+
+    def add_member(self, guild: FakeGuild, name: str) -> FakeUser:
+        """Adds a simulated user to a guild."""
+        user = FakeUser(name)
+        self.users[user.id] = guild.members[user.id] = user
+        return user
+
+    def channel_named(self, guild: FakeGuild, name: str) -> Optional[FakeChannel]:
+        """Returns the first channel of a guild with the given name."""
+        return next((channel for channel in guild.channels.values() if channel.name == name), None)
+
+    # User activity
+
+    def send_message(self, channel: FakeChannel, author: FakeUser, content: str) -> FakeMessage:
+        """Posts a message as a user, e.g. to run a command."""
+        message = self._store(FakeMessage(channel, author, content))
+        self.dispatch("MESSAGE_CREATE", message.to_payload(self.bot_user.id, member=True), channel.guild.id)
+        return message
+
+    def react(self, user: FakeUser, message: FakeMessage, emoji: str) -> None:
+        """Adds a user's reaction to a message."""
+        if message.react(user.id, emoji):
+            self.dispatch("MESSAGE_REACTION_ADD", self._reaction_payload(user, message, emoji, member=True),
+                          message.channel.guild.id)
+
+    def unreact(self, user: FakeUser, message: FakeMessage, emoji: str) -> None:
+        """Removes a user's reaction from a message."""
+        if message.unreact(user.id, emoji):
+            self.dispatch("MESSAGE_REACTION_REMOVE", self._reaction_payload(user, message, emoji),
+                          message.channel.guild.id)
+
+    def vote(self, user: FakeUser, message: FakeMessage, answer_id: int, remove: bool = False) -> None:
+        """Adds (or removes) a user's vote for an answer of a native poll."""
+        voters = message.votes[answer_id]
+        if (user.id in voters) != remove:
+            return
+        if remove:
+            voters.discard(user.id)
+        else:
+            voters.add(user.id)
+        self.dispatch("MESSAGE_POLL_VOTE_REMOVE" if remove else "MESSAGE_POLL_VOTE_ADD",
+                      {"user_id": str(user.id), "channel_id": str(message.channel.id), "message_id": str(message.id),
+                       "guild_id": str(message.channel.guild.id), "answer_id": answer_id},
+                      message.channel.guild.id)
+
+    def request_reconnect(self) -> None:
+        """Asks every connected bot to reconnect and resume its session, as Discord does during maintenance."""
+        for session in self.sessions:
+            session.send(7)
+
+    # Gateway
+
+    def dispatch(self, event: str, data: Any, guild_id: Optional[int] = None) -> None:
+        """Sends a gateway event to every identified connection whose shard covers `guild_id`."""
+        for session in self.sessions:
+            if session.identified and session.covers(guild_id):
+                session.dispatch(event, data)
+                self.dispatched += 1
+
+    async def wait_for(self, predicate: Callable[[], bool], timeout: float = 10.0) -> None:
+        """Waits until `predicate()` returns True, raising `asyncio.TimeoutError` after `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise asyncio.TimeoutError("Timed out waiting for the fake Discord backend")
+            await asyncio.sleep(0.01)
+
+    async def _gateway(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        session = GatewaySession(ws)
+        self.sessions.append(session)
+        session.send(10, {"heartbeat_interval": HEARTBEAT_INTERVAL})
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                payload = json.loads(msg.data)
+                if payload["op"] == 1:
+                    session.send(11)
+                elif payload["op"] == 2:
+                    self._identify(session, payload["d"])
+                elif payload["op"] == 6:
+                    session.identified = True
+                    session.sequence = payload["d"].get("seq") or session.sequence
+                    session.dispatch("RESUMED", {})
+        finally:
+            self.sessions.remove(session)
+        return ws
+
+    def _identify(self, session: GatewaySession, data: dict) -> None:
+        if data.get("token") != self.token:
+            asyncio.create_task(session.ws.close(code=4004, message=b"Authentication failed."))
+            return
+        session.shard = tuple(data.get("shard") or (0, 1))
+        session.identified = True
+        guilds = [guild for guild in self.guilds.values() if session.covers(guild.id)]
+        DEBUG_LOG(f"Shard {session.shard[0]} identified with {len(guilds)} guilds", context="FAKE")
+        session.dispatch("READY", {
+            "v": 10, "user": self.bot_user.to_payload(), "session_id": session.session_id,
+            "resume_gateway_url": self.gateway_url, "shard": list(session.shard),
+            "guilds": [{"id": str(guild.id), "unavailable": True} for guild in guilds],
+            "application": {"id": str(self.bot_user.id), "flags": 0}, "private_channels": [], "relationships": [],
+        })
+        for guild in guilds:
+            session.dispatch("GUILD_CREATE", guild.to_payload())
+
+    # REST
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        if request.path == "/gateway":
+            return await handler(request)
+        resource = request.match_info.route.resource
+        self.requests[f"{request.method} {resource.canonical if resource is not None else request.path}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if request.headers.get("Authorization") != f"Bot {self.token}":
+            return json_response({"message": "401: Unauthorized", "code": 0}, status=401)
+        if self.rate_limit_chance and self._random.random() < self.rate_limit_chance:
+            return self._too_many_requests(self.retry_after)
+        return await handler(request)
+
+    def _too_many_requests(self, retry_after: float) -> web.Response:
+        self.rate_limited += 1
+        return json_response({"message": "You are being rate limited.", "retry_after": retry_after,
+                                  "global": False},
+                                 status=429, headers={"Via": "1.1 google", "Retry-After": str(retry_after),
+                                                      "X-RateLimit-Scope": "user"})
+
+    @staticmethod
+    def _not_found(message: str, code: int) -> web.Response:
+        return json_response({"message": message, "code": code}, status=404)
+
+    def _store(self, message: FakeMessage) -> FakeMessage:
+        message.channel.messages[message.id] = self.messages[message.id] = message
+        return message
+
+    def _find_message(self, request: web.Request) -> tuple[Optional[FakeChannel], Optional[FakeMessage]]:
+        channel = self.channels.get(int(request.match_info["channel_id"]))
+        message_id = request.match_info.get("message_id")
+        message = channel.messages.get(int(message_id)) if channel is not None and message_id else None
+        return channel, message
+
+    def _reaction_payload(self, user: FakeUser, message: FakeMessage, emoji: str, member: bool = False) -> dict:
+        payload = {"user_id": str(user.id), "channel_id": str(message.channel.id), "message_id": str(message.id),
+                   "guild_id": str(message.channel.guild.id), "emoji": {"id": None, "name": emoji},
+                   "burst": False, "type": 0, "message_author_id": str(message.author.id)}
+        if member:
+            payload["member"] = user.member_payload()
+        return payload
+
+    async def _get_gateway(self, request: web.Request) -> web.Response:
+        return json_response({"url": self.gateway_url, "shards": self.shards,
+                                  "session_start_limit": {"total": 1000, "remaining": 1000,
+                                                          "reset_after": 0, "max_concurrency": 1}})
+
+    async def _get_me(self, request: web.Request) -> web.Response:
+        return json_response(self.bot_user.to_payload())
+
+    async def _get_application(self, request: web.Request) -> web.Response:
+        return json_response({"id": str(self.bot_user.id), "name": self.bot_user.name, "icon": None,
+                                  "description": "", "rpc_origins": [], "bot_public": True,
+                                  "bot_require_code_grant": False, "owner": self.owner.to_payload(), "team": None,
+                                  "verify_key": "", "flags": 0, "summary": ""})
+
+    async def _create_message(self, request: web.Request) -> web.Response:
+        channel, _ = self._find_message(request)
+        if channel is None:
+            return self._not_found("Unknown Channel", 10003)
+        if request.content_type.startswith("multipart/"):
+            body = json.loads((await request.post())["payload_json"])
+        else:
+            body = await request.json()
+        message = self._store(FakeMessage(channel, self.bot_user, body.get("content") or "",
+                                          body.get("embeds"), body.get("poll")))
+        self.dispatch("MESSAGE_CREATE", message.to_payload(self.bot_user.id, member=True), channel.guild.id)
+        return json_response(message.to_payload(self.bot_user.id))
+
+    async def _get_message(self, request: web.Request) -> web.Response:
+        _, message = self._find_message(request)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        return json_response(message.to_payload(self.bot_user.id))
+
+    async def _edit_message(self, request: web.Request) -> web.Response:
+        _, message = self._find_message(request)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        body = await request.json()
+        message.content = body.get("content", message.content)
+        message.embeds = body.get("embeds", message.embeds)
+        message.edited_at = message.created_at
+        payload = message.to_payload(self.bot_user.id)
+        self.dispatch("MESSAGE_UPDATE", payload, message.channel.guild.id)
+        return json_response(payload)
+
+    async def _delete_message(self, request: web.Request) -> web.Response:
+        channel, message = self._find_message(request)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        del channel.messages[message.id]
+        del self.messages[message.id]
+        self.dispatch("MESSAGE_DELETE", {"id": str(message.id), "channel_id": str(channel.id),
+                                         "guild_id": str(channel.guild.id)}, channel.guild.id)
+        return web.Response(status=204)
+
+    async def _get_reactions(self, request: web.Request) -> web.Response:
+        _, message = self._find_message(request)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        limit = int(request.query.get("limit", 25))
+        after = int(request.query.get("after", 0))
+        user_ids = sorted(user_id for user_id in message.reactions.get(unquote(request.match_info["emoji"]), ())
+                          if user_id > after)
+        return json_response([self.users[user_id].to_payload() for user_id in user_ids[:limit]])
+
+    async def _add_reaction(self, request: web.Request) -> web.Response:
+        channel, message = self._find_message(request)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        if self.reaction_interval:
+            wait = self._last_reaction.get(channel.id, 0.0) + self.reaction_interval - time.monotonic()
+            if wait > 0:
+                return self._too_many_requests(round(wait, 3))
+            self._last_reaction[channel.id] = time.monotonic()
+        self.react(self.bot_user, message, unquote(request.match_info["emoji"]))
+        return web.Response(status=204)
+
+    async def _remove_reaction(self, request: web.Request) -> web.Response:
+        _, message = self._find_message(request)
+        if message is None:
+            return self._not_found("Unknown Message", 10008)
+        user = request.match_info["user"]
+        user = self.bot_user if user == "@me" else self.users.get(int(user))
+        if user is not None:
+            self.unreact(user, message, unquote(request.match_info["emoji"]))
+        return web.Response(status=204)
@@ -0,0 +1,186 @@
+"""
+The simulated users, guilds, channels and messages of the fake Discord backend, and their API payloads.
+"""
+
+import datetime
+import itertools
+import time
+from typing import Any, Optional
+
+DISCORD_EPOCH = 1420070400000
+
+_increment = itertools.count()
+
+def snowflake() -> int:
+    """Returns a new unique snowflake ID for the current time, so `created_at` works as it does on Discord."""
+    return ((int(time.time() * 1000) - DISCORD_EPOCH) << 22) | (next(_increment) & 0x3FFFFF)
+
+def timestamp(when: Optional[datetime.datetime] = None) -> str:
+    """Returns `when` (defaults to now) as an ISO 8601 timestamp, the format Discord sends."""
+    return (when or datetime.datetime.now(datetime.timezone.utc)).isoformat()
+
+class FakeUser:
+    """
+    A simulated user or bot account.
+
+    ### Attributes:
+        `id (int)`: The user's ID.
+        `name (str)`: The user's name.
+        `bot (bool)`: Whether the user is a bot.
+    """
+    def __init__(self, name: str, bot: bool = False, user_id: Optional[int] = None):
+        self.id = user_id if user_id is not None else snowflake()
+        self.name = name
+        self.bot = bot
+
+    def to_payload(self) -> dict[str, Any]:
+        """Returns the user as a Discord user object."""
+        return {"id": str(self.id), "username": self.name, "global_name": None, "discriminator": "0",
+                "avatar": None, "bot": self.bot, "public_flags": 0}
+
+    def member_payload(self, user: bool = True) -> dict[str, Any]:
+        """Returns the user as a guild member object, with or without the nested user object."""
+        payload = {"roles": [], "joined_at": timestamp(), "deaf": False, "mute": False, "flags": 0}
+        if user:
+            payload["user"] = self.to_payload()
+        return payload
+
+class FakeGuild:
+    """
+    A simulated guild.
+
+    ### Attributes:
+        `id (int)`: The guild's ID.
+        `name (str)`: The guild's name.
+        `owner (FakeUser)`: The guild's owner, who has every permission.
+        `members (dict)`: A dictionary mapping user IDs to the guild's members.
+        `channels (dict)`: A dictionary mapping channel IDs to the guild's channels.
+    """
+    def __init__(self, name: str, owner: FakeUser):
+        self.id = snowflake()
+        self.name = name
+        self.owner = owner
+        self.members: dict[int, FakeUser] = {owner.id: owner}
+        self.channels: dict[int, "FakeChannel"] = {}
+
+    def to_payload(self) -> dict[str, Any]:
+        """Returns the guild as a GUILD_CREATE payload, including its channels and members."""
+        return {
+            "id": str(self.id), "name": self.name, "icon": None, "owner_id": str(self.owner.id),
+            "roles": [{"id": str(self.id), "name": "@everyone", "permissions": "104324673", "position": 0,
+                       "color": 0, "hoist": False, "managed": False, "mentionable": False, "flags": 0}],
+            "emojis": [], "stickers": [], "features": [], "large": False, "unavailable": False,
+            "member_count": len(self.members), "members": [member.member_payload() for member in self.members.values()],
+            "channels": [channel.to_payload() for channel in self.channels.values()],
+            "threads": [], "voice_states": [], "presences": [], "stage_instances": [], "guild_scheduled_events": [],
+            "joined_at": timestamp(), "mfa_level": 0, "verification_level": 0, "explicit_content_filter": 0,
+            "default_message_notifications": 0, "system_channel_id": None, "premium_tier": 0,
+            "preferred_locale": "en-US", "nsfw_level": 0,
+        }
+
+class FakeChannel:
+    """
+    A simulated guild text channel.
+
+    ### Attributes:
+        `id (int)`: The channel's ID.
+        `guild (FakeGuild)`: The guild the channel is in.
+        `name (str)`: The channel's name.
+        `messages (dict)`: A dictionary mapping message IDs to the channel's messages, oldest first.
+    """
+    def __init__(self, guild: FakeGuild, name: str):
+        self.id = snowflake()
+        self.guild = guild
+        self.name = name
+        self.position = len(guild.channels)
+        self.messages: dict[int, "FakeMessage"] = {}
+
+    def to_payload(self) -> dict[str, Any]:
+        """Returns the channel as a Discord channel object."""
+        return {"id": str(self.id), "type": 0, "guild_id": str(self.guild.id), "name": self.name,
+                "position": self.position, "permission_overwrites": [], "nsfw": False, "parent_id": None,
+                "topic": None, "last_message_id": None, "rate_limit_per_user": 0, "flags": 0}
+
+class FakeMessage:
+    """
+    A simulated message, with its reactions and native poll votes.
+
+    ### Attributes:
+        `id (int)`: The message's ID.
+        `channel (FakeChannel)`: The channel the message is in.
+        `author (FakeUser)`: The author of the message.
+        `content (str)`: The text of the message.
+        `embeds (list)`: The message's embed objects, as sent.
+        `poll (Optional[dict])`: The native poll request the message was sent with, if any.
+        `reactions (dict)`: A dictionary mapping each emoji to the IDs of the users who reacted with it, in order.
+        `votes (dict)`: A dictionary mapping each native poll answer ID to the IDs of the users who voted for it.
+    """
+    def __init__(self, channel: FakeChannel, author: FakeUser, content: str = "",
+                 embeds: Optional[list[dict]] = None, poll: Optional[dict] = None):
+        self.id = snowflake()
+        self.channel = channel
+        self.author = author
+        self.content = content
+        self.embeds = embeds or []
+        self.poll = poll
+        self.created_at = timestamp()
+        self.edited_at: Optional[str] = None
+        self.reactions: dict[str, dict[int, None]] = {}
+        self.votes: dict[int, set[int]] = {}
+        if poll is not None:
+            self.votes = {answer_id: set() for answer_id in range(1, len(poll["answers"]) + 1)}
+
+    def to_payload(self, me: int, member: bool = False) -> dict[str, Any]:
+        """
+        Returns the message as a Discord message object.
+
+        ### Args:
+            `me (int)`: The ID of the user the payload is for, to fill in the `me` fields of reactions and votes.
+            `member (bool)`: Whether to include the author's member object, as gateway MESSAGE_CREATE events do.
+        """
+        payload = {
+            "id": str(self.id), "channel_id": str(self.channel.id), "guild_id": str(self.channel.guild.id),
+            "author": self.author.to_payload(), "content": self.content, "timestamp": self.created_at,
+            "edited_timestamp": self.edited_at, "tts": False, "mention_everyone": False, "mentions": [],
+            "mention_roles": [], "attachments": [], "embeds": self.embeds, "pinned": False, "type": 0, "flags": 0,
+            "reactions": [{"emoji": {"id": None, "name": emoji}, "count": len(users), "me": me in users,
+                           "me_burst": False, "burst_colors": [], "count_details": {"burst": 0, "normal": len(users)}}
+                          for emoji, users in self.reactions.items() if users],
+        }
+        if member:
+            payload["member"] = self.author.member_payload(user=False)
+        if self.poll is not None:
+            payload["poll"] = self.poll_payload(me)
+        return payload
+
+    def poll_payload(self, me: int) -> dict[str, Any]:
+        """Returns the message's native poll as a Discord poll object, with its current results."""
+        expiry = (datetime.datetime.fromisoformat(self.created_at)
+                  + datetime.timedelta(hours=self.poll.get("duration", 24)))
+        return {
+            "question": self.poll["question"],
+            "answers": [{"answer_id": answer_id, "poll_media": answer["poll_media"]}
+                        for answer_id, answer in enumerate(self.poll["answers"], start=1)],
+            "expiry": timestamp(expiry),
+            "allow_multiselect": self.poll.get("allow_multiselect", False),
+            "layout_type": self.poll.get("layout_type", 1),
+            "results": {"is_finalized": False,
+                        "answer_counts": [{"id": answer_id, "count": len(users), "me_voted": me in users}
+                                          for answer_id, users in self.votes.items() if users]},
+        }
+
+    def react(self, user_id: int, emoji: str) -> bool:
+        """Adds a reaction, returning False if the user had already reacted with the emoji."""
+        users = self.reactions.setdefault(emoji, {})
+        if user_id in users:
+            return False
+        users[user_id] = None
+        return True
+
+    def unreact(self, user_id: int, emoji: str) -> bool:
+        """Removes a reaction, returning False if the user had not reacted with the emoji."""
+        users = self.reactions.get(emoji)
+        if users is None or user_id not in users:
+            return False
+        del users[user_id]
+        return True
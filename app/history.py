@@ -0,0 +1,179 @@
+"""
+The history of finished polls and the per-option statistics derived from it.
+"""
+
+import datetime
+import sqlite3
+from typing import Optional
+
+from app.logger import SUCCESS_LOG
+from app.poll_state import GuildID
+from app.storage import PollStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS poll_weeks (
+    guild_id INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    total_votes INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, week)
+);
+CREATE TABLE IF NOT EXISTS poll_week_options (
+    guild_id INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    option TEXT NOT NULL,
+    votes INTEGER NOT NULL,
+    won INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, week, option)
+);
+CREATE TABLE IF NOT EXISTS option_totals (
+    guild_id INTEGER NOT NULL,
+    option TEXT NOT NULL,
+    polls INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    votes INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, option)
+);
+"""
+
+def week_of(date: datetime.date) -> int:
+    """Returns the number of the Monday-to-Sunday week `date` falls in."""
+    return (date.toordinal() - 1) // 7
+
+class OptionStats:
+    """
+    The statistics of one poll option over a range of weeks.
+
+    ### Attributes:
+        `option (str)`: The option.
+        `polls (int)`: The number of polls the option was in.
+        `wins (int)`: The number of polls the option won or tied for first.
+        `votes (int)`: The total number of votes for the option.
+        `trend (float)`: The change in average votes per poll between the older and newer half of the range.
+    """
+    def __init__(self, option: str, polls: int, wins: int, votes: int, trend: float = 0.0):
+        self.option = option
+        self.polls = polls
+        self.wins = wins
+        self.votes = votes
+        self.trend = trend
+
+    @property
+    def win_rate(self) -> float:
+        """The fraction of polls the option won."""
+        return self.wins / self.polls if self.polls else 0.0
+
+    @property
+    def average_votes(self) -> float:
+        """The average number of votes per poll."""
+        return self.votes / self.polls if self.polls else 0.0
+
+class PollStats:
+    """
+    The statistics of a guild's polls over a range of weeks.
+
+    ### Attributes:
+        `weeks (Optional[int])`: The number of weeks covered, or None for all time.
+        `polls (int)`: The number of finished polls.
+        `average_turnout (float)`: The average number of votes per poll.
+        `options (list[OptionStats])`: The statistics of each option, most wins first.
+    """
+    def __init__(self, weeks: Optional[int], polls: int, average_turnout: float, options: list[OptionStats]):
+        self.weeks = weeks
+        self.polls = polls
+        self.average_turnout = average_turnout
+        self.options = options
+
+class PollHistory:
+    """
+    Records every finished poll in the poll store and answers statistics queries from rollups.
+
+    Each finished poll adds one row per option to `poll_week_options` (keyed by guild and week)
+    and updates the all-time `option_totals` rollup in the same transaction, so queries over N
+    weeks read at most N rows per option through the primary key and all-time queries read one
+    row per option, no matter how many polls have been recorded.
+
+    ### Attributes:
+        `store (PollStore)`: The store the history is kept in.
+    """
+    def __init__(self, store: PollStore):
+        self.store = store
+        self.store.execute_script(SCHEMA)
+
+    async def record(self, guild_id: GuildID, votes: dict[str, int],
+                     finished_at: Optional[datetime.datetime] = None) -> None:
+        """
+        Records the results of a finished poll.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild the poll belongs to.
+            `votes (dict)`: A dictionary mapping each option to its number of votes.
+            `finished_at (Optional[datetime.datetime])`: When the poll finished. Defaults to now.
+        """
+        finished_at = finished_at if finished_at is not None else datetime.datetime.now()
+        await self.store.run(self._record, guild_id, week_of(finished_at.date()), finished_at.timestamp(), votes)
+        SUCCESS_LOG(f"Recorded poll results of guild {guild_id}")
+
+    @staticmethod
+    def _record(connection: sqlite3.Connection, guild_id: GuildID, week: int,
+                finished_at: float, votes: dict[str, int]) -> None:
+        max_votes = max(votes.values(), default=0)
+        with connection:
+            connection.execute("BEGIN")
+            previous = connection.execute("SELECT option, votes, won FROM poll_week_options "
+                                          "WHERE guild_id = ? AND week = ?", (guild_id, week)).fetchall()
+            for option, old_votes, old_won in previous:  # A poll re-recorded in the same week replaces the old one
+                connection.execute("UPDATE option_totals SET polls = polls - 1, wins = wins - ?, votes = votes - ? "
+                                   "WHERE guild_id = ? AND option = ?", (old_won, old_votes, guild_id, option))
+            connection.execute("DELETE FROM poll_week_options WHERE guild_id = ? AND week = ?", (guild_id, week))
+
+            connection.execute("INSERT OR REPLACE INTO poll_weeks (guild_id, week, finished_at, total_votes) "
+                               "VALUES (?, ?, ?, ?)", (guild_id, week, finished_at, sum(votes.values())))
+            rows = [(guild_id, week, option, count, int(max_votes > 0 and count == max_votes))
+                    for option, count in votes.items()]
+            connection.executemany("INSERT INTO poll_week_options (guild_id, week, option, votes, won) "
+                                   "VALUES (?, ?, ?, ?, ?)", rows)
+            connection.executemany("INSERT INTO option_totals (guild_id, option, polls, wins, votes) "
+                                   "VALUES (?, ?, 1, ?, ?) ON CONFLICT(guild_id, option) DO UPDATE SET "
+                                   "polls = polls + 1, wins = wins + excluded.wins, votes = votes + excluded.votes",
+                                   [(guild_id, option, won, count) for _, _, option, count, won in rows])
+
+    async def stats(self, guild_id: GuildID, weeks: Optional[int] = None,
+                    today: Optional[datetime.date] = None) -> PollStats:
+        """
+        Returns the statistics of a guild's polls.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild to get the statistics of.
+            `weeks (Optional[int])`: The number of most recent weeks to cover. Defaults to all time.
+            `today (Optional[datetime.date])`: The date the range of weeks ends at. Defaults to today.
+
+        ### Returns:
+            `stats (PollStats)`: The statistics of the guild's polls.
+        """
+        current_week = week_of(today if today is not None else datetime.date.today())
+        return await self.store.run(self._stats, guild_id, weeks, current_week)
+
+    @staticmethod
+    def _stats(connection: sqlite3.Connection, guild_id: GuildID, weeks: Optional[int], current_week: int) -> PollStats:
+        if weeks is None:
+            polls, turnout = connection.execute("SELECT COUNT(*), COALESCE(AVG(total_votes), 0) FROM poll_weeks "
+                                                "WHERE guild_id = ?", (guild_id,)).fetchone()
+            rows = connection.execute("SELECT option, polls, wins, votes FROM option_totals WHERE guild_id = ?",
+                                      (guild_id,)).fetchall()
+            options = [OptionStats(*row) for row in rows]
+        else:
+            first_week = current_week - weeks + 1
+            middle_week = first_week + weeks // 2
+            polls, turnout = connection.execute("SELECT COUNT(*), COALESCE(AVG(total_votes), 0) FROM poll_weeks "
+                                                "WHERE guild_id = ? AND week >= ?", (guild_id, first_week)).fetchone()
+            rows = connection.execute(
+                "SELECT option, COUNT(*), SUM(won), SUM(votes), "
+                "AVG(CASE WHEN week < ? THEN votes END), AVG(CASE WHEN week >= ? THEN votes END) "
+                "FROM poll_week_options WHERE guild_id = ? AND week >= ? GROUP BY option",
+                (middle_week, middle_week, guild_id, first_week)).fetchall()
+            options = [OptionStats(option, count, wins, votes, (newer or 0.0) - (older or 0.0))
+                       for option, count, wins, votes, older, newer in rows]
+
+        options.sort(key=lambda stats: (-stats.wins, -stats.average_votes, stats.option))
+        return PollStats(weeks, polls, turnout, options)
@@ -1,4 +1,5 @@
 # pylint: disable=all
-from .logger import INFO_LOG, WARN_LOG, SUCCESS_LOG, DEBUG_LOG, ERROR_LOG, CRITICAL_LOG, log
+from .logger import INFO_LOG, WARN_LOG, SUCCESS_LOG, DEBUG_LOG, ERROR_LOG, CRITICAL_LOG, log, set_level, is_enabled
+from .sinks import configure_logging, shutdown_logging
 
 DEBUG_LOG("Logger imported", context="SERVER")
\ No newline at end of file
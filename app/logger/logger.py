@@ -2,57 +2,113 @@
 Logger module for the SpookySaturdayBot application.
 """
 
+import os
+import sys
+from types import CodeType
+from typing import Callable, Union
+
 from loguru import logger
 from colorist import BrightColor as BColour
-import inspect
-import os
 
-def log(message: str, context: str = None, level: str = "INFO") -> None:
+LEVELS: dict[str, int] = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50,
+}
+
+TEXT_FORMAT = ("<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+               "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - "
+               "<level>[{extra[context]}] {message}</level>")
+
+_min_level: int = LEVELS["DEBUG"]
+_context_cache: dict[CodeType, str] = {}
+
+Message = Union[str, Callable[[], str]]
+
+# The context is bound to each record as a field; text sinks render it as the "[context]" tag.
+# The sinks themselves are set up by `configure_logging`. Until then, Loguru's default stderr sink
+# (handler 0), which would drop the tag, is swapped for one in the text format; sinks added by
+# whoever imported the logger are left alone.
+logger.configure(extra={"context": "APP"})
+try:
+    logger.remove(0)
+except ValueError:
+    pass  # Already removed before the logger was imported
+else:
+    logger.add(sys.stderr, format=TEXT_FORMAT)
+
+def set_level(level: str) -> None:
+    """
+    Sets the minimum level that is logged.
+
+    Calls below this level return before resolving the caller context or formatting the message.
+
+    Args:
+        level (str): The minimum logging level, e.g. "INFO".
+    """
+    global _min_level # pylint: disable=global-statement
+    level = level.upper()
+    if level not in LEVELS:
+        raise ValueError(f"Invalid log level: {level}")
+    _min_level = LEVELS[level]
+
+def is_enabled(level: str) -> bool:
+    """Whether a message at `level` would be logged."""
+    return LEVELS.get(level.upper(), LEVELS["INFO"]) >= _min_level
+
+def log(message: Message, context: str = None, level: str = "INFO") -> None:
     """
     Logs a message using Loguru with the appropriate caller context.
-    
+
     If context is not provided, it is automatically filled using get_context().
     Adjusting the stack level makes Loguru show the correct source location.
-    
+    Messages below the minimum level are dropped before any work is done; `message`
+    may be a callable returning the message to defer building it until it is needed.
+
     Args:
-        message (str): The message to log.
+        message (str | Callable[[], str]): The message to log.
         context (str, optional): The logging context.
         level (str): The logging level.
     """
+    level = level.upper()
+    if level not in LEVELS:
+        level = "INFO"
+    if LEVELS[level] < _min_level:
+        return
+
     if context is None:
         context = get_context()
-    final_message = f"[{context}] {message}"
+    if callable(message):
+        message = message()
 
     # Adjust the stack depth so that Loguru's record shows the correct caller.
-    depth = 2
-
-    match level.upper():
-        case "DEBUG":
-            logger.opt(depth=depth).debug(final_message)
-        case "INFO":
-            logger.opt(depth=depth).info(final_message)
-        case "SUCCESS":
-            logger.opt(depth=depth).success(final_message)
-        case "WARNING":
-            logger.opt(depth=depth).warning(final_message)
-        case "ERROR":
-            logger.opt(depth=depth).error(final_message)
-        case "CRITICAL":
-            logger.opt(depth=depth).critical(final_message)
-        case _:
-            logger.opt(depth=depth).info(final_message)
+    logger.opt(depth=2).bind(context=context).log(level, message)
 
 def get_context() -> str:
-    stack = inspect.stack()
-    for frame_info in stack:
-        filename = os.path.basename(frame_info.filename)
-        if filename != os.path.basename(__file__):
-            return filename
-    return "APP"
+    """
+    Returns the file name of the first caller outside of this module.
+
+    Walks the raw frame objects instead of building `inspect.stack()` (which reads source lines
+    for every frame) and caches the result by the caller's code object.
+    """
+    frame = sys._getframe(1) # pylint: disable=protected-access
+    while frame is not None and frame.f_code.co_filename == __file__:
+        frame = frame.f_back
+    if frame is None:
+        return "APP"
+
+    code = frame.f_code
+    context = _context_cache.get(code)
+    if context is None:
+        context = _context_cache[code] = os.path.basename(code.co_filename)
+    return context
 
 INFO_LOG = lambda message, context=None: log(message, context=context, level="INFO")
 SUCCESS_LOG = lambda message, context=None: log(message, context=context, level="SUCCESS")
 WARN_LOG = lambda message, context=None: log(message, context=context, level="WARNING")
 DEBUG_LOG = lambda message, context=None: log(message, context=context, level="DEBUG")
 ERROR_LOG = lambda message, context=None: log(message, context=context, level="ERROR")
-CRITICAL_LOG = lambda message, context=None: log(message, context=context, level="CRITICAL")
\ No newline at end of file
+CRITICAL_LOG = lambda message, context=None: log(message, context=context, level="CRITICAL")
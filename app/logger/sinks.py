@@ -0,0 +1,219 @@
+"""
+Configurable output sinks for the SpookySaturdayBot logger.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import queue
+import re
+import shutil
+import sys
+import threading
+from typing import Optional, TextIO
+
+from loguru import logger
+
+from .logger import TEXT_FORMAT, set_level
+
+SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+TIME_UNITS = {"hour": 3600, "day": 86400, "week": 604800}
+
+class RotatingFile:
+    """
+    A log file that is rotated once it reaches a size or age, keeping a number of gzip compressed old files.
+
+    Args:
+        path (str): The path of the log file.
+        rotation (str): When to rotate, as a size ("10 MB") or an age ("1 day", "2 weeks").
+        retention (int): The number of rotated files to keep.
+        compression (str, optional): "gz" to compress rotated files, or None to keep them as text.
+    """
+    def __init__(self, path: str, rotation: str = "10 MB", retention: int = 5, compression: Optional[str] = "gz"):
+        self.path = path
+        self.retention = retention
+        self.compression = compression
+        self.max_bytes, self.max_age = self._parse_rotation(rotation)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._opened_at = datetime.datetime.now()
+
+    @staticmethod
+    def _parse_rotation(rotation: str) -> tuple[Optional[int], Optional[float]]:
+        match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]+?)s?\s*", rotation)
+        if match is None:
+            raise ValueError(f"Invalid log rotation: {rotation}")
+        amount, unit = float(match.group(1)), match.group(2)
+        if unit.upper() in SIZE_UNITS:
+            return int(amount * SIZE_UNITS[unit.upper()]), None
+        if unit.lower() in TIME_UNITS:
+            return None, amount * TIME_UNITS[unit.lower()]
+        raise ValueError(f"Invalid log rotation unit: {unit}")
+
+    def write(self, text: str) -> None:
+        """Writes `text`, rotating the file first if it is due."""
+        if self._due():
+            self.rotate()
+        self._file.write(text)
+
+    def flush(self) -> None:
+        """Flushes the file to disk."""
+        self._file.flush()
+
+    def _due(self) -> bool:
+        if self.max_bytes is not None:
+            return self._file.tell() >= self.max_bytes
+        return (datetime.datetime.now() - self._opened_at).total_seconds() >= self.max_age
+
+    def rotate(self) -> None:
+        """Closes the current file, renames it with a timestamp, compresses it and drops the oldest rotated files."""
+        self._file.close()
+        rotated = f"{self.path}.{datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.path, rotated)
+        if self.compression == "gz":
+            with open(rotated, "rb") as source, gzip.open(rotated + ".gz", "wb") as target:
+                shutil.copyfileobj(source, target)
+            os.remove(rotated)
+
+        directory, name = os.path.split(os.path.abspath(self.path))
+        old_files = sorted(file for file in os.listdir(directory) if file.startswith(name + "."))
+        for old_file in old_files[:max(0, len(old_files) - self.retention)]:
+            os.remove(os.path.join(directory, old_file))
+
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = datetime.datetime.now()
+
+    def stop(self) -> None:
+        """Closes the file. Called by Loguru when the sink is removed."""
+        self._file.close()
+
+class BatchedSink:
+    """
+    A non-blocking sink that hands formatted records to a background thread, which writes them to `target` in batches.
+
+    Writing only appends to an in-memory queue, so a slow disk or container log driver never blocks
+    the event loop; the writer thread drains everything queued since its last write into a single
+    write and flush. Loguru calls `stop` when the sink is removed, which writes every queued record.
+
+    Args:
+        target (TextIO | RotatingFile): Where batches are written.
+        max_batch (int): The maximum number of records written at once.
+    """
+    _STOP = object()
+
+    def __init__(self, target, max_batch: int = 512):
+        self.target = target
+        self.max_batch = max_batch
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        """Queues a formatted record."""
+        self._queue.put(str(message))
+
+    def qsize(self) -> int:
+        """The number of records waiting to be written."""
+        return self._queue.qsize()
+
+    def isatty(self) -> bool:
+        """Whether the target is a terminal, so Loguru knows whether to colourise records."""
+        return getattr(self.target, "isatty", lambda: False)()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = []
+            stopping = item is self._STOP
+            if not stopping:
+                batch.append(item)
+            while len(batch) < self.max_batch and not stopping:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+            if batch:
+                try:
+                    self.target.write("".join(batch))
+                    self.target.flush()
+                except (OSError, ValueError) as e:
+                    print(f"Error writing logs: {e}", file=sys.__stderr__)
+            if stopping:
+                return
+
+    def stop(self) -> None:
+        """Writes every queued record and stops the writer thread."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+        if isinstance(self.target, RotatingFile):
+            self.target.stop()
+
+def _json_format(record: dict) -> str:
+    """Renders a record as one JSON object per line, with the logging context as its own field."""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "context": record["extra"].get("context", "APP"),
+        "message": record["message"],
+        "module": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    if record["exception"] is not None:
+        entry["exception"] = repr(record["exception"].value)
+    record["extra"]["_json"] = json.dumps(entry, ensure_ascii=False)
+    return "{extra[_json]}\n"
+
+_sinks: list[BatchedSink] = []
+
+def configure_logging(level: str = "DEBUG",
+                      file: Optional[str] = None,
+                      rotation: str = "10 MB",
+                      retention: int = 5,
+                      compression: Optional[str] = "gz",
+                      json_lines: bool = False,
+                      enqueue: bool = True,
+                      stream: TextIO = sys.stderr) -> None:
+    """
+    Replaces the logger's sinks with a stream sink and an optional rotating file sink.
+
+    Args:
+        level (str): The minimum logging level.
+        file (str, optional): The path of a log file. No file is written if not given.
+        rotation (str): When the log file is rotated, as a size ("10 MB") or an age ("1 day").
+        retention (int): The number of rotated log files to keep.
+        compression (str, optional): "gz" to compress rotated log files.
+        json_lines (bool): Whether to write one JSON object per line instead of text.
+        enqueue (bool): Whether to write through a background writer thread instead of on the caller.
+        stream (TextIO): The stream console logs are written to.
+    """
+    set_level(level)
+    log_format = _json_format if json_lines else TEXT_FORMAT
+
+    logger.remove()
+    _sinks.clear()
+    targets = [stream]
+    if file is not None:
+        targets.append(RotatingFile(file, rotation, retention, compression))
+
+    for target in targets:
+        sink = target
+        if enqueue:
+            sink = BatchedSink(target)
+            _sinks.append(sink)
+        logger.add(sink, format=log_format, level=level.upper(),
+                   colorize=False if json_lines or target is not stream else None)
+
+def queued_records() -> int:
+    """The number of records waiting in the background writers, e.g. to watch for a backlog."""
+    return sum(sink.qsize() for sink in _sinks)
+
+def shutdown_logging() -> None:
+    """Writes every queued record and closes the sinks."""
+    logger.remove()
+    _sinks.clear()
@@ -0,0 +1,55 @@
+"""
+Measures how late the event loop runs scheduled callbacks.
+"""
+
+import asyncio
+import time
+from typing import Callable, Optional
+
+class LoopLagMonitor:
+    """
+    Repeatedly sleeps for `interval` seconds and records how much later than requested it woke up.
+
+    The overshoot is the time the loop spent running other callbacks (or blocked) when it should
+    have woken the monitor, which is the delay every other task on the loop sees as well.
+
+    ### Attributes:
+        `interval (float)`: The number of seconds between samples.
+        `last (float)`: The most recent lag in seconds.
+        `max (float)`: The largest lag in seconds since the last `reset`.
+        `total (float)`: The sum of every lag in seconds since the last `reset`.
+        `samples (int)`: The number of samples since the last `reset`.
+        `on_sample (Optional[Callable])`: Called with every lag sample in seconds, e.g. to set a gauge.
+    """
+    def __init__(self, interval: float = 0.5, on_sample: Optional[Callable[[float], None]] = None):
+        self.interval = interval
+        self.on_sample = on_sample
+        self.reset()
+
+    def reset(self) -> None:
+        """Clears the recorded samples."""
+        self.last = 0.0
+        self.max = 0.0
+        self.total = 0.0
+        self.samples = 0
+
+    @property
+    def mean(self) -> float:
+        """The mean lag in seconds since the last `reset`."""
+        return self.total / self.samples if self.samples else 0.0
+
+    def record(self, lag: float) -> None:
+        """Records one lag sample in seconds."""
+        self.last = lag
+        self.max = max(self.max, lag)
+        self.total += lag
+        self.samples += 1
+        if self.on_sample is not None:
+            self.on_sample(lag)
+
+    async def run(self) -> None:
+        """Samples the loop lag until cancelled."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, time.perf_counter() - start - self.interval))
@@ -2,24 +2,26 @@
 Spooky Saturday Bot
 """
 
+import asyncio
+import contextlib
 import os
+import signal
 import sys
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
-from discord import Intents
+from discord import File
 from discord.ext import commands
 from discord.ext.commands import Context, DefaultHelpCommand
 from colorist import BrightColor as BColour
 
-from app.poll import Poll
-from app.logger import INFO_LOG, WARN_LOG
-
-TESTING: bool = True # Set to False when deploying to production. Changes guild to 0, bypasses date time check pylint: disable=C0301
-
-intents = Intents.default()
-intents.message_content = True
+from app.logger import INFO_LOG, WARN_LOG, ERROR_LOG, configure_logging, shutdown_logging
+from app import metrics
+from app.bot import SpookyBot
+from app.extensions import reload_poll_extension
+from app.memory import lean_options, memory_report, resident_memory
 
 class CustomHelpCommand(DefaultHelpCommand):
     """
@@ -66,7 +68,8 @@ class CustomHelpCommand(DefaultHelpCommand):
         )
         await self.get_destination().send(f"{help_text}")
 
-bot = commands.Bot(command_prefix='!', intents=intents, help_command=CustomHelpCommand())
+bot = SpookyBot(command_prefix='!', help_command=CustomHelpCommand(), **lean_options())
+metrics.RESIDENT_MEMORY.set_function(lambda: resident_memory() or 0)
 
 @bot.command(name="hi")
 async def send_hello(ctx: Context) -> None:
@@ -75,28 +78,129 @@ async def send_hello(ctx: Context) -> None:
     """
     await ctx.send("Hello World!")
 
-@bot.event
-async def on_ready():
+@bot.command(name="tasks")
+@commands.is_owner()
+async def send_task_states(ctx: Context) -> None:
     """
-    Event handler for the bot's on_ready event.
+    Shows the state of the bot's background tasks. Only the bot owner can use this.
     """
-    INFO_LOG(f"Logged in as {bot.user.name} at {[guild.name for guild in bot.guilds]}")
-    await bot.add_cog(Poll(bot, TESTING))
-    poll = bot.get_cog('Poll')
-    bot.loop.create_task(poll.send_spooky_saturday(TESTING))
+    lines = [f"`{state.name}`: {state.status}, up {time.monotonic() - state.started_at:.0f}s, "
+             f"{state.restarts} restarts{f', last error: {state.last_error}' if state.last_error else ''}"
+             for state in bot.supervisor.states()]
+    await ctx.send("\n".join(lines) if lines else "No background tasks are running.")
 
-if __name__ == "__main__":
+@bot.command(name="reload")
+@commands.is_owner()
+async def reload_poll(ctx: Context) -> None:
+    """
+    Reloads the code of the Poll cog without reconnecting, keeping its polls, tallies and schedule. Only the bot owner can use this.
+    """
+    try:
+        seconds = await reload_poll_extension(bot)
+    except commands.ExtensionError as e:
+        ERROR_LOG(f"Unable to reload the Poll cog: {e}")
+        await ctx.send(f"Unable to reload the Poll cog, the old code is still running: {e}")
+        return
+    await ctx.send(f"Reloaded the Poll cog in {seconds * 1000:.0f}ms.")
+
+@bot.command(name="memory")
+@commands.is_owner()
+async def send_memory_report(ctx: Context) -> None:
+    """
+    Shows how much memory the bot uses, overall and per guild. Only the bot owner can use this.
+    """
+    await ctx.send(memory_report(bot).render())
+
+@bot.command(name="profile")
+@commands.is_owner()
+async def send_profile(ctx: Context, seconds: int = 10) -> None:
+    """
+    Profiles the bot for a number of seconds and sends the report. Only the bot owner can use this.
+    """
+    from app.profiler import MAX_SECONDS, Profiler, save_report  # pylint: disable=import-outside-toplevel
+    if not 1 <= seconds <= MAX_SECONDS:
+        await ctx.send(f"The profile must last between 1 and {MAX_SECONDS} seconds.")
+        return
+    if bot.profiler is None:
+        bot.profiler = Profiler()
+    if bot.profiler.active:
+        await ctx.send("A profile is already being captured.")
+        return
+    await ctx.send(f"Profiling for {seconds} seconds...")
+    report = await bot.profiler.capture(seconds)
+    path = await asyncio.to_thread(save_report, report)
+    await ctx.send(f"Profiled {report.seconds:.1f}s, saved to `{os.path.basename(path)}`.",
+                   files=[File(path), File(path.removesuffix(".txt") + ".pstats")])
+
+def setup_logging() -> None:
+    """Configures logging from the environment."""
+    configure_logging(level=os.getenv("LOG_LEVEL", "DEBUG"),
+                      file=os.getenv("LOG_FILE"),
+                      rotation=os.getenv("LOG_ROTATION", "10 MB"),
+                      json_lines=os.getenv("LOG_JSON", "0") == "1")
+
+def configure_testing() -> None:
+    """
+    Reads testing mode from the environment. `TESTING=1` bypasses the poll's date-time check, only in the
+    guild `TESTING_GUILD_ID` if it is set. Testing mode is off unless `TESTING` is set.
+    """
+    bot.testing = os.getenv("TESTING", "0") == "1"
+    guild_id = os.getenv("TESTING_GUILD_ID")
+    bot.testing_guild = int(guild_id) if guild_id else None
+    if bot.testing:
+        WARN_LOG("Running in TESTING MODE. Bypassing date-time check in "
+                 f"{'every guild' if bot.testing_guild is None else f'guild {bot.testing_guild}'}.", context="SERVER")
+
+def run_worker(index: int, shard_ids: list[int], shard_count: int) -> None:
+    """
+    Runs the bot for a range of shards in a worker process of a sharded deployment, until it is terminated.
+
+    ### Args:
+        `index (int)`: The worker's position, which offsets its metrics port so workers don't collide.
+        `shard_ids (list[int])`: The shards to connect.
+        `shard_count (int)`: The total number of shards.
+    """
     load_dotenv()
+    setup_logging()
+    configure_testing()
+    os.environ["METRICS_PORT"] = str(int(os.getenv("METRICS_PORT", metrics.DEFAULT_PORT)) + index)
+    bot.shard_ids, bot.shard_count = shard_ids, shard_count
+    INFO_LOG(f"Starting worker {index} for shards {shard_ids} of {shard_count}")
 
-    INFO_LOG("Starting Spooky Saturday Bot")
+    async def runner() -> None:
+        loop = asyncio.get_running_loop()
+        with contextlib.suppress(NotImplementedError):  # Not supported on Windows
+            loop.add_signal_handler(signal.SIGTERM, lambda: loop.create_task(bot.close()))
+        async with bot:
+            await bot.start(os.environ["BOT_TOKEN"])
 
-    if TESTING:
-        WARN_LOG(f"Running in TESTING MODE. "
-                 "GUILD_INDEX set to 0. Bypassing date-time check.", context="SERVER")
+    asyncio.run(runner())
+    shutdown_logging()
 
-    if "BOT_TOKEN" in os.environ:
-        bot.run(os.getenv("BOT_TOKEN"))
+if __name__ == "__main__":
+    load_dotenv()
+    setup_logging()
 
-    else:
+    INFO_LOG("Starting Spooky Saturday Bot")
+    configure_testing()
+
+    if "BOT_TOKEN" not in os.environ:
         INFO_LOG("BOT_TOKEN not found in environment variables. Exiting.")
+        shutdown_logging()
         exit()
+
+    workers = int(os.getenv("SHARD_WORKERS", "1"))
+    if workers > 1:
+        from app.sharding import ShardCoordinator  # pylint: disable=import-outside-toplevel
+        from app.storage import PollStore  # pylint: disable=import-outside-toplevel
+        # Sharded deployment: the shards are split between worker processes, each running its own bot.
+        # They share the poll store, so an old save file is imported once, before any of them start.
+        store = PollStore()
+        store.import_legacy_json()
+        store.close()
+        coordinator = ShardCoordinator(run_worker, int(os.getenv("SHARD_COUNT", workers)), workers)
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(coordinator.run())
+    else:
+        bot.run(os.getenv("BOT_TOKEN"))
+    shutdown_logging()
@@ -0,0 +1,98 @@
+"""
+The bot's lean runtime profile, and a report of the memory it uses per guild.
+"""
+
+import os
+import sys
+from typing import Any, Optional
+
+from discord import Intents, MemberCacheFlags
+from discord.ext.commands import Bot
+
+def lean_intents() -> Intents:
+    """The only gateway events the bot needs: guilds and channels, command messages, and votes."""
+    intents = Intents.none()
+    intents.guilds = True           # Guilds and their channels, to find poll channels
+    intents.guild_messages = True   # Commands, and edits and deletes of poll messages
+    intents.message_content = True  # Command prefixes
+    intents.guild_reactions = True  # Votes on reaction polls
+    intents.guild_polls = True      # Votes on native polls
+    return intents
+
+def lean_options() -> dict[str, Any]:
+    """
+    The keyword arguments that give a bot the lean runtime profile.
+
+    Besides trimming the intents, members are not cached or chunked, and discord.py's message
+    cache is turned off: the Poll cog keeps its own small cache of poll messages.
+    """
+    return {"intents": lean_intents(), "member_cache_flags": MemberCacheFlags.none(),
+            "chunk_guilds_at_startup": False, "max_messages": None}
+
+def resident_memory() -> Optional[int]:
+    """
+    The process's resident set size in bytes. Where it can't be read, the peak resident set size
+    is returned instead, or None if neither is available.
+    """
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Bytes on macOS, KiB elsewhere
+
+BASELINE = resident_memory()
+
+class MemoryReport:
+    """
+    How much memory the bot uses, overall and per guild.
+
+    ### Attributes:
+        `rss (Optional[int])`: The resident set size of the process in bytes.
+        `baseline (Optional[int])`: The resident set size in bytes once the bot's modules were imported,
+            before it connected to any guild.
+        `guilds (int)`: The number of guilds the bot is in.
+        `members (int)`: The number of members cached across every guild.
+        `messages (int)`: The number of messages in discord.py's message cache.
+        `polls (int)`: The number of guilds with poll state.
+        `tallies (int)`: The number of live poll tallies.
+    """
+    def __init__(self, rss: Optional[int], baseline: Optional[int], guilds: int, members: int, messages: int,
+                 polls: int, tallies: int):
+        self.rss = rss
+        self.baseline = baseline
+        self.guilds = guilds
+        self.members = members
+        self.messages = messages
+        self.polls = polls
+        self.tallies = tallies
+
+    @property
+    def per_guild(self) -> Optional[float]:
+        """The resident memory in bytes the bot gained per guild since its baseline."""
+        if self.rss is None or self.baseline is None or not self.guilds:
+            return None
+        return max(self.rss - self.baseline, 0) / self.guilds
+
+    def render(self) -> str:
+        """Renders the report as text."""
+        rss = f"{self.rss / 2**20:.1f} MiB" if self.rss is not None else "unknown"
+        per_guild = f"{self.per_guild / 2**10:.1f} KiB" if self.per_guild is not None else "n/a"
+        return (f"Resident memory: {rss}, {per_guild} per guild above the baseline across {self.guilds} guilds\n"
+                f"Cached: {self.members} members, {self.messages} messages\n"
+                f"Poll state: {self.polls} guilds, {self.tallies} live tallies")
+
+def memory_report(bot: Bot) -> MemoryReport:
+    """Measures the memory of `bot` and its Poll cog, if it has one."""
+    poll = bot.get_cog("Poll")
+    return MemoryReport(rss=resident_memory(), baseline=BASELINE,
+                        guilds=len(bot.guilds),
+                        members=sum(len(guild.members) for guild in bot.guilds),
+                        messages=len(bot.cached_messages),
+                        polls=len(poll.poll) if poll is not None else 0,
+                        tallies=len(poll.tallies) if poll is not None else 0)
@@ -0,0 +1,59 @@
+"""
+A bounded cache of fetched poll messages.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from discord import Message
+
+from app.poll_state import PollID
+
+class MessageCache:
+    """
+    A least-recently-used cache of fetched `discord.Message` objects whose entries expire after a time-to-live.
+
+    Entries are invalidated by the Poll cog when the gateway reports the message was edited or deleted.
+
+    ### Attributes:
+        `maxsize (int)`: The maximum number of cached messages. The least recently used message is evicted first.
+        `ttl (float)`: The number of seconds a cached message stays valid for.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[PollID, tuple[float, Message]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, message_id: PollID) -> bool:
+        return self.get(message_id) is not None
+
+    def get(self, message_id: PollID) -> Optional[Message]:
+        """Returns the cached message, or None if it is not cached or has expired."""
+        entry = self._entries.get(message_id)
+        if entry is None:
+            return None
+        expires_at, message = entry
+        if expires_at < time.monotonic():
+            del self._entries[message_id]
+            return None
+        self._entries.move_to_end(message_id)
+        return message
+
+    def put(self, message: Message) -> None:
+        """Caches `message`, evicting the least recently used message if the cache is full."""
+        self._entries[message.id] = (time.monotonic() + self.ttl, message)
+        self._entries.move_to_end(message.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, message_id: PollID) -> None:
+        """Removes `message_id` from the cache."""
+        self._entries.pop(message_id, None)
+
+    def clear(self) -> None:
+        """Removes every message from the cache."""
+        self._entries.clear()
@@ -0,0 +1,227 @@
+"""
+Prometheus metrics for the bot, served as text on a local `/metrics` endpoint.
+
+The metrics are plain in-process counters, gauges and fixed-bucket histograms: recording one is a
+dictionary lookup and an addition, so they are cheap enough to leave on all the time.
+"""
+
+import bisect
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
+
+import aiohttp
+
+if TYPE_CHECKING:
+    from aiohttp import web  # Imported when the server starts, as the bot only needs the aiohttp client
+
+from app.logger import INFO_LOG
+
+DEFAULT_PORT = 9108
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[str, ...]
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    """
+    The base of every metric.
+
+    ### Attributes:
+        `name (str)`: The metric name, e.g. `spooky_polls_posted_total`.
+        `help (str)`: The description shown in the exposition text.
+        `labels (Labels)`: The names of the metric's labels.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):  # pylint: disable=redefined-builtin
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def render(self) -> list[str]:
+        """Returns the lines of the metric in the Prometheus text format."""
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    """A value that only goes up, e.g. the number of polls posted."""
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):  # pylint: disable=redefined-builtin
+        super().__init__(name, help, labels)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Adds `amount` to the counter of `label_values`."""
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        """The current value of the counter of `label_values`."""
+        return self._values.get(label_values, 0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labels, values)} {value}" for values, value in self._values.items()]
+
+class Gauge(Metric):
+    """A value that goes up and down, set directly or read from a function when scraped."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Labels = ()):  # pylint: disable=redefined-builtin
+        super().__init__(name, help, labels)
+        self._values: dict[Labels, float] = {}
+        self._functions: dict[Labels, Callable[[], float]] = {}
+
+    def set(self, value: float, *label_values: str) -> None:
+        """Sets the gauge of `label_values`."""
+        self._values[label_values] = value
+
+    def set_function(self, function: Callable[[], float], *label_values: str) -> None:
+        """Reads the gauge of `label_values` from `function()` whenever the metrics are scraped."""
+        self._functions[label_values] = function
+
+    def value(self, *label_values: str) -> float:
+        """The current value of the gauge of `label_values`."""
+        function = self._functions.get(label_values)
+        return function() if function is not None else self._values.get(label_values, 0)
+
+    def _samples(self) -> list[str]:
+        keys = list(self._values) + [key for key in self._functions if key not in self._values]
+        return [f"{self.name}{_format_labels(self.labels, values)} {self.value(*values)}" for values in keys]
+
+class Histogram(Metric):
+    """The distribution of observed values, e.g. request latencies, counted in fixed buckets."""
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Labels = (),  # pylint: disable=redefined-builtin
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: dict[Labels, list[int]] = {}
+        self._sums: dict[Labels, float] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Records one observation of `value`."""
+        counts = self._counts.get(label_values)
+        if counts is None:
+            counts = self._counts[label_values] = [0] * (len(self.buckets) + 1)
+            self._sums[label_values] = 0.0
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._sums[label_values] += value
+
+    @contextmanager
+    def time(self, *label_values: str) -> Iterator[None]:
+        """Observes how many seconds the body of the `with` block takes, including any `await` in it."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def count(self, *label_values: str) -> int:
+        """The number of observations of `label_values`."""
+        return sum(self._counts.get(label_values, ()))
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for values, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, values)} {self._sums[values]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, values)} {cumulative}")
+        return lines
+
+class Registry:
+    """A collection of metrics rendered together."""
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """Adds `metric` to the registry and returns it."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text format."""
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+REGISTRY = Registry()
+
+DISCORD_LATENCY: Histogram = REGISTRY.register(Histogram(
+    "spooky_discord_request_seconds", "Latency of Discord API calls made by the Poll cog", ("call",)))
+RATE_LIMITED: Counter = REGISTRY.register(Counter(
+    "spooky_discord_rate_limited_total", "429 responses received from the Discord API"))
+VOTES: Counter = REGISTRY.register(Counter(
+    "spooky_votes_total", "Poll votes processed from gateway events", ("action",)))
+POLLS_POSTED: Counter = REGISTRY.register(Counter(
+    "spooky_polls_posted_total", "Polls posted", ("mode",)))
+LOOP_LAG: Gauge = REGISTRY.register(Gauge(
+    "spooky_event_loop_lag_seconds", "How late the event loop most recently ran a scheduled callback"))
+RESIDENT_MEMORY: Gauge = REGISTRY.register(Gauge(
+    "spooky_resident_memory_bytes", "Resident memory of the bot process"))
+RECONCILE_SECONDS: Gauge = REGISTRY.register(Gauge(
+    "spooky_reconcile_seconds", "How long the most recent reconciliation took to make every active poll consistent"))
+RECONCILED_POLLS: Counter = REGISTRY.register(Counter(
+    "spooky_reconciled_polls_total", "Active polls refetched by reconciliation", ("outcome",)))
+POLL_GUILDS: Gauge = REGISTRY.register(Gauge(
+    "spooky_poll_guilds", "Guilds with poll state, and those with an active poll", ("state",)))
+
+def http_trace() -> aiohttp.TraceConfig:
+    """Creates an aiohttp trace config, passed to the bot as `http_trace`, that counts 429 responses."""
+    async def on_request_end(session, context, params: aiohttp.TraceRequestEndParams) -> None:
+        if params.response.status == 429:
+            RATE_LIMITED.inc()
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_end.append(on_request_end)
+    return trace
+
+class MetricsServer:
+    """
+    Serves `/metrics` over HTTP from the bot's event loop.
+
+    ### Attributes:
+        `host (str)`: The address to listen on. Defaults to localhost only.
+        `port (int)`: The port to listen on, or 0 for any free port. Set to the bound port once started.
+        `registry (Registry)`: The metrics served.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._runner: Optional["web.AppRunner"] = None
+
+    async def start(self) -> None:
+        """Starts listening, unless the server is already running."""
+        if self._runner is not None:
+            return
+        from aiohttp import web  # pylint: disable=import-outside-toplevel
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]  # pylint: disable=protected-access
+        INFO_LOG(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """Stops listening."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _metrics(self, _: "web.Request") -> "web.Response":
+        from aiohttp import web  # pylint: disable=import-outside-toplevel
+        return web.Response(text=self.registry.render(), content_type="text/plain",
+                            headers={"X-Content-Type-Options": "nosniff"})
@@ -0,0 +1,113 @@
+"""
+Helpers for posting the Spooky Saturday poll as native Discord polls instead of emoji reactions.
+"""
+
+import datetime
+import math
+from functools import lru_cache
+from typing import Iterable, Optional
+
+from discord import Message
+from discord import Poll as DiscordPoll
+
+MAX_ANSWERS = 10 # The maximum number of answers Discord allows in a single poll
+MAX_DURATION_HOURS = 768 # The maximum duration Discord allows a poll to run for
+
+def split_options(options: dict[str, str], max_answers: int = MAX_ANSWERS) -> list[dict[str, str]]:
+    """
+    Splits `options` into as few parts as possible with at most `max_answers` options each.
+
+    The options keep their order and the parts are as even as possible (16 options become 8 + 8),
+    so the same options always end up in the same part and at the same answer ID.
+
+    ### Args:
+        `options (dict)`: A dictionary mapping game names to their corresponding emoji.
+        `max_answers (int)`: The maximum number of options in a part.
+
+    ### Returns:
+        `parts (list[dict])`: The options of each part.
+    """
+    items = list(options.items())
+    if not items:
+        return []
+    size = _part_size(len(items), max_answers)
+    return [dict(items[index:index + size]) for index in range(0, len(items), size)]
+
+def _part_size(count: int, max_answers: int = MAX_ANSWERS) -> int:
+    return math.ceil(count / math.ceil(count / max_answers))
+
+@lru_cache(maxsize=256)
+def _answer_parts(emojis: tuple[str, ...]) -> tuple[tuple[str, ...], ...]:
+    """
+    The emoji of each part's answers, split like `split_options`.
+
+    Polls posted with the same options share one split, so it is computed once per option set
+    instead of on every vote event.
+    """
+    if not emojis:
+        return ()
+    size = _part_size(len(emojis))
+    return tuple(emojis[index:index + size] for index in range(0, len(emojis), size))
+
+def build_polls(question: str, options: dict[str, str], results_at: datetime.datetime) -> list[DiscordPoll]:
+    """
+    Builds the native polls for `options`, one per part, running until `results_at`.
+
+    ### Args:
+        `question (str)`: The question of the poll. Parts are numbered when there is more than one.
+        `options (dict)`: A dictionary mapping game names to their corresponding emoji.
+        `results_at (datetime.datetime)`: When the results are announced.
+
+    ### Returns:
+        `polls (list[discord.Poll])`: The polls to send, in order.
+    """
+    hours = math.ceil((results_at - datetime.datetime.now(results_at.tzinfo)).total_seconds() / 3600)
+    duration = datetime.timedelta(hours=min(max(hours, 1), MAX_DURATION_HOURS))
+
+    parts = split_options(options)
+    polls = []
+    for index, part in enumerate(parts, start=1):
+        part_question = f"{question} ({index}/{len(parts)})" if len(parts) > 1 else question
+        poll = DiscordPoll(question=part_question, duration=duration, multiple=True)
+        for option, emoji in part.items():
+            poll.add_answer(text=option.removesuffix(emoji).strip() or option, emoji=emoji)
+        polls.append(poll)
+    return polls
+
+def answer_emoji(options: dict[str, str], part_index: int, answer_id: int) -> Optional[str]:
+    """
+    Returns the emoji of the option behind `answer_id` in the `part_index`th part, or None if there is no such answer.
+
+    ### Args:
+        `options (dict)`: The options the poll was posted with.
+        `part_index (int)`: The index of the poll message among the poll's parts.
+        `answer_id (int)`: The answer ID reported by Discord, starting at 1.
+    """
+    parts = _answer_parts(tuple(options.values()))
+    if not 0 <= part_index < len(parts):
+        return None
+    emojis = parts[part_index]
+    if not 1 <= answer_id <= len(emojis):
+        return None
+    return emojis[answer_id - 1]
+
+def count_votes(messages: Iterable[Message], options: dict[str, str]) -> dict[str, int]:
+    """
+    Merges the vote counts of the native poll messages of a poll.
+
+    ### Args:
+        `messages (Iterable[discord.Message])`: The poll's messages, in part order.
+        `options (dict)`: The options the poll was posted with.
+
+    ### Returns:
+        `counts (dict)`: A dictionary mapping emoji to their number of votes.
+    """
+    counts = {emoji: 0 for emoji in options.values()}
+    for part_index, message in enumerate(messages):
+        if message.poll is None:
+            continue
+        for answer in message.poll.answers:
+            emoji = answer_emoji(options, part_index, answer.id)
+            if emoji is not None:
+                counts[emoji] = answer.vote_count
+    return counts
@@ -0,0 +1,222 @@
+"""
+A prioritised queue for the bot's outbound messages, paced per channel and across every channel.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+from enum import IntEnum
+from typing import Any, Optional
+
+from discord import Forbidden, HTTPException, Message, NotFound
+from discord.abc import Messageable
+
+from app.logger import WARN_LOG
+from app.metrics import DISCORD_LATENCY
+from app.poll_state import ChannelID
+
+MAX_LENGTH = 2000 # The longest message content Discord accepts
+
+class Priority(IntEnum):
+    """The priority of an outbound message. Lower values are sent first."""
+    RESULTS = 0
+    POLL = 1
+    CHATTER = 2
+
+class Outgoing:
+    """
+    A queued message and every caller waiting for it to be sent.
+
+    ### Attributes:
+        `channel (Messageable)`: The channel to send the message to.
+        `content (Optional[str])`: The text of the message.
+        `kwargs (dict)`: The other arguments of `channel.send`, such as `embed` or `poll`.
+        `priority (Priority)`: The priority of the message.
+        `mergeable (bool)`: Whether later text messages to the same channel may be appended to this one.
+        `futures (list[asyncio.Future])`: Resolved with the sent message, one per merged message.
+    """
+    __slots__ = ("channel", "content", "kwargs", "priority", "mergeable", "futures")
+
+    def __init__(self, channel: Messageable, content: Optional[str], kwargs: dict[str, Any], priority: Priority,
+                 mergeable: bool, future: asyncio.Future):
+        self.channel = channel
+        self.content = content
+        self.kwargs = kwargs
+        self.priority = priority
+        self.mergeable = mergeable
+        self.futures = [future]
+
+    def merge(self, content: str, priority: Priority, future: asyncio.Future) -> bool:
+        """Appends `content` to the message if it is mergeable text of the same priority that still fits."""
+        if not self.mergeable or priority != self.priority or len(self.content) + 1 + len(content) > MAX_LENGTH:
+            return False
+        self.content += "\n" + content
+        self.futures.append(future)
+        return True
+
+class Outbox:
+    """
+    Sends messages in priority order, so poll results go out before polls and polls before chatter.
+
+    Messages to one channel are sent one at a time, in order within a priority, and at least
+    `interval` seconds apart, which keeps them inside the channel's message bucket. Across
+    channels at most `concurrency` messages are in flight and at most `rate` are started per
+    second, so a burst of results from every guild at once stays under the global rate limit
+    instead of collapsing into 429 retries. A text message queued with `merge=True` is appended
+    to the channel's previous queued message when that one is mergeable too and not yet sent.
+
+    ### Attributes:
+        `rate (float)`: The most messages started per second across every channel.
+        `interval (float)`: The minimum number of seconds between messages to the same channel.
+        `concurrency (int)`: The most messages in flight at once.
+        `max_attempts (int)`: The number of times a message is tried when Discord fails with a server error.
+        `backoff (float)`: The delay in seconds before the first retry, doubled on each further retry.
+        `sent (int)`: The number of messages sent.
+        `merged (int)`: The number of messages merged into another message.
+    """
+    def __init__(self, rate: float = 25.0, interval: float = 0.25, concurrency: int = 8,
+                 max_attempts: int = 3, backoff: float = 1.0):
+        self.rate = rate
+        self.interval = interval
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.sent = 0
+        self.merged = 0
+        self._queue: list[tuple[int, int, Outgoing]] = []
+        self._order = itertools.count()
+        self._tails: dict[ChannelID, Outgoing] = {}
+        self._busy: set[ChannelID] = set()
+        self._next_slot: dict[ChannelID, float] = {}
+        self._next_start = 0.0
+        self._in_flight: set[asyncio.Task] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def send(self, channel: Messageable, content: Optional[str] = None, *, priority: Priority = Priority.CHATTER,
+             merge: bool = False, **kwargs) -> "asyncio.Future[Message]":
+        """
+        Queues a message to be sent to `channel`.
+
+        ### Args:
+            `channel (Messageable)`: The channel to send the message to.
+            `content (Optional[str])`: The text of the message.
+            `priority (Priority)`: The priority of the message. Defaults to chatter.
+            `merge (bool)`: Whether the message may be merged with other text messages to the channel.
+            `**kwargs`: The other arguments of `channel.send`, such as `embed` or `poll`.
+
+        ### Returns:
+            `message (asyncio.Future[discord.Message])`: Resolves to the sent message, shared by messages merged into it.
+        """
+        future = asyncio.get_running_loop().create_future()
+        merge = merge and content is not None and not kwargs
+        tail = self._tails.get(channel.id)
+        if merge and tail is not None and tail.merge(content, priority, future):
+            self.merged += 1
+            return future
+
+        item = Outgoing(channel, content, kwargs, priority, merge, future)
+        heapq.heappush(self._queue, (priority, next(self._order), item))
+        self._tails[channel.id] = item
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._dispatch(), name="outbox")
+        self._wakeup.set()
+        return future
+
+    def close(self) -> None:
+        """Stops sending. Messages still queued or in flight are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+        for task in self._in_flight:
+            task.cancel()
+        for _, _, item in self._queue:
+            for future in item.futures:
+                future.cancel()
+        self._queue.clear()
+        self._tails.clear()
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            item = self._pop_ready(now) if len(self._in_flight) < self.concurrency else None
+            if item is None:
+                self._wakeup.clear()
+                delay = self._next_ready_in(now) if len(self._in_flight) < self.concurrency else None
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                continue
+
+            if self._next_start > now:
+                await asyncio.sleep(self._next_start - now)
+            self._next_start = max(now, self._next_start) + 1 / self.rate
+            self._in_flight.add(asyncio.create_task(self._deliver(item)))
+
+    def _pop_ready(self, now: float) -> Optional[Outgoing]:
+        """Takes the highest priority message whose channel is free and past its pacing slot."""
+        skipped, ready = [], None
+        while self._queue:
+            entry = heapq.heappop(self._queue)
+            channel_id = entry[2].channel.id
+            if channel_id not in self._busy and self._next_slot.get(channel_id, 0.0) <= now:
+                ready = entry[2]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._queue, entry)
+        if ready is not None:
+            self._busy.add(ready.channel.id)
+            if self._tails.get(ready.channel.id) is ready:
+                del self._tails[ready.channel.id]  # Nothing can be merged into a message being sent
+        return ready
+
+    def _next_ready_in(self, now: float) -> Optional[float]:
+        """The number of seconds until a queued message's channel is past its pacing slot, if any is waiting on one."""
+        slots = [self._next_slot.get(item.channel.id, 0.0) for _, _, item in self._queue
+                 if item.channel.id not in self._busy]
+        return max(min(slots) - now, 0.0) if slots else None
+
+    async def _deliver(self, item: Outgoing) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            message = await self._send(item)
+        except asyncio.CancelledError:
+            for future in item.futures:
+                future.cancel()  # Closed while sending, so no caller is left waiting
+            raise
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            for future in item.futures:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            self.sent += 1
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(message)
+        finally:
+            self._in_flight.discard(asyncio.current_task())
+            self._busy.discard(item.channel.id)
+            self._next_slot[item.channel.id] = loop.time() + self.interval
+            self._wakeup.set()
+
+    async def _send(self, item: Outgoing) -> Message:
+        """Sends a message, retrying with exponential backoff when Discord fails with a server error."""
+        attempt = 1
+        while True:
+            try:
+                with DISCORD_LATENCY.time("send"):
+                    return await item.channel.send(item.content, **item.kwargs)
+            except (Forbidden, NotFound):
+                raise
+            except HTTPException as e:
+                if e.status < 500 or attempt == self.max_attempts:
+                    raise
+                delay = self.backoff * 2 ** (attempt - 1)
+                WARN_LOG(f"Error sending to channel {item.channel.id} (attempt {attempt}), retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                attempt += 1
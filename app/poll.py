@@ -4,415 +4,1091 @@ A module to manage and handle the Spooky Saturday poll within a Discord bot.
 
 import datetime
 import asyncio
-import json
-from typing import Literal, Optional
+import sqlite3
+from typing import Literal, Mapping, Optional, Union
+from zoneinfo import ZoneInfo
 
-from discord.ext.commands import Cog, command, Context, Bot
-from discord import Embed, NotFound, Message, TextChannel
+from discord.ext.commands import Cog, command, Context, Bot, guild_only, has_guild_permissions, is_owner
+from discord import Embed, NotFound, HTTPException, Message, TextChannel, Guild, RawReactionActionEvent, RawReactionClearEvent, RawReactionClearEmojiEvent
+from discord import RawMessageDeleteEvent, RawMessageUpdateEvent
+from discord import RawPollVoteActionEvent, AutoShardedClient
+from discord.abc import GuildChannel
 
 from app.logger import INFO_LOG, ERROR_LOG, SUCCESS_LOG, DEBUG_LOG, WARN_LOG
+from app.poll_state import GuildPoll, GuildID, ChannelID, PollID, PollMode, VotePolicy, DEFAULT_CHANNEL_NAME, DEFAULT_TIMEZONE, next_occurrence
+from app.scheduler import PollScheduler, JobKind
+from app.tally import PollTally
+from app.message_cache import MessageCache
+from app.channel_index import ChannelIndex
+from app.reactions import ReactionSeeder
+from app import native_poll
+from app.storage import PollStore
+from app.history import PollHistory
+from app.ballots import count_ballots
+from app.result_cache import ResultCache
+from app.catalog import OptionCatalog, Lineup, compile_lineup
+from app.sharding import shard_of
+from app.outbox import Outbox, Priority
+from app.reconcile import Reconciler, Outcome
+from app.metrics import DISCORD_LATENCY, POLLS_POSTED, POLL_GUILDS, VOTES
 
-#Type Aliases
-ChannelID = int
-PollID = int
+RESULTS_RETRY_DELAY = 60.0 # Seconds before a failed results job is retried, doubled on each further failure
+RESULTS_ATTEMPTS = 5 # The number of times a poll's results are tried before the poll is closed
+
+# The state a reloaded Poll cog takes over from the cog it replaces
+HANDOFF = ("poll", "scheduler", "tallies", "messages", "channels", "seeder", "history", "results", "outbox",
+           "bypass", "testing_guild", "_saved_lineups", "_legacy_polls", "_resume_task", "_results_failures")
 
 class Poll(Cog):
     """
     A class to manage and handle the Spooky Saturday poll within a Discord bot.
-    
+
     ### Attributes:
         `bot (commands.Bot)`: The Discord bot instance.
-        `options (dict)`: A dictionary mapping game names to their corresponding emoji.
-        `poll (dict)`: A dictionary mapping channel IDs to message IDs for active polls.
+        `catalog (OptionCatalog)`: The poll options of every guild, hot-reloaded from the catalog file.
+        `poll (dict)`: A dictionary mapping guild IDs to the poll state of that guild.
+        `scheduler (PollScheduler)`: The scheduler shared by every guild's poll jobs.
+        `tallies (dict)`: A dictionary mapping poll message IDs to their live vote tally.
+        `messages (MessageCache)`: A bounded cache of fetched poll messages.
+        `channels (ChannelIndex)`: An index of every guild's poll channel.
+        `seeder (ReactionSeeder)`: Adds the option reactions to new poll messages.
+        `store (PollStore)`: The durable store the poll state of every guild is saved to.
+        `history (PollHistory)`: The results of every finished poll.
+        `results (ResultCache)`: The latest `!pollresult` embed of every guild, keyed to its tally version.
+        `reconciler (Reconciler)`: Refetches every active poll after a restart or a gateway resume.
+        `bypass (bool)`: Whether testing mode bypasses the poll's date-time check.
+        `testing_guild (Optional[GuildID])`: The only guild testing mode applies to, or None for every guild.
     ### Methods:
         `__init__(self, bot)`:
             Initializes the Poll class with the bot instance, sets up options and poll attributes, and loads the savefile containting active polls.
         `check_poll_results(self, ctx)`:
             Manually checks the results of the Spooky Saturday poll and sends a message with the results.
-        `automatic_check_poll_results(self)`:
-            Automatically checks the results of the Spooky Saturday poll every Saturday at 8 PM and sends a message with the results.
+        `automatic_check_poll_results(self, guild_id)`:
+            Checks the results of a guild's Spooky Saturday poll and sends a message with the results.
         `send_spooky_saturday(self)`:
-            Sends a "Happy Spooky Saturday!" poll message to a specific Discord channel if today is Monday.
-    
-    """
-    GUILD_INDEX = 1 # Guild Index for the bot to send messages to 0 = Testing, 1 = Main
+            Schedules every guild's poll and runs the shared scheduler.
 
-    def __init__(self, bot: Bot, testing: bool = False):
+    """
+    def __init__(self, bot: Bot, testing: bool = False, store: Optional[PollStore] = None,
+                 catalog: Optional[OptionCatalog] = None, previous: Optional["Poll"] = None,
+                 testing_guild: Optional[GuildID] = None):
         self.bot: Bot = bot
-        self.options = {
-            "Phasmophobia 👻": "👻",
-            "Lethal Company 🚀": "🚀",
-            "Oh deer 🦌": "🦌",
-            "Content Warning ⚠️": "⚠️",
-            "Panicore 🧱": "🧱",
-            "Nuclear Nightmare 🌨️": "🌨️",
-            "Backrooms ☣️": "☣️",
-            "Murky Divers 🤿": "🤿",
-            "Devour ✝️": "✝️",
-            "Subterranauts 🌕": "🌕",
-            "Dark Hours 💎": "💎",
-            "Kletka 🛗": "🛗",
-            "GTFO 😶": "😶",
-            "Factorio ⚙️": "⚙️",
-            "JackBox 📦": "📦",
-            "REPO 😂": "😂",
-        }
-        self.poll: dict[ChannelID, PollID] = {}
-
-        if testing is True:
-            self.GUILD_INDEX = 0 # pylint: disable=C0103
-
-        self.load_poll()
-
-    async def get_wait_time(self, day_name: Literal["monday", "tuesday", "wednesday","thursday", "friday", "saturday", "sunday"], time: int = 0, log_message: str = None) -> tuple[int, float]:
-        """
-        Waits until the next specified day of the week at the given time.
-        
+        self.catalog = catalog if catalog is not None else OptionCatalog()
+        self.poll: dict[GuildID, GuildPoll] = {}
+        self.scheduler = PollScheduler(self.run_job)
+        self.tallies: dict[PollID, PollTally] = {}
+        self.messages = MessageCache()
+        self.channels = ChannelIndex(self.channel_target)
+        self.seeder = ReactionSeeder()
+        self._resume_task: Optional[asyncio.Task] = None
+        self._catalog_task: Optional[asyncio.Task] = None
+        self._saved_lineups: set[str] = set()
+        self.bypass: bool = testing
+        self.testing_guild = testing_guild
+        self._legacy_polls: dict[ChannelID, PollID] = {}
+        self._results_failures: dict[GuildID, int] = {}
+        self.store = store if store is not None else PollStore()
+        self.history = PollHistory(self.store)
+        self.results: ResultCache[Optional[Embed]] = ResultCache()
+        self.outbox = Outbox()
+        self.reconciler = Reconciler(self.refresh_poll)
+        POLL_GUILDS.set_function(lambda: len(self.poll), "tracked")
+        POLL_GUILDS.set_function(lambda: sum(guild_poll.active for guild_poll in self.poll.values()), "active")
+
+        self._adopted = False
+        if previous is not None:
+            self.adopt(previous)
+
+    def adopt(self, previous: "Poll") -> None:
+        """
+        Takes over the live state of the Poll cog this one replaces when the extension is reloaded.
+        The scheduler, channel index and catalog watcher are pointed at this cog's methods, so pending
+        jobs run the new code while keeping their deadlines.
+
+        ### Args:
+            `previous (Poll)`: The unloaded cog.
+        """
+        for name in HANDOFF:
+            setattr(self, name, getattr(previous, name))
+        self._adopted = True
+        self.scheduler.handler = self.run_job
+        self.channels.target = self.channel_target
+        if previous._catalog_task is not None:  # pylint: disable=protected-access
+            self._catalog_task = asyncio.create_task(self.catalog.watch(self.apply_catalog, stop=self.bot.is_closed))
+        SUCCESS_LOG(f"Took over the poll state of {len(self.poll)} guilds and {len(self.scheduler)} scheduled jobs")
+
+    @property
+    def options(self) -> Mapping[str, str]:
+        """The default poll options, mapping game names to their corresponding emoji."""
+        return self.catalog.lineup()
+
+    @property
+    def runs_every_shard(self) -> bool:
+        """Whether the bot runs every shard, i.e. no other worker process handles any guild."""
+        return not isinstance(self.bot, AutoShardedClient) or self.bot.shard_ids is None
+
+    def bypasses(self, guild_id: GuildID) -> bool:
+        """Whether the poll of `guild_id` bypasses the date-time check, i.e. testing mode applies to the guild."""
+        return self.bypass and (self.testing_guild is None or guild_id == self.testing_guild)
+
+    def owns(self, guild_id: GuildID) -> bool:
+        """Whether `guild_id` is on one of the bot's shards, i.e. its poll is handled by this process."""
+        if self.runs_every_shard:
+            return True
+        return shard_of(guild_id, self.bot.shard_count) in self.bot.shard_ids
+
+    async def cog_load(self) -> None:
+        """Loads the saved polls when the cog is added, unless it took over the polls of the cog it replaces."""
+        if not self._adopted:
+            await self.load_poll()
+
+    async def cog_unload(self) -> None:
+        """
+        Stops the running jobs, then flushes and closes the poll store when the cog is removed. When the
+        extension is being reloaded, the jobs keep running, the store stays open and the cog is handed
+        to its replacement instead.
+        """
+        if self._catalog_task is not None:
+            self._catalog_task.cancel()
+        if getattr(self.bot, "poll_reloading", False) is True:
+            self.bot.poll_handoff = self
+            return
+        self.reconciler.cancel()
+        if self._resume_task is not None:
+            self._resume_task.cancel()
+            await asyncio.gather(self._resume_task, return_exceptions=True)
+        await self.scheduler.cancel_running()
+        self.outbox.close()
+        self.store.close()
+
+    async def get_wait_time(self, day_name: Literal["monday", "tuesday", "wednesday","thursday", "friday", "saturday", "sunday"], time: int = 0, log_message: str = None, timezone: str = DEFAULT_TIMEZONE) -> tuple[int, float]:
+        """
+        Gets the time until the next specified day of the week at the given time.
+
         ### Example:
-            `await get_wait_time("Monday", 20)`:  Waits until the next Monday at 8:00 PM (24-hour format)
+            `await get_wait_time("Monday", 20)`:  Gets the time until the next Monday at 8:00 PM (24-hour format)
         ### Args:
             `day_name (str)`: The name of the day to wait for (e.g., "Monday").
             `time (int)`: The time to wait for in 24-hour format (e.g., 20 for 8 PM).
             `log_message (Optional[str])`: A message to log when waiting. Defaults to None.
+            `timezone (Optional[str])`: The timezone `day_name` and `time` are in. Defaults to Adelaide.
 
         ### Returns:
             `timestamp (int)`: The timestamp of the next target day in seconds.
             `wait_time (float)`: The time to wait in seconds.
         """
-        days_of_week = ["monday", "tuesday", "wednesday",
-                        "thursday", "friday", "saturday", "sunday"]
-        now = datetime.datetime.now()
+        zone = ZoneInfo(timezone)
+        now = datetime.datetime.now(zone)
+        next_target_day = next_occurrence(day_name, time, zone, now)
 
-        try:
-            target_daytime = days_of_week.index(day_name.lower())
-        except ValueError as exc:
-            raise ValueError("Invalid day name. Please use a valid day name "
-                             "(e.g., 'Monday')") from exc
+        # Subtracting aware datetimes in the same zone ignores a DST change between them, timestamps do not.
+        # Each aware timestamp looks up the zone's UTC offset, so the target's is only computed once.
+        target = next_target_day.timestamp()
+        wait_time = target - now.timestamp()
 
-        days_until_target = (target_daytime - now.weekday() + 7) % 7
-        next_target_day = now + datetime.timedelta(days=days_until_target)
+        DEBUG_LOG(lambda: f"Waiting until {next_target_day} "
+            f"{'for ' + log_message if log_message is not None else ''}")
 
-        next_target_day = next_target_day.replace(
-                hour=time, minute=0, second=0, microsecond=0)
+        return int(target), wait_time
 
-        wait_time = (next_target_day - now).total_seconds()
+    async def get_poll_message(self, guild_id: GuildID, fresh: bool = False) -> Optional[Message]:
+        """
+        This function retrieves the active poll message of a guild.
 
-        DEBUG_LOG(f"Waiting until {next_target_day} "
-            f"{'for ' + log_message if log_message is not None else ''}")
+        The guild's poll state points straight at the poll's channel and message, and fetched
+        messages are cached, so a lookup is a dictionary hit unless the message has to be fetched.
 
-        timestamp = int(next_target_day.timestamp())
-        return timestamp, wait_time
+        ### Args:
+            `guild_id (GuildID)`: The guild to get the poll message of.
+            `fresh (Optional[bool])`: Whether to skip the message cache and fetch the message. Defaults to False.
 
-    async def wait_until(self, wait_time: float) -> None:
+        ### Returns:
+            `poll_message (Optional[discord.Message])`: The guild's poll message, or None if it has no active poll.
         """
-        Waits for a specified amount of time in seconds.
+        DEBUG_LOG("Getting Poll Message")
+        _, poll_message = await self.check_existing_poll_message(guild_id, fresh)
+        return poll_message
+
+    async def get_tally(self, guild_id: GuildID) -> Optional[PollTally]:
+        """
+        This function retrieves the live vote tally of a guild's active poll.
+
+        The tally is only reconciled with the fetched poll message(s) when it may be stale,
+        e.g. after a restart or a gateway resume. Native polls split across several messages
+        share one tally, registered under each of their messages.
 
         ### Args:
-            `wait_time (float)`: The time to wait in seconds.
+            `guild_id (GuildID)`: The guild to get the tally of.
 
         ### Returns:
-            None
+            `tally (Optional[PollTally])`: The poll's tally, or None if the guild has no active poll.
         """
-        DEBUG_LOG(f"Waiting for {wait_time} seconds...")
-        await asyncio.sleep(wait_time)
-        DEBUG_LOG("Wait done... Continuing")
+        guild_poll = self.poll.get(guild_id)
+        if guild_poll is None or not guild_poll.active:
+            return None
 
-    async def get_poll_message(self, ctx: Context = None) -> Message:
+        tally = self.tallies.get(guild_poll.message_id)
+        if tally is None:
+            tally = self.track_tally(guild_poll, stale=True)
+
+        if tally.stale:
+            DEBUG_LOG(f"Reconciling stale tally of poll {guild_poll.message_id}")
+            outcome = await self.refresh_poll(guild_id)
+            if outcome in ("dropped", "failed"):  # The poll's message or channel is gone
+                self.forget_tally(guild_poll)
+                return None
+        return tally
+
+    async def refresh_poll(self, guild_id: GuildID) -> Outcome:
         """
-        This function retrieves the poll message from the specified Discord channel
-        and stores the message ID in the poll attribute.
-        
+        Refetches the message(s) of a guild's active poll and brings its tally in line with them.
+
+        The tally's counts are only replaced where they differ, so its version, and anything cached
+        against it, only changes if votes were missed. A poll whose message was deleted is dropped.
+
         ### Args:
-            `ctx (Optional[Context])`: The context of the command. Defaults to None.
-            
-        ### Note:
-            This function assumes that the bot instance and the channel ID are correctly set up.
-        
+            `guild_id (GuildID)`: The guild to refresh the poll of.
+
         ### Returns:
-            `poll_message (discord.Message)`: The poll message from the specified Discord channel.
+            `outcome (Outcome)`: Whether the tally changed, the poll was dropped, or the poll could not be refetched.
         """
-        poll_message = None
-        INFO_LOG("Getting Poll Message")
-        for channel_id, message_id in self.poll.items():
-            channel = self.bot.get_channel(channel_id)
-            if not channel:
-                continue  # Skip if channel is unavailable
-            if ctx is not None and channel.guild != ctx.guild:
-                continue  # Skip if channel is in a different guild only if ctx is provided
-                
-            SUCCESS_LOG(f"Poll Message Found: {channel_id} ({channel.name}):{message_id}")
+        guild_poll = self.poll.get(guild_id)
+        if guild_poll is None or not guild_poll.active:
+            return "unchanged"
+        if self.bot.get_channel(guild_poll.channel_id) is None:
+            return "failed"  # The guild is unavailable, so the tally stays stale
 
-            try:
-                poll_message = await channel.fetch_message(message_id)
-            except NotFound:
-                ERROR_LOG(f"Unable to fetch Poll Message from channel: {poll_message.id} | {message_id}  Channel: {channel.id}")
-                continue  # Skip if poll message was deleted
-        return poll_message
+        tally = self.tallies.get(guild_poll.message_id)
+        if tally is None:
+            tally = self.track_tally(guild_poll, stale=True)
+        message_id, version = guild_poll.message_id, tally.version
 
-    async def calculate_results(self, poll_message: Message) -> str:
+        if guild_poll.native:
+            poll_messages = await self.fetch_poll_parts(guild_poll)
+        else:
+            _, poll_message = await self.check_existing_poll_message(guild_id, fresh=True)
+            poll_messages = [poll_message] if poll_message is not None else None
+        if guild_poll.message_id != message_id:
+            return "unchanged"  # The poll finished or was replaced while it was being fetched
+
+        if poll_messages is None:
+            WARN_LOG(f"Poll message {message_id} of guild {guild_id} is gone, dropping the poll")
+            self.clear_poll(guild_id)
+            return "dropped"
+        if guild_poll.native:
+            tally.set_counts(native_poll.count_votes(poll_messages, guild_poll.options))
+        else:
+            tally.reconcile(poll_messages[0].reactions)
+        return "changed" if tally.version != version else "unchanged"
+
+    def active_guilds(self) -> list[GuildID]:
+        """The guilds with an active poll."""
+        return [guild_id for guild_id, guild_poll in self.poll.items() if guild_poll.active]
+
+    async def get_results_tally(self, guild_id: GuildID) -> Optional[PollTally]:
         """
-        This function calculates the results of the Spooky Saturday poll
-        and returns the result text.
+        This function counts the votes of a guild's active poll for announcing its results.
+
+        Reaction polls are counted exactly from the users of each option reaction, applying the
+        guild's vote policy; the live tally, which only counts reactions, is the fallback if that
+        fails. Native polls already allow one vote per answer, so their live tally is used.
 
         ### Args:
-            `poll_message (discord.Message)`: The poll message from the specified Discord channel.
+            `guild_id (GuildID)`: The guild to count the votes of.
 
         ### Returns:
-            `result_text (str)`: The result text of the poll.
+            `tally (Optional[PollTally])`: The counted votes, or None if the guild has no active poll.
         """
-        # Count reactions (subtract 1 to ignore bot's reaction)
-        reactions = {reaction.emoji: reaction.count - 1 for reaction in poll_message.reactions}
+        tally = await self.get_tally(guild_id)
+        guild_poll = self.poll.get(guild_id)
+        if tally is None or guild_poll.native:
+            return tally
 
-        result_text = ""
-        for option, emoji in self.options.items():
-            votes = reactions.get(emoji, 0)
-            result_text += f"{option}: {votes} votes\n"
+        poll_message = await self.get_poll_message(guild_id, fresh=True)
+        if poll_message is None:
+            return tally
+        try:
+            count = await count_ballots(poll_message, list(guild_poll.options.values()), guild_poll.votes)
+        except HTTPException as e:
+            WARN_LOG(f"Unable to count the ballots of poll {poll_message.id}, using the live tally: {e}")
+            return tally
 
-        max_votes = max(reactions.values())
+        if count.missing:
+            WARN_LOG(f"Poll {poll_message.id} is missing the bot's reaction for {', '.join(count.missing)}")
+        DEBUG_LOG(f"Counted {count.voters} voters ({count.spoiled} spoiled) of poll {poll_message.id} "
+                  f"in {count.requests} requests")
+        exact = PollTally(poll_message.id, guild_poll.options.values())
+        exact.set_counts(count.counts)
+        return exact
 
-        if reactions:
-            winners = [option for option, emoji in self.options.items() if reactions.get(emoji, 0) == max_votes]
-            # winners = [option for option, votes in reactions.items() if votes == max_votes]
+    def track_tally(self, guild_poll: GuildPoll, stale: bool = False) -> PollTally:
+        """Creates the tally of a guild's active poll and registers it under each of the poll's messages."""
+        tally = PollTally(guild_poll.message_id, guild_poll.options.values(), stale=stale)
+        for message_id in guild_poll.message_ids:
+            self.tallies[message_id] = tally
+        return tally
 
-            if len(winners) == 1:
-                result_text += f"\nWinner: {winners[0]}"
-            elif max_votes == 0:
-                result_text += "\nNo Votes"
-            else:
-                result_text += f"\nTie: {', '.join(winners)}"
-        else:
-            result_text += "\nNo Votes"
+    def forget_tally(self, guild_poll: GuildPoll) -> None:
+        """Drops the tally and cached messages of a guild's active poll."""
+        for message_id in guild_poll.message_ids:
+            self.tallies.pop(message_id, None)
+            self.messages.invalidate(message_id)
+
+    async def fetch_poll_parts(self, guild_poll: GuildPoll) -> Optional[list[Message]]:
+        """
+        Fetches every native poll message of a guild's active poll.
+
+        ### Args:
+            `guild_poll (GuildPoll)`: The poll state of the guild.
+
+        ### Returns:
+            `poll_messages (Optional[list[discord.Message]])`: The poll's messages in order, or None if any of them is unavailable.
+        """
+        channel = self.bot.get_channel(guild_poll.channel_id)
+        if channel is None:
+            return None
+        poll_messages = []
+        for message_id in guild_poll.parts:
+            try:
+                with DISCORD_LATENCY.time("fetch_message"):
+                    poll_message = await channel.fetch_message(message_id)
+            except NotFound:
+                ERROR_LOG(f"Unable to fetch Poll Message from channel: {message_id}  Channel: {channel.id}")
+                return None
+            self.messages.put(poll_message)
+            poll_messages.append(poll_message)
+        return poll_messages
 
-        return result_text
+    async def calculate_results(self, tally: PollTally, options: Optional[Mapping[str, str]] = None) -> str:
+        """
+        This function calculates the results of the Spooky Saturday poll
+        and returns the result text.
+
+        ### Args:
+            `tally (PollTally)`: The vote tally of the poll.
+            `options (Optional[dict])`: The options the poll was posted with. Defaults to `self.options`.
+
+        ### Returns:
+            `result_text (str)`: The result text of the poll.
+        """
+        if options is None:
+            options = self.options
+        return tally.render(options)
 
     @command(name="pollresult")
     async def check_poll_results(self, ctx: Context) -> None:
         """
-        Manually check the results of the Spooky Saturday poll 
-        and sends a message with the results. This function retrieves the active poll of the server and 
+        Manually check the results of the Spooky Saturday poll
+        and sends a message with the results. This function retrieves the active poll of the server and
         sends a message with the results to the specified Discord channel.
         ### Note:
             This function assumes that the bot instance and the channel ID are correctly set up.
         ### Returns:
             None
         """
-        poll_message: Message = await self.get_poll_message(ctx)
-        if poll_message is None:
-            await ctx.send("No active poll found.")
+        if ctx.guild is None:
+            await self.reply(ctx, "No active poll found.")
+            return
+        tally = await self.get_tally(ctx.guild.id)
+        if tally is None:
+            await self.reply(ctx, "No active poll found.")
             return
-        result_text = await self.calculate_results(poll_message)
 
-        results_embed = Embed(title="Spooky Saturday Poll Results",
-                            description=result_text,
+        # Concurrent and repeated requests share one render until a vote changes
+        key = (tally.message_id, tally.version)
+        results_embed = await self.results.get(ctx.guild.id, key, lambda: self.build_results_embed(ctx.guild.id))
+        if results_embed is None:
+            await self.reply(ctx, "No active poll found.")
+            return
+        if not self.results.coalesce(ctx.channel.id, key):
+            DEBUG_LOG(f"Skipping duplicate poll results reply in channel {ctx.channel.id}")
+            return
+
+        await self.outbox.send(ctx.channel, embed=results_embed, priority=Priority.RESULTS)
+
+    async def build_results_embed(self, guild_id: GuildID) -> Optional[Embed]:
+        """
+        Builds the results embed of a guild's active poll from its live tally, without any REST calls
+        unless the tally is stale. Exact ballot counting is left to the final results announcement.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild to build the results of.
+
+        ### Returns:
+            `results_embed (Optional[discord.Embed])`: The results embed, or None if the guild has no active poll.
+        """
+        tally = await self.get_tally(guild_id)
+        if tally is None:
+            return None
+        result_text = await self.calculate_results(tally, self.poll[guild_id].options)
+
+        return Embed(title="Spooky Saturday Poll Results",
+                     description=result_text,
+                     color=0x00FF00,
+                     timestamp=datetime.datetime.now())
+
+    @command(name="pollstats")
+    @guild_only()
+    async def check_poll_stats(self, ctx: Context, weeks: Optional[int] = None) -> None:
+        """
+        Shows the win rate, average votes and trend of each game over past polls.
+        Give a number of weeks to only include recent polls, e.g. `!pollstats 12`.
+        ### Returns:
+            None
+        """
+        if weeks is not None and weeks < 1:
+            await self.reply(ctx, "The number of weeks must be at least 1.")
+            return
+
+        stats = await self.history.stats(ctx.guild.id, weeks)
+        if stats.polls == 0:
+            await self.reply(ctx, "No finished polls found.")
+            return
+
+        stats_text = ""
+        for option in stats.options:
+            trend = "↑" if option.trend > 0 else "↓" if option.trend < 0 else "→"
+            stats_text += (f"{option.option}: {option.wins}/{option.polls} wins ({option.win_rate:.0%}), "
+                           f"{option.average_votes:.1f} avg votes {trend if weeks is not None else ''}\n")
+        stats_text += f"\nPolls: {stats.polls} | Average turnout: {stats.average_turnout:.1f} votes"
+
+        stats_embed = Embed(title=f"Spooky Saturday Poll Stats ({f'last {weeks} weeks' if weeks is not None else 'all time'})",
+                            description=stats_text,
                             color=0x00FF00,
                             timestamp=datetime.datetime.now())
 
-        await ctx.send(embed=results_embed)
+        await self.outbox.send(ctx.channel, embed=stats_embed)
 
-    async def automatic_check_poll_results(self, bypass: bool = False, wait_time: int = 0) -> None:
+    async def automatic_check_poll_results(self, guild_id: GuildID) -> None:
         """
-        Checks the results of the Spooky Saturday poll every Saturday at 8pm~ 
+        Checks the results of a guild's Spooky Saturday poll once its results are due
         and sends a message with the results.
 
-        This function retrieves the poll results and 
-        sends a message with the results to the specified Discord channel.
+        This function retrieves the poll results, sends a message with the results to the
+        poll's channel, records them in the poll history and clears the guild's active poll.
 
         ### Args:
-            `bypass (Optional[bool])`: Whether to bypass the wait time. Defaults to False.
-            `timestamp (Optional[int])`: The timestamp for the next target day in seconds since the epoch. Defaults to 0.
-            `wait_time (Optional[int])`: The time to wait in seconds. Defaults to 0.
-
-        ### Note:
-            This function assumes that the bot instance and the channel ID are correctly set up.
+            `guild_id (GuildID)`: The guild to announce the results of.
 
         ### Returns:
             None
         """
-        poll_message: Message = await self.get_poll_message()
-        if poll_message is None:
-            WARN_LOG("No active poll found.")
+        guild_poll = self.poll.get(guild_id)
+        tally = await self.get_results_tally(guild_id)
+        channel: Optional[TextChannel] = self.bot.get_channel(guild_poll.channel_id) if guild_poll is not None else None
+        if tally is None or channel is None:
+            WARN_LOG(f"No active poll found in guild {guild_id}.")
+            if guild_poll is not None:
+                self.clear_poll(guild_id)
             return
-        channel: TextChannel = poll_message.channel
-        
-        if bypass:
-            wait_time = 5.0
-            DEBUG_LOG("Bypassing wait time for poll results check")
 
-        await self.wait_until(wait_time)
-        
-        poll_message: Message = await self.get_poll_message() # Need for data revalidation
-        result_text = await self.calculate_results(poll_message)
+        result_text = await self.calculate_results(tally, guild_poll.options)
 
         results_embed = Embed(title="Spooky Saturday Poll Results",
                               description=result_text,
                               color=0x00FF00,
                               timestamp=datetime.datetime.now())
 
-        await channel.send(embed=results_embed)
-        
-        self.clear_poll()
-        
-        if bypass:
-           await self.wait_until(86400)  # Wait for one day before checking again
-        
+        await self.outbox.send(channel, embed=results_embed, priority=Priority.RESULTS)
+
+        try:
+            await self.history.record(guild_id, {option: tally.counts.get(emoji, 0)
+                                                 for option, emoji in guild_poll.options.items()})
+        except sqlite3.Error as e:
+            ERROR_LOG(f"Error recording poll results: {e}")
+
+        self.clear_poll(guild_id)
+
     async def send_spooky_saturday(self, bypass: bool = False) -> None:
         """
-        Sends a "Happy Spooky Saturday!" message to a specific Discord channel if today is Monday.
-        This function checks the current day of the week, and if it is Monday (weekday() == 0),
-        it retrieves the specified Discord channel and sends the Spooky Saturday Poll message.
-        
+        Schedules the Spooky Saturday poll of every guild the bot is in and runs the shared scheduler.
+
+        Every guild without an active poll gets its poll posted on its next post day (Monday),
+        and every active poll gets its results announced on its results day (Saturday at 8pm).
+        One scheduler loop serves every guild.
+
         ### Args:
-            `bypass (Optional[bool])`: Whether to bypass the wait time. Defaults to False.
+            `bypass (Optional[bool])`: Whether to bypass the wait time, in the testing guild only if
+                one is set. Defaults to False.
+
+        ### Returns:
+            None
+        """
+        self.bypass = bypass
+        if bypass:
+            DEBUG_LOG(f"Bypassing Poll Message date-time Check in "
+                      f"{'every guild' if self.testing_guild is None else f'guild {self.testing_guild}'}...")
 
+        self.resolve_legacy_polls()
+        for guild in self.bot.guilds:
+            await self.add_guild(guild)
+        INFO_LOG(f"Found poll channels in {len(self.channels)} of {len(self.bot.guilds)} guilds")
+
+        INFO_LOG(f"Scheduled polls for {len(self.scheduler)} guilds")
+        if self._resume_task is None or self._resume_task.done():
+            self._resume_task = asyncio.create_task(self.resume_polls())
+        if self._catalog_task is None or self._catalog_task.done():
+            self._catalog_task = asyncio.create_task(self.catalog.watch(self.apply_catalog, stop=self.bot.is_closed))
+        await self.scheduler.run(self.bot.is_closed)
+
+    async def resume_polls(self) -> None:
+        """
+        Reconciles the tally of every active poll and finishes seeding any poll message
+        that was left without all of its reactions, e.g. by a restart while it was being seeded.
+        """
+        if not self.reconciler.running:
+            self.reconciler.start(self.active_guilds)
+        await self.reconciler.wait()
+        for guild_id in self.active_guilds():
+            guild_poll = self.poll[guild_id]
+            if guild_poll.native or await self.get_tally(guild_id) is None:
+                continue
+            poll_message = await self.get_poll_message(guild_id)
+            if poll_message is not None:
+                await self.seeder.seed(poll_message, guild_poll.options.values())
+
+    async def add_guild(self, guild: Guild) -> GuildPoll:
+        """
+        Creates the poll state of a guild if it has none yet and schedules its next job.
+
+        A job saved before a restart is restored, running straight away if it was missed
+        and the scheduler's catch-up policy allows it.
+
+        ### Args:
+            `guild (discord.Guild)`: The guild to add.
+
+        ### Returns:
+            `guild_poll (GuildPoll)`: The poll state of the guild.
+        """
+        guild_poll = self.poll.get(guild.id)
+        if guild_poll is None:
+            guild_poll = self.poll[guild.id] = GuildPoll(guild.id, self.catalog.lineup(guild.id))
+        self.channels.index_guild(guild)
+        if self.scheduler.pending(guild.id) is None:
+            expected_job = "results" if guild_poll.active else "post"
+            if (guild_poll.due is None or guild_poll.job != expected_job
+                    or not self.scheduler.restore(guild.id, expected_job, guild_poll.due)):
+                await self.schedule_next(guild_poll)
+        return guild_poll
+
+    async def schedule_next(self, guild_poll: GuildPoll, cooldown: bool = False) -> None:
+        """
+        Schedules the next job of a guild: its results if it has an active poll, otherwise its next poll.
+        The job is saved with the guild's poll state, so it survives a restart.
+
+        ### Args:
+            `guild_poll (GuildPoll)`: The poll state of the guild.
+            `cooldown (Optional[bool])`: Whether a job just ran for the guild, in which case
+                a poll is never scheduled for a time that has already passed. Defaults to False.
+        """
+        now = datetime.datetime.now().timestamp()
+        schedule = guild_poll.schedule
+        job: JobKind
+
+        if guild_poll.active:
+            job = "results"
+            if self.bypasses(guild_poll.guild_id):
+                when = now + 5.0
+            else:
+                when, _ = await self.get_wait_time(schedule.results_day, schedule.results_hour,
+                                                   log_message="next poll results", timezone=schedule.timezone)
+        else:
+            job = "post"
+            if self.bypasses(guild_poll.guild_id):
+                when = now + (86400 if cooldown else 0)  # Wait for one day before posting again
+            else:
+                when, _ = await self.get_wait_time(schedule.post_day, schedule.post_hour,
+                                                   log_message="next poll", timezone=schedule.timezone)
+                if cooldown and when <= now:
+                    when += 7 * 86400
+
+        self.scheduler.schedule(guild_poll.guild_id, job, when)
+        guild_poll.job, guild_poll.due = job, when
+        self.save_poll(guild_poll.guild_id)
+
+    async def run_job(self, guild_id: GuildID, job: JobKind) -> None:
+        """
+        Runs a guild's due job and schedules the one after it. Called by the scheduler.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild the job belongs to.
+            `job (JobKind)`: The job to run.
+        """
+        guild = self.bot.get_guild(guild_id)
+        guild_poll = self.poll.get(guild_id)
+        if guild is None or guild_poll is None:
+            DEBUG_LOG(f"Dropping {job} job for unavailable guild {guild_id}")
+            return
+
+        cancelled = False
+        try:
+            if job == "post":
+                next_saturday = None
+                if not self.bypasses(guild_id):
+                    today = datetime.datetime.now(guild_poll.schedule.zone).date()
+                    next_saturday = today + datetime.timedelta((5 - today.weekday() + 7) % 7)
+                _, message = await self.send_new_poll_message(guild, next_saturday)
+                if message is not None:
+                    self.save_poll(guild_id)
+            else:
+                await self.automatic_check_poll_results(guild_id)
+        except asyncio.CancelledError:
+            # The bot is shutting down: the job's saved deadline is kept, so it runs again after a restart
+            cancelled = True
+            raise
+        finally:
+            if not cancelled and guild_id in self.poll and not (job == "results" and self.retry_results(guild_poll)):
+                await self.schedule_next(guild_poll, cooldown=True)
+
+    def retry_results(self, guild_poll: GuildPoll) -> bool:
+        """
+        Schedules a retry of a guild's results job if it failed, i.e. its poll is still active after the job ran.
+
+        The results deadline has already passed, so rescheduling it normally would run the job again
+        straight away. Instead it is retried with exponential backoff, and after `RESULTS_ATTEMPTS`
+        failed attempts the poll is closed so the guild goes on to its next poll.
+
+        ### Args:
+            `guild_poll (GuildPoll)`: The poll state of the guild whose results job just ran.
+
+        ### Returns:
+            `retrying (bool)`: Whether a retry was scheduled.
+        """
+        guild_id = guild_poll.guild_id
+        if not guild_poll.active:
+            self._results_failures.pop(guild_id, None)
+            return False
+
+        failures = self._results_failures[guild_id] = self._results_failures.get(guild_id, 0) + 1
+        if failures >= RESULTS_ATTEMPTS:
+            ERROR_LOG(f"Unable to announce the results of guild {guild_id} after {failures} attempts, closing its poll")
+            self._results_failures.pop(guild_id, None)
+            self.clear_poll(guild_id)
+            return False
+
+        delay = RESULTS_RETRY_DELAY * 2 ** (failures - 1)
+        WARN_LOG(f"Results of guild {guild_id} failed (attempt {failures}), retrying in {delay:.0f}s")
+        when = datetime.datetime.now().timestamp() + delay
+        self.scheduler.schedule(guild_id, "results", when)
+        guild_poll.job, guild_poll.due = "results", when
+        self.save_poll(guild_id)
+        return True
+
+    @Cog.listener()
+    async def on_guild_join(self, guild: Guild) -> None:
+        """Schedules the poll of a guild the bot has just joined."""
+        INFO_LOG(f"Joined guild {guild.name}")
+        await self.add_guild(guild)
+
+    @Cog.listener()
+    async def on_guild_remove(self, guild: Guild) -> None:
+        """Drops the poll state of a guild the bot has left."""
+        INFO_LOG(f"Left guild {guild.name}")
+        self.scheduler.cancel(guild.id)
+        self.channels.remove_guild(guild.id)
+        if self.poll.pop(guild.id, None) is not None:
+            self.save_poll(guild.id)
+
+    def channel_target(self, guild_id: GuildID) -> tuple[Optional[ChannelID], str]:
+        """Returns the `(configured_channel_id, channel_name)` the poll channel of `guild_id` should match."""
+        guild_poll = self.poll.get(guild_id)
+        if guild_poll is None:
+            return None, DEFAULT_CHANNEL_NAME
+        return guild_poll.configured_channel_id, guild_poll.channel_name
+
+    @command(name="pollchannel")
+    @guild_only()
+    @has_guild_permissions(manage_guild=True)
+    async def set_poll_channel(self, ctx: Context, channel: Optional[TextChannel] = None) -> None:
+        """
+        Sets the channel Spooky Saturday polls are posted in.
+        Leave the channel out to go back to the default spooky-saturday channel.
         ### Note:
-            This function assumes that the bot instance and the channel ID are correctly set up.
+            Requires the Manage Server permission.
+        ### Returns:
+            None
+        """
+        guild_poll = await self.add_guild(ctx.guild)
+        guild_poll.configured_channel_id = channel.id if channel is not None else None
+        self.save_poll(ctx.guild.id)
+
+        channel_id = self.channels.index_guild(ctx.guild)
+        if channel_id is None:
+            await self.reply(ctx, f"No #{guild_poll.channel_name} channel found. Polls will not be posted until one is set.")
+        else:
+            await self.reply(ctx, f"Polls will be posted in <#{channel_id}>.")
 
+    @command(name="pollmode")
+    @guild_only()
+    @has_guild_permissions(manage_guild=True)
+    async def set_poll_mode(self, ctx: Context, mode: PollMode) -> None:
+        """
+        Sets whether polls use emoji reactions or native Discord polls.
+        Polls with more than 10 options are split across several native polls.
+        ### Note:
+            Requires the Manage Server permission. Takes effect from the next poll.
         ### Returns:
             None
         """
-        while not self.bot.is_closed():
-            next_saturday = None
-            
-            message = None
-            poll_channel = None
-            
-            poll_channel, message = await self.check_existing_poll_message()
-
-            if not bypass and message is None:
-                INFO_LOG("Checking for Spooky Saturday... " +
-                    str(datetime.date.today().weekday()))
-                
-                wait_time = await self.get_wait_time("Monday", log_message="next poll")
-                await self.wait_until(wait_time[1])
-
-                today = datetime.date.today()
-                next_saturday = today + datetime.timedelta((5 - today.weekday() + 7) % 7)
-            elif message is not None:
-                DEBUG_LOG("Existing Poll Message Found Skipping Poll Message date-time Check...")
-            else:
-                DEBUG_LOG("Bypassing Poll Message date-time Check...")
+        guild_poll = await self.add_guild(ctx.guild)
+        guild_poll.mode = mode
+        self.save_poll(ctx.guild.id)
+        await self.reply(ctx, f"New polls will use {'native Discord polls' if mode == 'native' else 'emoji reactions'}.")
 
+    @command(name="pollvotes")
+    @guild_only()
+    @has_guild_permissions(manage_guild=True)
+    async def set_vote_policy(self, ctx: Context, max_votes: int = 0, split: bool = False) -> None:
+        """
+        Sets how many options each member may vote for in reaction polls, and whether their votes are split.
+        e.g. `!pollvotes 3` ignores members voting for more than 3 games, `!pollvotes 0 yes` splits
+        each member's vote between their games, and `!pollvotes` goes back to one vote per game.
+        ### Note:
+            Requires the Manage Server permission. Applies when the results are counted.
+        ### Returns:
+            None
+        """
+        if max_votes < 0:
+            await self.reply(ctx, "The vote limit can't be negative.")
+            return
+        guild_poll = await self.add_guild(ctx.guild)
+        guild_poll.votes = VotePolicy(max_votes or None, split)
+        self.save_poll(ctx.guild.id)
+        limit = f"up to {max_votes} games" if max_votes else "any number of games"
+        await self.reply(ctx, f"Members may vote for {limit}{', sharing one vote between them' if split else ''}.")
 
-            if message is None:
-                poll_channel, message = await self.send_new_poll_message(next_saturday)
-                self.save_poll()
+    @command(name="pollreload")
+    @is_owner()
+    async def reload_catalog(self, ctx: Context) -> None:
+        """
+        Reloads the poll options from the option catalog file.
+        ### Note:
+            Only the bot owner can use this. Active polls keep their options until their results.
+        ### Returns:
+            None
+        """
+        if self.catalog.reload():
+            self.apply_catalog()
+            await self.reply(ctx, f"Reloaded the poll options: {len(self.catalog.default)} games, "
+                           f"{len(self.catalog.guilds)} servers with their own lineup.")
+        else:
+            await self.reply(ctx, "The poll options are unchanged. Check the logs if the catalog file was edited.")
+
+    def apply_catalog(self) -> None:
+        """Gives every guild without an active poll its lineup from the reloaded catalog."""
+        updated = 0
+        for guild_id, guild_poll in self.poll.items():
+            options = self.catalog.lineup(guild_id)
+            if not guild_poll.active and guild_poll.options is not options:
+                guild_poll.options = options
+                updated += 1
+        INFO_LOG(f"Applied option catalog version {self.catalog.version} to {updated} guilds")
+
+    @Cog.listener()
+    async def on_guild_channel_create(self, channel: GuildChannel) -> None:
+        """Indexes a new channel if it is its guild's poll channel."""
+        self.channels.channel_created(channel)
+
+    @Cog.listener()
+    async def on_guild_channel_update(self, before: GuildChannel, after: GuildChannel) -> None:
+        """Reindexes a renamed channel."""
+        self.channels.channel_updated(before, after)
+
+    @Cog.listener()
+    async def on_guild_channel_delete(self, channel: GuildChannel) -> None:
+        """Reindexes the guild of a deleted poll channel."""
+        self.channels.channel_deleted(channel)
+
+    @Cog.listener()
+    async def on_raw_reaction_add(self, payload: RawReactionActionEvent) -> None:
+        """Counts a vote on a poll message."""
+        tally = self.tallies.get(payload.message_id)
+        if tally is None or payload.user_id == self.bot.user.id:
+            return  # Not a poll message, or the bot seeding its own reactions
+        tally.add(str(payload.emoji))
+        VOTES.inc("add")
+
+    @Cog.listener()
+    async def on_raw_reaction_remove(self, payload: RawReactionActionEvent) -> None:
+        """Removes a vote from a poll message."""
+        tally = self.tallies.get(payload.message_id)
+        if tally is None or payload.user_id == self.bot.user.id:
+            return
+        tally.remove(str(payload.emoji))
+        VOTES.inc("remove")
 
-            _, result_wait_time = await self.get_wait_time("Saturday", 20, log_message="next poll results")
-            await self.automatic_check_poll_results(bypass=bypass, wait_time=result_wait_time)
+    @Cog.listener()
+    async def on_raw_reaction_clear(self, payload: RawReactionClearEvent) -> None:
+        """Removes every vote from a poll message."""
+        tally = self.tallies.get(payload.message_id)
+        if tally is not None:
+            tally.clear()
 
-            if not bypass:
-                await self.wait_until(60) # Sleep for 1 minute
+    @Cog.listener()
+    async def on_raw_reaction_clear_emoji(self, payload: RawReactionClearEmojiEvent) -> None:
+        """Removes every vote for one option from a poll message."""
+        tally = self.tallies.get(payload.message_id)
+        if tally is not None:
+            tally.clear(str(payload.emoji))
 
-            self.poll.pop(poll_channel.id)
-            self.save_poll()
+    def native_vote(self, payload: RawPollVoteActionEvent) -> tuple[Optional[PollTally], Optional[str]]:
+        """Returns the tally and option emoji a native poll vote event applies to."""
+        tally = self.tallies.get(payload.message_id)
+        guild_poll = self.poll.get(payload.guild_id)
+        if tally is None or guild_poll is None or payload.message_id not in guild_poll.parts:
+            return None, None
+        part_index = guild_poll.parts.index(payload.message_id)
+        return tally, native_poll.answer_emoji(guild_poll.options, part_index, payload.answer_id)
 
-            ### Use For When Discord decides to allow more than 10 options in a poll ###
-            # question = f"Spooky Saturday ({next_saturday.strftime('%d/%m')}): " + \
-            #     "Please check the pinned messages for game info, prices and sales. " + \
-            #     "Please feel free to recommend games 😊"
+    @Cog.listener()
+    async def on_raw_poll_vote_add(self, payload: RawPollVoteActionEvent) -> None:
+        """Counts a vote on a native poll."""
+        tally, emoji = self.native_vote(payload)
+        if tally is not None and emoji is not None:
+            tally.add(emoji)
+            VOTES.inc("add")
 
-            # poll = Poll(question=question, duration=datetime.timedelta(hours=168), multiple=True)
-            # print(len(options))
-            # for option in options:
-            #     print(option)
-            #     poll.add_answer(text=option, emoji=option[-1])
+    @Cog.listener()
+    async def on_raw_poll_vote_remove(self, payload: RawPollVoteActionEvent) -> None:
+        """Removes a vote from a native poll."""
+        tally, emoji = self.native_vote(payload)
+        if tally is not None and emoji is not None:
+            tally.remove(emoji)
+            VOTES.inc("remove")
 
-            # await channel.send(poll=poll)
-    
-    async def check_existing_poll_message(self) -> tuple[Optional[TextChannel], Optional[Message]]:
+    @Cog.listener()
+    async def on_resumed(self) -> None:
+        """Marks every tally stale, as reaction events may have been missed while disconnected, and reconciles them."""
+        DEBUG_LOG("Gateway resumed. Marking poll tallies as stale")
+        self.mark_stale()
+
+    @Cog.listener()
+    async def on_ready(self) -> None:
+        """Marks every tally stale after the bot reconnects with a new gateway session, and reconciles them."""
+        self.mark_stale()
+
+    def mark_stale(self) -> None:
+        """Marks every tally stale and starts reconciling every active poll in the background."""
+        for tally in self.tallies.values():
+            tally.stale = True
+        self.messages.clear()
+        self.reconciler.start(self.active_guilds)
+
+    @Cog.listener()
+    async def on_raw_message_edit(self, payload: RawMessageUpdateEvent) -> None:
+        """Drops an edited poll message from the message cache."""
+        self.messages.invalidate(payload.message_id)
+
+    @Cog.listener()
+    async def on_raw_message_delete(self, payload: RawMessageDeleteEvent) -> None:
+        """Drops a deleted poll message from the message cache and forgets the guild's poll."""
+        self.messages.invalidate(payload.message_id)
+        guild_poll = self.poll.get(payload.guild_id)
+        if guild_poll is not None and payload.message_id in guild_poll.message_ids:
+            WARN_LOG(f"Poll message {payload.message_id} was deleted in guild {payload.guild_id}")
+            self.clear_poll(payload.guild_id)
+
+    async def check_existing_poll_message(self, guild_id: GuildID, fresh: bool = False) -> tuple[Optional[TextChannel], Optional[Message]]:
         """
-        Checks for existing poll messages in the specified Discord channel.
+        Checks for the existing poll message of a guild.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild to check.
+            `fresh (Optional[bool])`: Whether to skip the message cache and fetch the message. Defaults to False.
 
         ### Returns:
             `poll_channel (Optional[TextChannel])`: The channel where the poll message was found.
             `message (Optional[Message])`: The existing poll message.
         """
-        for channel in self.bot.guilds[self.GUILD_INDEX].text_channels:
-            if channel.id in self.poll.keys():
-                message_id = self.poll.get(channel.id)
-                message: Message = await channel.fetch_message(message_id)
-                adelaide_time = message.created_at + datetime.timedelta(hours=10.5)  # Convert UTC to Adelaide time (UTC+10:30)
-                INFO_LOG(f"Found existing poll message: {message_id} made: {adelaide_time.strftime('%d %B %Y %H:%M:%S')} in {channel.name} at {channel.guild.name}")
-                return channel, message_id
-        return None, None
-    
-    async def send_new_poll_message(self, next_saturday: datetime.date) -> tuple[Optional[TextChannel], Optional[Message]]:
+        guild_poll = self.poll.get(guild_id)
+        if guild_poll is None or not guild_poll.active:
+            return None, None
+
+        channel = self.bot.get_channel(guild_poll.channel_id)
+        if channel is None:
+            return None, None  # Skip if channel is unavailable
+
+        message: Optional[Message] = None if fresh else self.messages.get(guild_poll.message_id)
+        if message is not None:
+            return channel, message
+
+        try:
+            with DISCORD_LATENCY.time("fetch_message"):
+                message = await channel.fetch_message(guild_poll.message_id)
+        except NotFound:
+            ERROR_LOG(f"Unable to fetch Poll Message from channel: {guild_poll.message_id}  Channel: {channel.id}")
+            return channel, None  # Skip if poll message was deleted
+        self.messages.put(message)
+
+        local_time = message.created_at.astimezone(guild_poll.schedule.zone)
+        DEBUG_LOG(f"Found existing poll message: {message.id} made: {local_time.strftime('%d %B %Y %H:%M:%S %Z')} in {channel.name} at {channel.guild.name}")
+        return channel, message
+
+    async def send_new_poll_message(self, guild: Guild, next_saturday: Optional[datetime.date]) -> tuple[Optional[TextChannel], Optional[Message]]:
         """
-        Sends a new poll message to the specified Discord channel.
+        Sends a new poll message to the guild's poll channel.
 
         ### Args:
-            `next_saturday (datetime.date)`: The date of the next Saturday.
+            `guild (discord.Guild)`: The guild to send the poll to.
+            `next_saturday (Optional[datetime.date])`: The date of the next Saturday.
 
         ### Returns:
             `poll_channel (Optional[TextChannel])`: The channel where the poll message was sent.
             `message (Optional[Message])`: The new poll message.
         """
-        for channel in self.bot.guilds[self.GUILD_INDEX].text_channels:
-            if channel.name == "spooky-saturday":
-                INFO_LOG(f"Found spooky-saturday channel in {self.bot.guilds[self.GUILD_INDEX].name}. Sending Message...")
+        guild_poll = self.poll[guild.id]
+        guild_poll.options = self.catalog.lineup(guild.id)  # The poll keeps this snapshot until its results
+        channel_id = self.channels.get(guild.id)
+        channel: Optional[TextChannel] = guild.get_channel(channel_id) if channel_id is not None else None
+        if channel is None:
+            WARN_LOG(f"No {guild_poll.channel_name} channel found in {guild.name}")
+            return None, None
+
+        INFO_LOG(f"Found {channel.name} channel in {guild.name}. Sending Message...")
 
-                message = await channel.send(
-                    f"Spooky Saturday ({next_saturday.strftime('%d/%m') if next_saturday is not None else ''}): "
+        question = (f"Spooky Saturday ({next_saturday.strftime('%d/%m') if next_saturday is not None else ''}): "
                     "Please check the pinned messages for game info, prices and sales. "
-                    "Please feel free to recommend games 😊 "
-                    "\n\n(Chosen game will be decided by 8pm)\n\n"
-                    f"{'\n'.join(self.options.keys())}") # noqa: E999
-                self.poll[channel.id] = message.id
-
-                tasks = [asyncio.create_task(message.add_reaction(option)) for option in self.options.values()]
-                await asyncio.gather(*tasks)
-                INFO_LOG(f"Added reactions to message {message.id} in channel {channel.name}")
-
-                timestamp, _ = await self.get_wait_time("Saturday", 20, log_message="next poll results")
-                await channel.send(f"Poll results will be announced <t:{timestamp}:R>")
-
-                return channel, message
-        return None, None
-    
-    def save_poll(self) -> None:
-        """Saves poll data to polls.json"""
-        try:
-            with open("./app/saves/polls.json", "w") as f:
-                json.dump(self.poll, f)
-                SUCCESS_LOG("Poll data saved successfully")
+                    "Please feel free to recommend games 😊")
+        timestamp, _ = await self.get_wait_time(guild_poll.schedule.results_day, guild_poll.schedule.results_hour,
+                                                log_message="next poll results", timezone=guild_poll.schedule.timezone)
+
+        if guild_poll.mode == "native":
+            return await self.send_native_poll_message(guild_poll, channel, question, timestamp)
+
+        message = await self.outbox.send(
+            channel,
+            f"{question} "
+            "\n\n(Chosen game will be decided by 8pm)\n\n"
+            f"{'\n'.join(guild_poll.options.keys())}", # noqa: E999
+            priority=Priority.POLL)
+        guild_poll.start(channel.id, message.id)
+        self.track_tally(guild_poll)
+        self.messages.put(message)
+
+        # The reaction and message routes have separate rate limit buckets, so announce while seeding
+        await asyncio.gather(self.seeder.seed(message, guild_poll.options.values()),
+                             self.outbox.send(channel, f"Poll results will be announced <t:{timestamp}:R>", merge=True))
+        POLLS_POSTED.inc("reaction")
 
-        except IOError as e:
-            ERROR_LOG(f"Error saving poll data: {e}")
+        return channel, message
+
+    async def send_native_poll_message(self, guild_poll: GuildPoll, channel: TextChannel, question: str, timestamp: int) -> tuple[TextChannel, Message]:
+        """
+        Sends the poll as native Discord polls, split into parts of at most 10 options.
+
+        ### Args:
+            `guild_poll (GuildPoll)`: The poll state of the guild.
+            `channel (TextChannel)`: The channel to send the poll to.
+            `question (str)`: The question of the poll.
+            `timestamp (int)`: The timestamp the results are announced at.
+
+        ### Returns:
+            `poll_channel (TextChannel)`: The channel where the poll was sent.
+            `message (Message)`: The first message of the poll.
+        """
+        results_at = datetime.datetime.fromtimestamp(timestamp)
+        poll_messages = [await self.outbox.send(channel, poll=poll, priority=Priority.POLL)
+                         for poll in native_poll.build_polls(question, guild_poll.options, results_at)]
+        message = poll_messages[0]
+        guild_poll.start(channel.id, message.id, [poll_message.id for poll_message in poll_messages])
+        self.track_tally(guild_poll)
+        for poll_message in poll_messages:
+            self.messages.put(poll_message)
+        INFO_LOG(f"Sent {len(poll_messages)} native polls in channel {channel.name}")
+
+        await self.outbox.send(channel, f"Poll results will be announced <t:{timestamp}:R>", merge=True)
+        POLLS_POSTED.inc("native")
+        return channel, message
+
+    async def reply(self, ctx: Context, content: str) -> Message:
+        """Replies to a command through the outbox, merged with other replies queued for the channel."""
+        return await self.outbox.send(ctx.channel, content, merge=True)
+
+    def resolve_legacy_polls(self) -> None:
+        """
+        Moves polls loaded from the old `{channel_id: message_id}` save format to their guilds.
+
+        When other worker processes run some of the shards, a poll in a channel this process does
+        not see is left in the store for the process whose guild it is in.
+        """
+        for channel_id, message_id in self._legacy_polls.items():
+            channel = self.bot.get_channel(channel_id)
+            if channel is None and not self.runs_every_shard:
+                continue
+            if channel is None:
+                WARN_LOG(f"Dropping saved poll {message_id} in unavailable channel {channel_id}")
+            else:
+                guild_poll = self.poll.setdefault(channel.guild.id, GuildPoll(channel.guild.id, self.catalog.lineup(channel.guild.id)))
+                guild_poll.start(channel_id, message_id)
+                self.save_poll(channel.guild.id)
+            self.store.forget_legacy(channel_id)
+        self._legacy_polls.clear()
+
+    def save_poll(self, guild_id: GuildID) -> None:
+        """Saves a guild's poll data to the poll store, or deletes it if the guild has no poll state."""
+        guild_poll = self.poll.get(guild_id)
+        try:
+            if guild_poll is not None and guild_poll.active and isinstance(guild_poll.options, Lineup) \
+                    and guild_poll.options.id not in self._saved_lineups:
+                self.store.save_lineup(guild_poll.options.id, dict(guild_poll.options))
+                self._saved_lineups.add(guild_poll.options.id)
+            self.store.save(guild_id, guild_poll.to_dict() if guild_poll is not None else None)
         except TypeError as e:
             ERROR_LOG(f"Error serializing poll data: {e}")
-        except ValueError as e:
-            ERROR_LOG(f"Error parsing JSON: {e}")
         except Exception as e:
             ERROR_LOG(f"An unexpected error occurred: {e}")
 
-    def clear_poll(self) -> None:
-        """Clears poll data in polls.json"""
+    def clear_poll(self, guild_id: GuildID) -> None:
+        """Clears a guild's active poll and saves the change to the poll store"""
+        guild_poll = self.poll.get(guild_id)
+        if guild_poll is not None:
+            self.forget_tally(guild_poll)
+            guild_poll.clear()
+        self.results.invalidate(guild_id)
+        self.save_poll(guild_id)
+
+    async def load_poll(self) -> None:
+        """Loads poll data from the poll store, read and decoded on the store's worker thread"""
         try:
-            with open("./app/saves/polls.json", "w") as f:
-                json.dump({}, f)
-                SUCCESS_LOG("Poll data cleared successfully")
-        except IOError as e:
-            ERROR_LOG(f"Error clearing poll data: {e}")
-        except TypeError as e:
-            ERROR_LOG(f"Error serializing poll data: {e}")
-        except ValueError as e:
-            ERROR_LOG(f"Error parsing JSON: {e}")
+            lineups: dict[str, Union[dict, Lineup]]
+            lineups, saved = await self.store.load_state()
+            self._saved_lineups = set(lineups)
+            for guild_id, data in saved.items():
+                if isinstance(data, int):
+                    self._legacy_polls[guild_id] = data  # Old format: {channel_id: message_id}
+                elif self.owns(guild_id):  # Otherwise another worker process runs the shard of this guild
+                    # Active polls keep the lineup they were posted with, even if the catalog changed since
+                    lineup_id = data.get("lineup")
+                    if lineup_id in lineups and not isinstance(lineups[lineup_id], Lineup):
+                        lineups[lineup_id] = compile_lineup(lineups[lineup_id])
+                    options = lineups[lineup_id] if lineup_id in lineups else self.catalog.lineup(guild_id)
+                    self.poll[guild_id] = GuildPoll.from_dict(guild_id, options, data)
+            SUCCESS_LOG(f"Poll data of {len(self.poll)} guilds loaded successfully")
+
+        except ValueError as e:  # Includes CatalogError
+            ERROR_LOG(f"Error parsing poll data: {e}")
         except Exception as e:
             ERROR_LOG(f"An unexpected error occurred: {e}")
 
-    def load_poll(self) -> None:
-        """Loads poll data from polls.json"""
+async def setup(bot: Bot) -> None:
+    """
+    Adds the Poll cog when the extension is loaded, configured by the bot's `testing`, `testing_guild`
+    and `poll_store` attributes if it has them. On a reload, the cog takes over the state of the cog it replaces.
+
+    The handoff is only cleared once the new cog is added, so if this fails the old module's
+    `setup`, which discord.py runs to roll the reload back, takes the same state back.
+    """
+    previous: Optional[Poll] = getattr(bot, "poll_handoff", None)
+    if previous is not None:
+        cog = Poll(bot, previous.bypass, store=previous.store, catalog=previous.catalog, previous=previous,
+                   testing_guild=previous.testing_guild)
         try:
-            with open("./app/saves/polls.json", "r") as f:
-                self.poll = json.load(f)
-                self.poll = {int(k): v for k, v in self.poll.items()}
-                SUCCESS_LOG("Poll data loaded successfully")
-
-        except FileNotFoundError as e:
-            ERROR_LOG(f"No poll data found: {e}")
-        except IOError as e:
-            ERROR_LOG(f"Error loading poll data: {e}")
-        except ValueError as e:
-            ERROR_LOG(f"Error parsing JSON: {e}")
-        except Exception as e:
-            ERROR_LOG(f"An unexpected error occurred: {e}")         
+            await bot.add_cog(cog)
+        except Exception:
+            if cog._catalog_task is not None:  # pylint: disable=protected-access
+                cog._catalog_task.cancel()  # pylint: disable=protected-access
+            raise
+        bot.poll_handoff = None
+    else:
+        await bot.add_cog(Poll(bot, getattr(bot, "testing", False), store=getattr(bot, "poll_store", None),
+                               testing_guild=getattr(bot, "testing_guild", None)))
@@ -0,0 +1,235 @@
+"""
+Per-guild state for the Spooky Saturday poll.
+"""
+
+import datetime
+from functools import lru_cache
+from typing import Literal, Mapping, Optional
+from zoneinfo import ZoneInfo
+
+#Type Aliases
+GuildID = int
+ChannelID = int
+PollID = int
+PollMode = Literal["reactions", "native"]
+
+DEFAULT_CHANNEL_NAME = "spooky-saturday"
+DEFAULT_TIMEZONE = "Australia/Adelaide"
+
+DAYS_OF_WEEK = ["monday", "tuesday", "wednesday",
+                "thursday", "friday", "saturday", "sunday"]
+
+def next_occurrence(day_name: str, hour: int, zone: ZoneInfo,
+                    now: Optional[datetime.datetime] = None) -> datetime.datetime:
+    """
+    Returns the next `day_name` at `hour` in `zone`, or today's if today is `day_name`
+    (even if `hour` has already passed).
+
+    ### Args:
+        `day_name (str)`: The name of the day, e.g. "saturday".
+        `hour (int)`: The hour in 24-hour format.
+        `zone (ZoneInfo)`: The timezone `day_name` and `hour` are in.
+        `now (Optional[datetime.datetime])`: The time to start from. Defaults to now.
+
+    ### Returns:
+        `occurrence (datetime.datetime)`: The timezone aware time of the occurrence.
+    """
+    if day_name.lower() not in DAYS_OF_WEEK:
+        raise ValueError("Invalid day name. Please use a valid day name "
+                         "(e.g., 'Monday')")
+    if now is None:
+        now = datetime.datetime.now(zone)
+    elif now.tzinfo is not zone:
+        now = now.astimezone(zone)
+    days_until_target = (DAYS_OF_WEEK.index(day_name.lower()) - now.weekday() + 7) % 7
+    date = now.date() + datetime.timedelta(days=days_until_target)
+    # Building the wall clock time in the zone keeps it at `hour` on both sides of a DST change
+    return datetime.datetime.combine(date, datetime.time(hour), tzinfo=zone)
+
+class PollSchedule:
+    """
+    When a guild's poll is posted and when its results are announced.
+
+    Schedules are treated as immutable and those loaded with `from_dict` are shared, so every
+    guild on the same schedule points at one instance.
+
+    ### Attributes:
+        `post_day (str)`: The day of the week the poll is posted on.
+        `post_hour (int)`: The hour (24-hour format) the poll is posted at.
+        `results_day (str)`: The day of the week the results are announced on.
+        `results_hour (int)`: The hour (24-hour format) the results are announced at.
+        `timezone (str)`: The IANA timezone the days and hours are in, e.g. "Australia/Adelaide".
+    """
+    __slots__ = ("post_day", "post_hour", "results_day", "results_hour", "timezone", "zone")
+
+    def __init__(self, post_day: str = "monday", post_hour: int = 0,
+                 results_day: str = "saturday", results_hour: int = 20,
+                 timezone: str = DEFAULT_TIMEZONE):
+        if post_day.lower() not in DAYS_OF_WEEK or results_day.lower() not in DAYS_OF_WEEK:
+            raise ValueError("Invalid day name. Please use a valid day name "
+                             "(e.g., 'Monday')")
+        self.post_day = post_day.lower()
+        self.post_hour = post_hour
+        self.results_day = results_day.lower()
+        self.results_hour = results_hour
+        self.timezone = timezone
+        self.zone = ZoneInfo(timezone)
+
+    def to_dict(self) -> dict:
+        """Returns the schedule as a JSON serialisable dictionary."""
+        return {"post_day": self.post_day, "post_hour": self.post_hour,
+                "results_day": self.results_day, "results_hour": self.results_hour,
+                "timezone": self.timezone}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PollSchedule":
+        """Returns the shared schedule of a dictionary created by `to_dict`."""
+        return _loaded_schedule(tuple(data.items()))
+
+@lru_cache(maxsize=1024)
+def _loaded_schedule(items: tuple) -> PollSchedule:
+    # Loading many guilds only hashes their saved schedule, instead of validating and building it every time
+    return _shared_schedule(**PollSchedule(**dict(items)).to_dict())  # Fills in missing keys, in order, so equal schedules are shared
+
+@lru_cache(maxsize=1024)
+def _shared_schedule(**kwargs) -> PollSchedule:
+    return PollSchedule(**kwargs)
+
+class VotePolicy:
+    """
+    How the ballots of reaction poll voters are counted.
+
+    ### Attributes:
+        `max_votes (Optional[int])`: The most options a voter may vote for. Ballots with more votes are not counted.
+        `split (bool)`: Whether a voter's ballot is worth one vote split evenly between their options,
+            instead of one vote for each option.
+    """
+    __slots__ = ("max_votes", "split")
+
+    def __init__(self, max_votes: Optional[int] = None, split: bool = False):
+        self.max_votes = max_votes
+        self.split = split
+
+    def to_dict(self) -> dict:
+        """Returns the policy as a JSON serialisable dictionary."""
+        return {"max_votes": self.max_votes, "split": self.split}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VotePolicy":
+        """Returns the shared policy of a dictionary created by `to_dict`."""
+        return _loaded_policy(tuple(data.items()))
+
+@lru_cache(maxsize=64)
+def _loaded_policy(items: tuple) -> VotePolicy:
+    return _shared_policy(**VotePolicy(**dict(items)).to_dict())
+
+@lru_cache(maxsize=64)
+def _shared_policy(**kwargs) -> VotePolicy:
+    return VotePolicy(**kwargs)
+
+DEFAULT_SCHEDULE = PollSchedule.from_dict({})
+DEFAULT_VOTES = VotePolicy.from_dict({})
+
+class GuildPoll:
+    """
+    The poll state of a single guild.
+
+    ### Attributes:
+        `guild_id (GuildID)`: The guild this poll belongs to.
+        `options (Mapping)`: A mapping of game names to their corresponding emoji. The lineup of an active
+            poll is saved with it, so the poll keeps the options it was posted with.
+        `schedule (PollSchedule)`: When the poll is posted and when its results are announced.
+        `channel_id (Optional[ChannelID])`: The channel of the active poll message.
+        `message_id (Optional[PollID])`: The active poll message.
+        `channel_name (str)`: The name of the channel polls are posted in.
+        `configured_channel_id (Optional[ChannelID])`: The channel polls are posted in, overriding `channel_name`.
+        `mode (PollMode)`: Whether new polls use emoji reactions or native Discord polls.
+        `parts (tuple[PollID, ...])`: The native poll messages of the active poll, in order. Empty for reaction polls.
+        `job (Optional[str])`: The guild's next scheduled job, "post" or "results", saved so it survives a restart.
+        `due (Optional[float])`: The unix timestamp the next job is due at.
+        `votes (VotePolicy)`: How the ballots of reaction polls are counted.
+    """
+    __slots__ = ("guild_id", "options", "schedule", "channel_id", "message_id", "channel_name",
+                 "configured_channel_id", "mode", "parts", "job", "due", "votes")
+
+    def __init__(self, guild_id: GuildID, options: Mapping[str, str],
+                 schedule: Optional[PollSchedule] = None,
+                 channel_id: Optional[ChannelID] = None,
+                 message_id: Optional[PollID] = None,
+                 channel_name: str = DEFAULT_CHANNEL_NAME,
+                 configured_channel_id: Optional[ChannelID] = None,
+                 mode: PollMode = "reactions",
+                 parts: Optional[list[PollID]] = None,
+                 job: Optional[str] = None,
+                 due: Optional[float] = None,
+                 votes: Optional[VotePolicy] = None):
+        self.guild_id = guild_id
+        self.options = options
+        self.schedule = schedule if schedule is not None else DEFAULT_SCHEDULE
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.channel_name = channel_name
+        self.configured_channel_id = configured_channel_id
+        self.mode: PollMode = mode
+        self.parts: tuple[PollID, ...] = tuple(parts) if parts else ()
+        self.job = job
+        self.due = due
+        self.votes = votes if votes is not None else DEFAULT_VOTES
+
+    @property
+    def active(self) -> bool:
+        """Whether the guild currently has a poll message waiting for results."""
+        return self.message_id is not None
+
+    @property
+    def native(self) -> bool:
+        """Whether the active poll is made of native Discord polls."""
+        return bool(self.parts)
+
+    @property
+    def message_ids(self) -> list[PollID]:
+        """Every message of the active poll."""
+        if self.parts:
+            return list(self.parts)
+        return [self.message_id] if self.message_id is not None else []
+
+    def start(self, channel_id: ChannelID, message_id: PollID, parts: Optional[list[PollID]] = None) -> None:
+        """Marks `message_id` in `channel_id` as the guild's active poll, made of the native poll messages `parts` if given."""
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.parts = tuple(parts) if parts else ()
+
+    def clear(self) -> None:
+        """Forgets the guild's active poll message."""
+        self.channel_id = None
+        self.message_id = None
+        self.parts = ()
+
+    def to_dict(self) -> dict:
+        """
+        Returns the poll state as a JSON serialisable dictionary.
+
+        The default schedule and vote policy are left out, which keeps the saved state of most guilds
+        small. `from_dict` fills them back in.
+        """
+        data = {"channel_id": self.channel_id, "message_id": self.message_id,
+                "channel_name": self.channel_name, "configured_channel_id": self.configured_channel_id,
+                "mode": self.mode, "parts": list(self.parts), "job": self.job, "due": self.due,
+                "lineup": getattr(self.options, "id", None) if self.active else None}
+        if self.schedule is not DEFAULT_SCHEDULE:
+            data["schedule"] = self.schedule.to_dict()
+        if self.votes is not DEFAULT_VOTES:
+            data["votes"] = self.votes.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, guild_id: GuildID, options: Mapping[str, str], data: dict) -> "GuildPoll":
+        """Builds a guild's poll state from a dictionary created by `to_dict`."""
+        schedule = PollSchedule.from_dict(data["schedule"]) if "schedule" in data else None
+        votes = VotePolicy.from_dict(data["votes"]) if "votes" in data else None
+        return cls(guild_id, options, schedule=schedule,
+                   channel_id=data.get("channel_id"), message_id=data.get("message_id"),
+                   channel_name=data.get("channel_name", DEFAULT_CHANNEL_NAME),
+                   configured_channel_id=data.get("configured_channel_id"),
+                   mode=data.get("mode", "reactions"), parts=data.get("parts"),
+                   job=data.get("job"), due=data.get("due"), votes=votes)
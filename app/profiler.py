@@ -0,0 +1,134 @@
+"""
+On-demand profiling of the running bot, captured for a fixed window and written to a report file.
+"""
+
+import asyncio
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import time
+from collections import Counter
+
+from app.logger import INFO_LOG
+from app.storage import SAVES_DIR
+
+PROFILES_DIR = os.path.join(SAVES_DIR, "profiles")
+MAX_SECONDS = 300
+
+def _coroutine_name(task: asyncio.Task) -> str:
+    coro = task.get_coro()
+    return getattr(coro, "__qualname__", None) or task.get_name()
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+class ProfileReport:
+    """
+    The results of a profiling window.
+
+    ### Attributes:
+        `seconds (float)`: How long the window actually lasted.
+        `samples (int)`: The number of times the event loop's tasks were sampled.
+        `coroutines (Counter)`: The wall time in seconds each top level coroutine was alive during the window.
+        `awaits (Counter)`: The wall time in seconds tasks spent suspended at each innermost await.
+        `stats (pstats.Stats)`: The deterministic profile of the code run on the event loop's thread.
+    """
+    def __init__(self, seconds: float, samples: int, coroutines: Counter, awaits: Counter, stats: pstats.Stats):
+        self.seconds = seconds
+        self.samples = samples
+        self.coroutines = coroutines
+        self.awaits = awaits
+        self.stats = stats
+
+    def render(self, limit: int = 25) -> str:
+        """Renders the report as text, with at most `limit` rows per section."""
+        lines = [f"Profiled {self.seconds:.1f}s, {self.samples} task samples", "",
+                 "## Coroutines by wall time"]
+        lines += [f"{seconds:9.3f}s  {name}" for name, seconds in self.coroutines.most_common(limit)]
+        lines += ["", "## Slowest awaits (time suspended at each await)"]
+        lines += [f"{seconds:9.3f}s  {name}" for name, seconds in self.awaits.most_common(limit)]
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        lines += ["", "## CPU time on the event loop (cProfile)", out.getvalue()]
+        return "\n".join(lines)
+
+class Profiler:
+    """
+    Profiles the event loop for a window of time, one window at a time.
+
+    While a window is open, code run on the loop is profiled with cProfile and every task is
+    sampled every `interval` seconds to attribute wall time to coroutines and the awaits they
+    are suspended at. Nothing is installed outside a window, so the profiler costs nothing
+    until it is used.
+
+    ### Attributes:
+        `interval (float)`: The number of seconds between task samples.
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self._lock = asyncio.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Whether a profiling window is open."""
+        return self._lock.locked()
+
+    async def capture(self, seconds: float) -> ProfileReport:
+        """
+        Profiles the event loop for `seconds` seconds.
+
+        ### Args:
+            `seconds (float)`: The length of the window.
+
+        ### Returns:
+            `report (ProfileReport)`: The profile of the window.
+
+        ### Raises:
+            `RuntimeError`: If another window is already open.
+        """
+        if self.active:
+            raise RuntimeError("A profile is already being captured")
+        async with self._lock:
+            coroutines: Counter = Counter()
+            awaits: Counter = Counter()
+            samples = 0
+            sampler = asyncio.current_task()
+            profile = cProfile.Profile()
+            start = last = time.perf_counter()
+            deadline = start + seconds
+            profile.enable()
+            try:
+                while (now := time.perf_counter()) < deadline:
+                    elapsed, last = now - last, now
+                    for task in asyncio.all_tasks():
+                        if task is sampler:
+                            continue
+                        coroutines[_coroutine_name(task)] += elapsed
+                        stack = task.get_stack()
+                        if stack:
+                            awaits[_frame_name(stack[-1])] += elapsed
+                    samples += 1
+                    await asyncio.sleep(min(self.interval, deadline - now))
+            finally:
+                profile.disable()
+            return ProfileReport(time.perf_counter() - start, samples, coroutines, awaits, pstats.Stats(profile))
+
+def save_report(report: ProfileReport, directory: str = PROFILES_DIR) -> str:
+    """
+    Writes `report` to a timestamped text file, with its raw cProfile stats next to it.
+
+    ### Returns:
+        `path (str)`: The path of the text report.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = f"profile-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}"
+    path = os.path.join(directory, f"{name}.txt")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(report.render())
+    report.stats.dump_stats(os.path.join(directory, f"{name}.pstats"))
+    INFO_LOG(f"Saved profile to {path}")
+    return path
@@ -0,0 +1,116 @@
+"""
+Seeds a poll message with its option reactions, paced to Discord's reaction rate limit.
+"""
+
+import asyncio
+import time
+from typing import Iterable
+
+from discord import Message, HTTPException, Forbidden, NotFound
+
+from app.logger import INFO_LOG, WARN_LOG, ERROR_LOG
+from app.metrics import DISCORD_LATENCY
+from app.poll_state import ChannelID, PollID
+
+class SeedReport:
+    """
+    The outcome of seeding a poll message.
+
+    ### Attributes:
+        `message_id (PollID)`: The seeded poll message.
+        `added (int)`: The number of reactions added.
+        `skipped (int)`: The number of reactions the message already had.
+        `failed (list)`: The emoji that could not be added.
+        `elapsed (float)`: The time in seconds it took until every reaction was attempted.
+    """
+    def __init__(self, message_id: PollID):
+        self.message_id = message_id
+        self.added = 0
+        self.skipped = 0
+        self.failed: list[str] = []
+        self.elapsed = 0.0
+
+    @property
+    def complete(self) -> bool:
+        """Whether every option reaction is on the message."""
+        return not self.failed
+
+class ReactionSeeder:
+    """
+    Adds option reactions to poll messages one at a time, paced to the per-channel reaction bucket.
+
+    Discord allows roughly one reaction per 0.25 seconds in a channel; firing every reaction at once
+    only gets them serialised by 429 retries. The seeder instead spaces requests to the same channel
+    by `interval`, retries each emoji on its own, and skips reactions the bot already added, so a
+    half-seeded message can be resumed after a restart.
+
+    ### Attributes:
+        `interval (float)`: The minimum number of seconds between reactions in the same channel.
+        `max_attempts (int)`: The number of times an emoji is tried before giving up on it.
+        `backoff (float)`: The delay in seconds before the first retry, doubled on each further retry.
+    """
+    def __init__(self, interval: float = 0.25, max_attempts: int = 3, backoff: float = 1.0):
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._next_slot: dict[ChannelID, float] = {}
+
+    async def seed(self, message: Message, emojis: Iterable[str]) -> SeedReport:
+        """
+        Adds every emoji in `emojis` the bot has not reacted with yet to `message`, in order.
+
+        ### Args:
+            `message (discord.Message)`: The poll message to seed.
+            `emojis (Iterable[str])`: The option emoji of the poll.
+
+        ### Returns:
+            `report (SeedReport)`: How many reactions were added, skipped and failed, and how long it took.
+        """
+        start = time.perf_counter()
+        report = SeedReport(message.id)
+        existing = {str(reaction.emoji) for reaction in message.reactions if reaction.me}
+
+        for emoji in emojis:
+            if emoji in existing:
+                report.skipped += 1
+            elif await self._add_reaction(message, emoji):
+                report.added += 1
+            else:
+                report.failed.append(emoji)
+
+        report.elapsed = time.perf_counter() - start
+        if report.complete:
+            INFO_LOG(f"Seeded poll {message.id} with {report.added} reactions "
+                     f"({report.skipped} already present) in {report.elapsed:.2f}s")
+        else:
+            WARN_LOG(f"Seeded poll {message.id} in {report.elapsed:.2f}s but failed to add {', '.join(report.failed)}")
+        return report
+
+    async def _wait_for_slot(self, channel_id: ChannelID) -> None:
+        """Waits until the channel's reaction bucket allows another request."""
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(channel_id, 0.0))
+        self._next_slot[channel_id] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def _add_reaction(self, message: Message, emoji: str) -> bool:
+        """Adds a single reaction, retrying with exponential backoff. Returns whether it was added."""
+        channel_id = message.channel.id
+        for attempt in range(1, self.max_attempts + 1):
+            await self._wait_for_slot(channel_id)
+            try:
+                with DISCORD_LATENCY.time("add_reaction"):
+                    await message.add_reaction(emoji)
+                return True
+            except (Forbidden, NotFound) as e:
+                ERROR_LOG(f"Unable to add {emoji} to poll {message.id}: {e}")
+                return False
+            except HTTPException as e:
+                if attempt == self.max_attempts:
+                    ERROR_LOG(f"Giving up adding {emoji} to poll {message.id} after {attempt} attempts: {e}")
+                    return False
+                delay = self.backoff * 2 ** (attempt - 1)
+                WARN_LOG(f"Error adding {emoji} to poll {message.id} (attempt {attempt}), retrying in {delay}s: {e}")
+                self._next_slot[channel_id] = max(self._next_slot[channel_id], time.monotonic() + delay)
+        return False
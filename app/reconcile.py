@@ -0,0 +1,139 @@
+"""
+Brings the tallies of every active poll back in line with Discord after a restart or a gateway resume.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Iterable, Literal, Optional
+
+from app.logger import INFO_LOG, ERROR_LOG
+from app.metrics import RECONCILE_SECONDS, RECONCILED_POLLS
+from app.poll_state import GuildID
+
+Outcome = Literal["unchanged", "changed", "dropped", "failed"]
+RefreshHandler = Callable[[GuildID], Awaitable[Outcome]]
+
+class ReconcileReport:
+    """
+    The outcome of reconciling a set of polls.
+
+    ### Attributes:
+        `checked (int)`: The number of polls refetched.
+        `changed (int)`: The number of tallies whose counts changed.
+        `dropped (int)`: The number of polls dropped because their message was deleted.
+        `failed (int)`: The number of polls that could not be refetched and stay stale.
+        `seconds (float)`: How long it took until every poll was consistent or had failed.
+    """
+    def __init__(self):
+        self.checked = 0
+        self.changed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    def count(self, outcome: Outcome) -> None:
+        """Counts the outcome of one poll."""
+        self.checked += 1
+        if outcome != "unchanged":
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def __repr__(self) -> str:
+        return (f"ReconcileReport(checked={self.checked}, changed={self.changed}, dropped={self.dropped}, "
+                f"failed={self.failed}, seconds={self.seconds:.3f})")
+
+class Reconciler:
+    """
+    Refetches the messages of many polls at once with a bounded pool of workers.
+
+    Each poll is refreshed by the `refresh` handler, which refetches its message(s), replaces the
+    tally only if the counts differ and reports what happened. At most `concurrency` polls are
+    fetched at a time, which keeps a restart with hundreds of active polls from flooding the REST
+    rate limit, while still being far faster than fetching them one at a time.
+
+    Only one reconciliation runs at a time. Starting another while one is running makes it run
+    once more when it finishes, as polls it already refetched may be stale again.
+
+    ### Attributes:
+        `refresh (RefreshHandler)`: Refreshes the poll of a guild and returns the outcome.
+        `concurrency (int)`: The most polls refetched at once.
+        `last (Optional[ReconcileReport])`: The report of the most recent reconciliation.
+    """
+    def __init__(self, refresh: RefreshHandler, concurrency: int = 8):
+        self.refresh = refresh
+        self.concurrency = concurrency
+        self.last: Optional[ReconcileReport] = None
+        self._task: Optional[asyncio.Task] = None
+        self._again = False
+
+    @property
+    def running(self) -> bool:
+        """Whether a reconciliation is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self, guild_ids: Callable[[], Iterable[GuildID]]) -> asyncio.Task:
+        """
+        Reconciles the polls of `guild_ids()` in the background, unless a reconciliation is already running.
+
+        ### Args:
+            `guild_ids (Callable)`: Returns the guilds to reconcile, read again if the run repeats.
+
+        ### Returns:
+            `task (asyncio.Task)`: The running reconciliation.
+        """
+        if self.running:
+            self._again = True
+            return self._task
+        self._task = asyncio.create_task(self._run_until_settled(guild_ids), name="reconcile")
+        return self._task
+
+    async def wait(self) -> Optional[ReconcileReport]:
+        """Waits for the running reconciliation, if any, and returns the latest report."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+        return self.last
+
+    def cancel(self) -> None:
+        """Stops the running reconciliation."""
+        if self._task is not None:
+            self._task.cancel()
+
+    async def run(self, guild_ids: Iterable[GuildID]) -> ReconcileReport:
+        """
+        Reconciles the polls of `guild_ids` and waits until every one is consistent or has failed.
+
+        ### Args:
+            `guild_ids (Iterable[GuildID])`: The guilds whose polls are refetched.
+
+        ### Returns:
+            `report (ReconcileReport)`: What happened to the polls and how long it took.
+        """
+        report = ReconcileReport()
+        queue: asyncio.Queue[GuildID] = asyncio.Queue()
+        for guild_id in guild_ids:
+            queue.put_nowait(guild_id)
+        start = time.perf_counter()
+
+        async def worker() -> None:
+            while not queue.empty():
+                guild_id = queue.get_nowait()
+                try:
+                    outcome = await self.refresh(guild_id)
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    ERROR_LOG(f"Error reconciling the poll of guild {guild_id}: {e}")
+                    outcome = "failed"
+                report.count(outcome)
+                RECONCILED_POLLS.inc(outcome)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, queue.qsize()))))
+        report.seconds = time.perf_counter() - start
+        RECONCILE_SECONDS.set(report.seconds)
+        self.last = report
+        INFO_LOG(f"Reconciled {report.checked} active polls in {report.seconds:.2f}s: {report.changed} changed, "
+                 f"{report.dropped} dropped, {report.failed} failed")
+        return report
+
+    async def _run_until_settled(self, guild_ids: Callable[[], Iterable[GuildID]]) -> None:
+        self._again = True
+        while self._again:
+            self._again = False
+            await self.run(list(guild_ids()))
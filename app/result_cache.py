@@ -0,0 +1,95 @@
+"""
+A cache of rendered poll results that shares in-flight computations and coalesces replies.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from app.poll_state import ChannelID, GuildID
+
+T = TypeVar("T")
+
+class ResultCache(Generic[T]):
+    """
+    Caches the latest results of each guild under a key, such as the poll message and its tally version.
+
+    A result is only rebuilt when its key changes. Requests for a guild whose result is already
+    being built wait for that build instead of starting their own, so any number of concurrent
+    requests costs one computation and its REST calls.
+
+    ### Attributes:
+        `window (float)`: The number of seconds a reply to a channel suppresses identical replies.
+        `hits (int)`: The number of requests answered from the cache.
+        `shared (int)`: The number of requests that waited for another request's build.
+        `builds (int)`: The number of results built.
+    """
+    def __init__(self, window: float = 5.0):
+        self.window = window
+        self.hits = 0
+        self.shared = 0
+        self.builds = 0
+        self._entries: dict[GuildID, tuple[Hashable, T]] = {}
+        self._building: dict[GuildID, tuple[Hashable, asyncio.Future]] = {}
+        self._replies: dict[ChannelID, tuple[Hashable, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, guild_id: GuildID, key: Hashable, build: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the cached result of `guild_id` if it was built for `key`, otherwise builds it once.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild the result belongs to.
+            `key (Hashable)`: Identifies the state the result was built from.
+            `build (Callable)`: The coroutine function building the result.
+
+        ### Returns:
+            `result`: The result built for `key`.
+        """
+        entry = self._entries.get(guild_id)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1]
+
+        building = self._building.get(guild_id)
+        if building is not None and building[0] == key:
+            self.shared += 1
+            return await asyncio.shield(building[1])
+
+        future = asyncio.ensure_future(build())
+        self._building[guild_id] = (key, future)
+        try:
+            result = await asyncio.shield(future)
+        finally:
+            if self._building.get(guild_id, (None, None))[1] is future:
+                del self._building[guild_id]
+        self.builds += 1
+        self._entries[guild_id] = (key, result)
+        return result
+
+    def coalesce(self, channel_id: ChannelID, key: Hashable) -> bool:
+        """
+        Returns whether a reply for `key` in `channel_id` should be sent, i.e. the same reply
+        was not already sent there within the last `window` seconds, and records it if so.
+
+        Replies are kept in the order they were sent, so the ones older than `window`, which no
+        longer suppress anything, are dropped from the front as new ones are recorded.
+        """
+        now = time.monotonic()
+        last = self._replies.get(channel_id)
+        if last is not None and last[0] == key and now - last[1] < self.window:
+            return False
+        while self._replies:
+            oldest = next(iter(self._replies))
+            if now - self._replies[oldest][1] < self.window:
+                break
+            del self._replies[oldest]
+        self._replies.pop(channel_id, None)  # Moves the channel to the back
+        self._replies[channel_id] = (key, now)
+        return True
+
+    def invalidate(self, guild_id: GuildID) -> None:
+        """Removes the cached result of `guild_id`."""
+        self._entries.pop(guild_id, None)
@@ -0,0 +1,164 @@
+"""
+A single shared scheduler that drives the poll jobs of every guild.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Awaitable, Callable, Literal, Optional
+
+from app.logger import DEBUG_LOG, ERROR_LOG
+from app.poll_state import GuildID
+
+JobKind = Literal["post", "results"]
+JobHandler = Callable[[GuildID, JobKind], Awaitable[None]]
+
+# How late a deadline missed while the bot was down may still run after a restart, in seconds.
+# None always runs it: late results are better than none, but a poll posted days late is skipped.
+CATCH_UP_GRACE: dict[JobKind, Optional[float]] = {"post": 2 * 86400, "results": None}
+
+class PollScheduler:
+    """
+    A deadline heap shared by every guild.
+
+    Each guild has at most one pending job (it is either waiting to post a poll or waiting
+    to announce its results). Jobs are kept in a min-heap ordered by deadline, so the loop
+    only ever looks at the earliest deadline instead of walking every guild, and the only
+    long lived task is the loop itself. Rescheduling or cancelling a guild leaves its old
+    heap entry in place; stale entries are skipped when they reach the top of the heap.
+
+    Deadlines are unix timestamps and the loop never sleeps longer than `max_sleep`, rechecking
+    the wall clock after every slice, so a clock change or a suspended host delays a job by at
+    most one slice instead of shifting it by however long the monotonic sleep drifted.
+
+    ### Attributes:
+        `handler (JobHandler)`: The coroutine function called with `(guild_id, job)` when a job is due.
+        `max_concurrency (int)`: The maximum number of jobs that may run at the same time.
+        `max_sleep (float)`: The longest the loop sleeps before rechecking the clock, in seconds.
+    """
+    def __init__(self, handler: JobHandler, max_concurrency: int = 16, max_sleep: float = 60.0):
+        self.handler = handler
+        self.max_sleep = max_sleep
+        self._heap: list[tuple[float, int, GuildID, JobKind]] = []
+        self._pending: dict[GuildID, tuple[float, int, JobKind]] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._running: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def schedule(self, guild_id: GuildID, job: JobKind, when: float) -> None:
+        """
+        Schedules `job` for `guild_id` at the unix timestamp `when`, replacing any pending job of that guild.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild the job belongs to.
+            `job (JobKind)`: The job to run.
+            `when (float)`: The unix timestamp the job is due at.
+        """
+        seq = next(self._counter)
+        self._pending[guild_id] = (when, seq, job)
+        heapq.heappush(self._heap, (when, seq, guild_id, job))
+        if self._heap[0][1] == seq:
+            self._wakeup.set()  # New earliest deadline, let the loop recompute its sleep
+
+    def restore(self, guild_id: GuildID, job: JobKind, when: float, now: Optional[float] = None) -> bool:
+        """
+        Schedules a deadline saved before a restart, applying the catch-up policy if it was missed.
+
+        A missed deadline runs straight away if it is within its job's `CATCH_UP_GRACE`,
+        otherwise it is dropped so the caller can schedule the job's next occurrence instead.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild the job belongs to.
+            `job (JobKind)`: The saved job.
+            `when (float)`: The saved unix timestamp the job was due at.
+            `now (Optional[float])`: The current unix timestamp. Defaults to now.
+
+        ### Returns:
+            `restored (bool)`: Whether the job was scheduled.
+        """
+        now = now if now is not None else time.time()
+        grace = CATCH_UP_GRACE.get(job)
+        if when < now and grace is not None and now - when > grace:
+            DEBUG_LOG(f"Skipping {job} job for guild {guild_id} missed by {now - when:.0f} seconds")
+            return False
+        if when < now:
+            DEBUG_LOG(f"Catching up on {job} job for guild {guild_id} missed by {now - when:.0f} seconds")
+        self.schedule(guild_id, job, when)
+        return True
+
+    def cancel(self, guild_id: GuildID) -> None:
+        """Cancels the pending job of `guild_id`, if any."""
+        self._pending.pop(guild_id, None)
+
+    def pending(self, guild_id: GuildID) -> Optional[tuple[float, JobKind]]:
+        """Returns the `(when, job)` pending for `guild_id`, or None."""
+        entry = self._pending.get(guild_id)
+        if entry is None:
+            return None
+        return entry[0], entry[2]
+
+    def advance(self, seconds: float) -> None:
+        """
+        Brings every pending job forward by `seconds`, e.g. to fast-forward time in load tests.
+
+        ### Args:
+            `seconds (float)`: The number of seconds to bring every job forward by.
+        """
+        for guild_id, (when, _, job) in list(self._pending.items()):
+            self.schedule(guild_id, job, when - seconds)
+        self._wakeup.set()
+
+    async def cancel_running(self) -> None:
+        """Cancels the jobs that are running and waits for them to stop, e.g. before the stores they save to are closed."""
+        tasks = list(self._running)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _peek(self) -> Optional[tuple[float, int, GuildID, JobKind]]:
+        """Returns the earliest live heap entry, discarding stale ones."""
+        while self._heap:
+            when, seq, guild_id, job = self._heap[0]
+            entry = self._pending.get(guild_id)
+            if entry is not None and entry[1] == seq:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    async def run(self, is_closed: Callable[[], bool]) -> None:
+        """
+        Runs due jobs until `is_closed()` returns True.
+
+        ### Args:
+            `is_closed (Callable[[], bool])`: Returns True once the scheduler should stop.
+        """
+        DEBUG_LOG("Poll scheduler started")
+        while not is_closed():
+            head = self._peek()
+            delay = head[0] - time.time() if head is not None else self.max_sleep
+            if head is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=min(delay, self.max_sleep))
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            _, _, guild_id, job = heapq.heappop(self._heap)
+            del self._pending[guild_id]
+            task = asyncio.create_task(self._run_job(guild_id, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_job(self, guild_id: GuildID, job: JobKind) -> None:
+        async with self._semaphore:
+            DEBUG_LOG(f"Running {job} job for guild {guild_id}")
+            try:
+                await self.handler(guild_id, job)
+            except Exception as e: # pylint: disable=broad-exception-caught
+                ERROR_LOG(f"Error running {job} job for guild {guild_id}: {e}")
@@ -0,0 +1,158 @@
+"""
+Runs the bot's gateway shards across worker processes on one machine.
+
+Discord assigns every guild to the shard `(guild_id >> 22) % shard_count`. The coordinator splits
+the shards into contiguous ranges, one per worker process, so each guild, and the poll posted in
+it, is handled by exactly one worker.
+
+Workers share the poll store. A worker only loads, saves and deletes the poll state of guilds on its
+own shards (see `Poll.owns`), so every row has a single writer and SQLite serialises the workers'
+transactions. An old save file is imported by the coordinator before any worker starts, and polls in
+the oldest, channel-only format are moved to their guild by whichever worker sees their channel.
+"""
+
+import asyncio
+import multiprocessing
+import time
+from multiprocessing.process import BaseProcess
+from typing import Callable, Optional
+
+from app.logger import ERROR_LOG, INFO_LOG, WARN_LOG
+from app.poll_state import GuildID
+
+WorkerTarget = Callable[[int, list[int], int], None]
+
+def shard_of(guild_id: GuildID, shard_count: int) -> int:
+    """Returns the shard Discord sends the events of `guild_id` to."""
+    return (guild_id >> 22) % shard_count
+
+def shard_ranges(shard_count: int, workers: int) -> list[list[int]]:
+    """
+    Splits shards `0..shard_count - 1` into `workers` contiguous ranges of as equal a size as possible.
+
+    ### Raises:
+        `ValueError`: If there are fewer shards than workers, or no workers.
+    """
+    if not 0 < workers <= shard_count:
+        raise ValueError(f"Unable to split {shard_count} shards between {workers} workers")
+    size, extra = divmod(shard_count, workers)
+    ranges, start = [], 0
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+class Worker:
+    """
+    A worker process and the shards it runs.
+
+    ### Attributes:
+        `index (int)`: The worker's position, from 0.
+        `shard_ids (list[int])`: The shards the worker connects.
+        `process (Optional[BaseProcess])`: The current process of the worker, if started.
+        `restarts (int)`: The number of times the worker was restarted after exiting.
+        `started_at (float)`: The monotonic time the current process was started at.
+        `restart_at (Optional[float])`: The monotonic time a dead worker is due to be restarted at.
+        `failures (int)`: The number of times in a row the worker exited before it ran long enough to be healthy.
+    """
+    def __init__(self, index: int, shard_ids: list[int]):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.process: Optional[BaseProcess] = None
+        self.restarts = 0
+        self.started_at = 0.0
+        self.restart_at: Optional[float] = None
+        self.failures = 0
+
+    @property
+    def alive(self) -> bool:
+        """Whether the worker's process is running."""
+        return self.process is not None and self.process.is_alive()
+
+    def __repr__(self) -> str:
+        return f"Worker({self.index}, shards={self.shard_ids}, alive={self.alive}, restarts={self.restarts})"
+
+class ShardCoordinator:
+    """
+    Starts one process per shard range and restarts workers that exit, with exponential backoff.
+
+    Each worker runs `target(index, shard_ids, shard_count)` in a freshly spawned process,
+    so the target and its arguments must be picklable, e.g. a module level function or a
+    `functools.partial` of one.
+
+    ### Attributes:
+        `target (WorkerTarget)`: Runs the bot for a range of shards until it stops.
+        `shard_count (int)`: The total number of shards.
+        `workers (list[Worker])`: The workers, one per shard range.
+        `backoff (float)`: The delay in seconds before a crashed worker is first restarted, doubled on each crash in a row.
+        `max_backoff (float)`: The longest delay in seconds before a restart.
+        `healthy_after (float)`: How long in seconds a worker has to run for its backoff to be reset.
+        `interval (float)`: How often in seconds the workers are checked.
+    """
+    def __init__(self, target: WorkerTarget, shard_count: int, workers: int, backoff: float = 1.0,
+                 max_backoff: float = 60.0, healthy_after: float = 60.0, interval: float = 1.0):
+        self.target = target
+        self.shard_count = shard_count
+        self.workers = [Worker(index, shard_ids) for index, shard_ids in enumerate(shard_ranges(shard_count, workers))]
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.healthy_after = healthy_after
+        self.interval = interval
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self) -> None:
+        """Starts every worker that is not running."""
+        for worker in self.workers:
+            if not worker.alive:
+                self._start(worker)
+
+    def check(self) -> None:
+        """Schedules a restart of every worker that exited, and restarts those that are due."""
+        now = time.monotonic()
+        for worker in self.workers:
+            if worker.alive:
+                continue
+            if worker.restart_at is None:
+                worker.failures = 1 if now - worker.started_at >= self.healthy_after else worker.failures + 1
+                delay = min(self.backoff * 2 ** (worker.failures - 1), self.max_backoff)
+                worker.restart_at = now + delay
+                ERROR_LOG(f"Worker {worker.index} (shards {worker.shard_ids}) exited with code "
+                          f"{worker.process.exitcode}, restarting in {delay:.1f}s")
+            elif now >= worker.restart_at:
+                worker.restarts += 1
+                WARN_LOG(f"Restarting worker {worker.index} (restart {worker.restarts})")
+                self._start(worker)
+
+    async def run(self, stop: Callable[[], bool] = lambda: False) -> None:
+        """Starts the workers and keeps them running until `stop()` returns True or the task is cancelled."""
+        self.start()
+        try:
+            while not stop():
+                await asyncio.sleep(self.interval)
+                self.check()
+        finally:
+            await asyncio.to_thread(self.stop)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Terminates every worker, killing those still running after `timeout` seconds."""
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()
+        deadline = time.monotonic() + timeout
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            worker.process.join(max(deadline - time.monotonic(), 0))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+        INFO_LOG(f"Stopped {len(self.workers)} shard workers")
+
+    def _start(self, worker: Worker) -> None:
+        worker.process = self._context.Process(target=self.target, args=(worker.index, worker.shard_ids, self.shard_count),
+                                               name=f"shard-worker-{worker.index}", daemon=True)
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+        INFO_LOG(f"Started worker {worker.index} for shards {worker.shard_ids} of {self.shard_count} (pid {worker.process.pid})")
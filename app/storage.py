@@ -0,0 +1,278 @@
+"""
+A durable, SQLite backed store for the poll state of every guild.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar, Union
+
+from app.logger import ERROR_LOG, SUCCESS_LOG, DEBUG_LOG
+from app.poll_state import ChannelID, GuildID, PollID
+
+SAVES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "saves")
+DEFAULT_PATH = os.path.join(SAVES_DIR, "polls.db")
+
+T = TypeVar("T")
+
+class PollStore:
+    """
+    Stores each guild's poll state as its own row in a SQLite database running in WAL mode.
+
+    Writes are queued per guild and flushed in a single transaction on a dedicated worker thread
+    shortly after the first queued write, so the event loop never blocks on disk and a flush only
+    costs as much as the number of guilds that changed. A crash mid-write rolls the transaction
+    back and leaves the previously saved polls intact.
+
+    The option lineups of active polls are stored once each, in their own table, and written in
+    the same transaction as the polls referring to them.
+
+    The database is opened on the worker thread too, and every read runs there after it, so
+    creating a store from the event loop does not wait on the disk.
+
+    The worker processes of a sharded deployment share one database. Each process only loads,
+    saves and deletes the rows of guilds on its own shards, so no row has more than one writer,
+    and SQLite serialises their transactions. The coordinator imports an old save file with
+    `import_legacy_json` before starting any worker, and polls saved in the oldest format, which
+    only know their channel, stay in the store until the process that sees the channel moves them
+    to their guild with `forget_legacy`.
+
+    ### Attributes:
+        `path (str)`: The path of the database file.
+        `flush_delay (float)`: The number of seconds writes are collected for before they are flushed.
+    """
+    def __init__(self, path: str = DEFAULT_PATH, flush_delay: float = 0.5):
+        self.path = path
+        self.flush_delay = flush_delay
+        self._pending: dict[GuildID, Optional[str]] = {}
+        self._pending_lineups: dict[str, str] = {}
+        self._pending_legacy: set[ChannelID] = set()
+        self._legacy_checked = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="poll-store")
+        self._opened: Future[sqlite3.Connection] = self._executor.submit(self._open)  # Runs before anything else on the worker
+
+    def _open(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS polls ("
+                           "guild_id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS lineups ("
+                           "id TEXT PRIMARY KEY, options TEXT NOT NULL)")
+        connection.execute("CREATE TABLE IF NOT EXISTS legacy_polls ("
+                           "channel_id INTEGER PRIMARY KEY, message_id INTEGER NOT NULL)")
+        return connection
+
+    def _db(self) -> sqlite3.Connection:
+        return self._opened.result()  # Raises the error the database failed to open with, if any
+
+    def load(self) -> dict[GuildID, Union[dict, int]]:
+        """
+        Loads the saved poll state of every guild, waiting for the worker thread.
+
+        If the database is empty and an old `polls.json` save file exists next to it,
+        the save file is imported once and renamed to `polls.json.bak`. See `import_legacy_json`.
+
+        ### Returns:
+            `polls (dict)`: A dictionary mapping guild IDs to their saved poll state. Entries from
+                the oldest save format map a channel ID to a message ID instead.
+        """
+        return self._executor.submit(self._load).result()
+
+    def load_lineups(self) -> dict[str, dict[str, str]]:
+        """
+        Loads every saved option lineup, waiting for the worker thread.
+
+        ### Returns:
+            `lineups (dict)`: A dictionary mapping lineup IDs to their options.
+        """
+        return self._executor.submit(self._load_lineups).result()
+
+    async def load_state(self) -> tuple[dict[str, dict[str, str]], dict[GuildID, Union[dict, int]]]:
+        """
+        Loads every saved option lineup and the saved poll state of every guild on the worker thread,
+        without blocking the event loop. See `load_lineups` and `load`.
+
+        ### Returns:
+            `lineups (dict)`: A dictionary mapping lineup IDs to their options.
+            `polls (dict)`: A dictionary mapping guild IDs to their saved poll state.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, lambda: (self._load_lineups(), self._load()))
+
+    def import_legacy_json(self) -> None:
+        """
+        Imports an old `polls.json` save file next to the database, if there is one and the database
+        is empty, and renames it to `polls.json.bak`. Waits for the worker thread.
+
+        Polls saved in the oldest format, mapping a channel ID to a message ID, are kept in the store
+        until they are moved to their guild, so every worker process sharing the store sees them.
+        """
+        self._executor.submit(self._import_legacy_json).result()
+
+    def _load(self) -> dict[GuildID, Union[dict, int]]:
+        self._import_legacy_json()
+        connection = self._db()
+        polls: dict[GuildID, Union[dict, int]] = {
+            guild_id: json.loads(data) for guild_id, data in connection.execute("SELECT guild_id, data FROM polls")}
+        polls.update(connection.execute("SELECT channel_id, message_id FROM legacy_polls"))
+        return polls
+
+    def _load_lineups(self) -> dict[str, dict[str, str]]:
+        rows = self._db().execute("SELECT id, options FROM lineups").fetchall()
+        return {lineup_id: json.loads(options) for lineup_id, options in rows}
+
+    def _import_legacy_json(self) -> None:
+        if self._legacy_checked:
+            return  # Only the first load looks for a save file, later ones would find it imported or absent
+        legacy_path = os.path.join(os.path.dirname(self.path), "polls.json")
+        connection = self._db()
+        if not os.path.exists(legacy_path) or connection.execute(
+                "SELECT EXISTS (SELECT 1 FROM polls) OR EXISTS (SELECT 1 FROM legacy_polls)").fetchone()[0]:
+            self._legacy_checked = True
+            return
+        try:
+            with open(legacy_path, "r") as f:
+                data = {int(key): value for key, value in json.load(f).items()}
+        except (IOError, ValueError) as e:
+            ERROR_LOG(f"Error importing {legacy_path}: {e}")
+            return
+
+        # WAL commits are only synced to disk at checkpoints with synchronous=NORMAL, so the import is
+        # committed with a synced WAL before the save file it came from is renamed away
+        connection.execute("PRAGMA synchronous=FULL")
+        try:
+            self._write_batch({key: json.dumps(value) for key, value in data.items() if isinstance(value, dict)},
+                              legacy={key: value for key, value in data.items() if isinstance(value, int)})
+        finally:
+            connection.execute("PRAGMA synchronous=NORMAL")
+        os.replace(legacy_path, legacy_path + ".bak")
+        self._legacy_checked = True
+        SUCCESS_LOG(f"Imported {len(data)} polls from {legacy_path}")
+
+    def save(self, guild_id: GuildID, data: Optional[dict]) -> None:
+        """
+        Queues the poll state of a guild to be saved, or deleted if `data` is None.
+
+        ### Args:
+            `guild_id (GuildID)`: The guild to save.
+            `data (Optional[dict])`: The guild's poll state, as returned by `GuildPoll.to_dict`.
+        """
+        self._pending[guild_id] = json.dumps(data) if data is not None else None
+        self._schedule_flush()
+
+    def save_lineup(self, lineup_id: str, options: dict[str, str]) -> None:
+        """
+        Queues an option lineup to be saved. It is written no later than the polls saved after it.
+
+        ### Args:
+            `lineup_id (str)`: The ID polls refer to the lineup by.
+            `options (dict)`: A dictionary mapping game names to their corresponding emoji.
+        """
+        self._pending_lineups[lineup_id] = json.dumps(options)
+        self._schedule_flush()
+
+    def forget_legacy(self, channel_id: ChannelID) -> None:
+        """
+        Queues a poll saved in the oldest format to be deleted, once it is saved under its guild or dropped.
+        It is deleted in the same transaction as the guild saved before it.
+
+        ### Args:
+            `channel_id (ChannelID)`: The channel the poll was saved under.
+        """
+        self._pending_legacy.add(channel_id)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_now()  # No event loop (e.g. during shutdown), write straight away
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        while self._pending or self._pending_lineups or self._pending_legacy:
+            await asyncio.sleep(self.flush_delay)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Writes every queued change in one transaction on the store's worker thread."""
+        if not self._pending and not self._pending_lineups and not self._pending_legacy:
+            return
+        batch, self._pending = self._pending, {}
+        lineups, self._pending_lineups = self._pending_lineups, {}
+        legacy, self._pending_legacy = dict.fromkeys(self._pending_legacy), set()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write_batch, batch, lineups, legacy)
+        except sqlite3.Error as e:
+            ERROR_LOG(f"Error saving poll data: {e}")
+            for guild_id, data in batch.items():
+                self._pending.setdefault(guild_id, data)  # Retry with the next flush
+            for lineup_id, options in lineups.items():
+                self._pending_lineups.setdefault(lineup_id, options)
+            self._pending_legacy.update(legacy)
+
+    async def run(self, function: Callable[..., T], *args) -> T:
+        """Runs `function(connection, *args)` on the store's worker thread and returns its result."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, lambda: function(self._db(), *args))
+
+    def execute_script(self, script: str) -> None:
+        """
+        Queues a SQL script on the worker thread, e.g. to create the tables of another part of the bot.
+        It runs before anything queued after it, so callers do not need to wait for it.
+        """
+        def run() -> None:
+            try:
+                self._db().executescript(script)
+            except sqlite3.Error as e:
+                ERROR_LOG(f"Error running SQL script: {e}")
+        self._executor.submit(run)
+
+    def _flush_now(self) -> None:
+        batch, self._pending = self._pending, {}
+        lineups, self._pending_lineups = self._pending_lineups, {}
+        legacy, self._pending_legacy = dict.fromkeys(self._pending_legacy), set()
+        try:
+            self._executor.submit(self._write_batch, batch, lineups, legacy).result()
+        except sqlite3.Error as e:
+            ERROR_LOG(f"Error saving poll data: {e}")
+
+    def _write_batch(self, batch: dict[GuildID, Optional[str]], lineups: Optional[dict[str, str]] = None,
+                     legacy: Optional[dict[ChannelID, Optional[PollID]]] = None) -> None:
+        if not batch and not lineups and not legacy:
+            return
+        upserts = [(guild_id, data) for guild_id, data in batch.items() if data is not None]
+        deletes = [(guild_id,) for guild_id, data in batch.items() if data is None]
+        connection = self._db()
+        with connection:
+            connection.execute("BEGIN")
+            if lineups:
+                connection.executemany("INSERT OR IGNORE INTO lineups (id, options) VALUES (?, ?)",
+                                       list(lineups.items()))
+            if upserts:
+                connection.executemany("INSERT INTO polls (guild_id, data) VALUES (?, ?) "
+                                       "ON CONFLICT(guild_id) DO UPDATE SET data = excluded.data", upserts)
+            if deletes:
+                connection.executemany("DELETE FROM polls WHERE guild_id = ?", deletes)
+            if legacy:
+                connection.executemany("INSERT OR REPLACE INTO legacy_polls (channel_id, message_id) VALUES (?, ?)",
+                                       [item for item in legacy.items() if item[1] is not None])
+                connection.executemany("DELETE FROM legacy_polls WHERE channel_id = ?",
+                                       [(channel_id,) for channel_id, message_id in legacy.items() if message_id is None])
+        DEBUG_LOG(f"Saved poll data of {len(batch)} guilds")
+
+    def close(self) -> None:
+        """Writes every queued change and closes the database."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_now()
+        self._executor.shutdown(wait=True)
+        if self._opened.exception() is None:
+            self._opened.result().close()
+        DEBUG_LOG("Poll store closed")
@@ -0,0 +1,117 @@
+"""
+Runs the bot's long lived background tasks exactly once, restarting them if they crash.
+"""
+
+import asyncio
+import time
+import traceback
+from typing import Awaitable, Callable, Literal, Optional
+
+from app.logger import DEBUG_LOG, ERROR_LOG, INFO_LOG, WARN_LOG
+
+TaskStatus = Literal["running", "backoff", "finished", "cancelled"]
+
+class TaskState:
+    """
+    The state of a supervised task.
+
+    ### Attributes:
+        `name (str)`: The name the task was started under.
+        `status (TaskStatus)`: Whether the task is running, waiting to restart, finished or cancelled.
+        `restarts (int)`: The number of times the task was restarted after crashing.
+        `last_error (Optional[str])`: The most recent exception the task crashed with.
+        `started_at (float)`: The monotonic time the current run of the task started at.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.status: TaskStatus = "running"
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+        self.started_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"TaskState({self.name!r}, {self.status}, restarts={self.restarts}, last_error={self.last_error!r})"
+
+class TaskSupervisor:
+    """
+    Starts named background tasks once and restarts them with exponential backoff when they raise.
+
+    Starting a task under a name that is already running or waiting to restart does nothing, so
+    event handlers that fire more than once, such as `on_ready` after a reconnect, can start their
+    tasks unconditionally. A task that returns normally is finished and is not restarted.
+
+    ### Attributes:
+        `backoff (float)`: The delay in seconds before the first restart, doubled on each crash in a row.
+        `max_backoff (float)`: The longest delay in seconds before a restart.
+        `healthy_after (float)`: How long in seconds a task has to run for its backoff to be reset.
+    """
+    def __init__(self, backoff: float = 1.0, max_backoff: float = 300.0, healthy_after: float = 60.0):
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.healthy_after = healthy_after
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._states: dict[str, TaskState] = {}
+
+    def start(self, name: str, factory: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        """
+        Starts `factory()` under `name` unless a task with that name is still alive.
+
+        ### Args:
+            `name (str)`: The name of the task.
+            `factory (Callable)`: Creates the coroutine to run, called again for every restart.
+
+        ### Returns:
+            `task (asyncio.Task)`: The task supervising `name`.
+        """
+        task = self._tasks.get(name)
+        if task is not None and not task.done():
+            DEBUG_LOG(f"Task {name} is already running, not starting it again")
+            return task
+        self._states[name] = TaskState(name)
+        task = self._tasks[name] = asyncio.create_task(self._supervise(name, factory), name=name)
+        INFO_LOG(f"Started task {name}")
+        return task
+
+    def running(self, name: str) -> bool:
+        """Whether the task `name` is running or waiting to restart."""
+        task = self._tasks.get(name)
+        return task is not None and not task.done()
+
+    def states(self) -> list[TaskState]:
+        """The state of every task started, in the order they were first started."""
+        return list(self._states.values())
+
+    async def stop(self) -> None:
+        """Cancels every task and waits for them to finish."""
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if tasks:
+            INFO_LOG(f"Stopped {len(tasks)} tasks")
+
+    async def _supervise(self, name: str, factory: Callable[[], Awaitable[None]]) -> None:
+        state = self._states[name]
+        failures = 0
+        try:
+            while True:
+                state.status = "running"
+                state.started_at = time.monotonic()
+                try:
+                    await factory()
+                    state.status = "finished"
+                    INFO_LOG(f"Task {name} finished")
+                    return
+                except Exception as e:  # pylint: disable=broad-exception-caught
+                    state.last_error = f"{type(e).__name__}: {e}"
+                    failures = 1 if time.monotonic() - state.started_at >= self.healthy_after else failures + 1
+                    delay = min(self.backoff * 2 ** (failures - 1), self.max_backoff)
+                    ERROR_LOG(f"Task {name} crashed, restarting in {delay:.1f}s: {state.last_error}")
+                    DEBUG_LOG(traceback.format_exc())
+                state.status = "backoff"
+                await asyncio.sleep(delay)
+                state.restarts += 1
+                WARN_LOG(f"Restarting task {name} (restart {state.restarts})")
+        except asyncio.CancelledError:
+            state.status = "cancelled"
+            raise
@@ -0,0 +1,204 @@
+"""
+An in-memory vote tally of a poll message, kept current from gateway reaction events.
+"""
+
+from array import array
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional, Union
+
+from discord import Reaction
+
+from app.poll_state import PollID
+
+Count = Union[int, float]
+
+@lru_cache(maxsize=256)
+def compile_slots(emojis: tuple[str, ...]) -> dict[str, int]:
+    """
+    Maps each option emoji to its slot in a tally's count array.
+
+    Polls posted with the same options share one slot index, so it is compiled once per option set.
+    The returned dictionary is shared and must not be modified.
+    """
+    slots: dict[str, int] = {}
+    for emoji in emojis:
+        slots.setdefault(emoji, len(slots))
+    return slots
+
+class TallyCounts(Mapping):
+    """A read-only view mapping the emoji of a tally to their number of votes."""
+    __slots__ = ("_tally",)
+
+    def __init__(self, tally: "PollTally"):
+        self._tally = tally
+
+    def __getitem__(self, emoji: str) -> Count:
+        return self._tally._counts[self._tally.slots[emoji]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._tally.slots)
+
+    def __len__(self) -> int:
+        return len(self._tally.slots)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+class PollTally:
+    """
+    The live vote count of a single poll message.
+
+    The tally starts out stale when it is created for a message posted before the bot
+    (re)connected, and is made fresh by `reconcile` with the reactions of a fetched message.
+    Reaction events are applied as they arrive, so reading the counts never needs a REST call.
+
+    Counts are kept in an array indexed by the slot of each emoji. The options holding each vote
+    count are kept too, so the leaders are known without a pass over every option, and `render`
+    only formats the lines of options whose count changed since the last render.
+
+    ### Attributes:
+        `message_id (PollID)`: The poll message the tally belongs to.
+        `slots (dict)`: A dictionary mapping emoji to their slot, shared by tallies with the same options.
+        `counts (TallyCounts)`: A read-only mapping of emoji to their number of votes (the bot's own reaction excluded).
+        `stale (bool)`: Whether events may have been missed and the counts need reconciling.
+        `version (int)`: Incremented whenever the counts change.
+    """
+    def __init__(self, message_id: PollID, emojis: Iterable[str], stale: bool = False):
+        self.message_id = message_id
+        self.slots = compile_slots(tuple(emojis))
+        self.counts = TallyCounts(self)
+        self.stale = stale
+        self.version = 0
+        self._counts: array = array("q", bytes(8 * len(self.slots)))
+        self._holders: dict[Count, set[int]] = {0: set(self.slots.values())} if self.slots else {}
+        self._max: Count = 0
+        self._lines: list[str] = []
+        self._dirty: set[int] = set()
+        self._rendered_options: Optional[dict[str, str]] = None
+        self._names: list[str] = []
+
+    @property
+    def max_votes(self) -> Count:
+        """The highest number of votes of any option."""
+        return self._max
+
+    @property
+    def leaders(self) -> list[int]:
+        """The slots of the options with the most votes, in slot order."""
+        return sorted(self._holders.get(self._max, ()))
+
+    def add(self, emoji: str) -> None:
+        """Counts a vote for `emoji`. Reactions that are not poll options are ignored."""
+        slot = self.slots.get(emoji)
+        if slot is not None:
+            self._set(slot, self._counts[slot] + 1)
+            self.version += 1
+
+    def remove(self, emoji: str) -> None:
+        """Removes a vote for `emoji`."""
+        slot = self.slots.get(emoji)
+        if slot is not None and self._counts[slot] > 0:
+            self._set(slot, self._counts[slot] - 1)
+            self.version += 1
+
+    def clear(self, emoji: Optional[str] = None) -> None:
+        """Removes every vote for `emoji`, or every vote of the poll if no emoji is given."""
+        for key in ([emoji] if emoji is not None else self.slots):
+            slot = self.slots.get(key)
+            if slot is not None:
+                self._set(slot, 0)
+        self.version += 1
+
+    def reconcile(self, reactions: Iterable[Reaction]) -> None:
+        """
+        Replaces the counts with the reactions of a freshly fetched poll message.
+
+        ### Args:
+            `reactions (Iterable[discord.Reaction])`: The reactions of the poll message.
+        """
+        counts = {}
+        for reaction in reactions:
+            emoji = str(reaction.emoji)
+            if emoji in self.slots:
+                counts[emoji] = reaction.count - (1 if reaction.me else 0)  # Ignore the bot's reaction
+        self.set_counts(counts)
+
+    def set_counts(self, counts: dict[str, Count]) -> None:
+        """
+        Replaces the counts with counts taken from Discord, e.g. the merged results of native polls.
+
+        ### Args:
+            `counts (dict)`: A dictionary mapping emoji to their number of votes.
+        """
+        values = [counts.get(emoji, 0) for emoji in self.slots]
+        if self._counts.typecode == "q" and any(isinstance(value, float) for value in values):
+            self._counts = array("d", self._counts)  # Weighted votes
+        changed = False
+        for slot, value in enumerate(values):
+            if self._counts[slot] != value:
+                self._set(slot, value)
+                changed = True
+        if changed:
+            self.version += 1
+        self.stale = False
+
+    def render(self, options: dict[str, str]) -> str:
+        """
+        Renders the results text of the poll: the votes of every option followed by the winner.
+
+        Lines are cached per slot and only re-rendered for options whose count changed.
+
+        ### Args:
+            `options (dict)`: A dictionary mapping game names to their corresponding emoji.
+
+        ### Returns:
+            `result_text (str)`: The result text of the poll.
+        """
+        if options is not self._rendered_options:
+            if tuple(options.values()) != tuple(self.slots):
+                return self._render_other(options)
+            self._rendered_options = options
+            self._names = list(options)
+            self._lines = [""] * len(self.slots)
+            self._dirty = set(self.slots.values())
+
+        for slot in self._dirty:
+            self._lines[slot] = f"{self._names[slot]}: {_format_count(self._counts[slot])} votes\n"
+        self._dirty.clear()
+        return "".join(self._lines) + _winner_line(self._max, [self._names[slot] for slot in self.leaders])
+
+    def _render_other(self, options: dict[str, str]) -> str:
+        """Renders options that are not the tally's own, e.g. a subset of them, without the caches."""
+        votes = {option: self.counts.get(emoji, 0) for option, emoji in options.items()}
+        max_votes = max(votes.values(), default=0)
+        lines = [f"{option}: {_format_count(count)} votes\n" for option, count in votes.items()]
+        return "".join(lines) + _winner_line(max_votes, [option for option, count in votes.items()
+                                                         if count == max_votes])
+
+    def _set(self, slot: int, value: Count) -> None:
+        """Sets the count of `slot`, moving it to the holders of its new count."""
+        old = self._counts[slot]
+        self._counts[slot] = value
+        self._dirty.add(slot)
+        holders = self._holders[old]
+        holders.discard(slot)
+        if not holders:
+            del self._holders[old]
+        self._holders.setdefault(self._counts[slot], set()).add(slot)
+        if self._counts[slot] > self._max:
+            self._max = self._counts[slot]
+        elif old == self._max and self._max not in self._holders:
+            self._max = max(self._holders)  # The only leader lost votes
+
+def _format_count(count: Count) -> str:
+    """Formats a number of votes, rounding weighted votes to two decimal places."""
+    return str(round(count, 2) if isinstance(count, float) else count)
+
+def _winner_line(max_votes: Count, winners: list[str]) -> str:
+    """The line announcing the winner, the tied options, or that nobody voted."""
+    if max_votes == 0:
+        return "\nNo Votes"
+    if len(winners) == 1:
+        return f"\nWinner: {winners[0]}"
+    return f"\nTie: {', '.join(winners)}"
@@ -0,0 +1,11 @@
+import json
+import sqlite3
+import pytest
+
+@pytest.fixture
+def saved_active_polls():
+  def count(db_path):
+    with sqlite3.connect(db_path) as connection:
+      rows = connection.execute("SELECT data FROM polls").fetchall()
+    return sum(json.loads(data)["message_id"] is not None for data, in rows)
+  return count
@@ -0,0 +1,50 @@
+import pytest
+from unittest.mock import MagicMock
+from app.ballots import count_ballots
+from app.poll_state import VotePolicy
+
+BOT_ID = 1
+
+def make_reaction(emoji, user_ids, me=True, calls=None):
+  users = [MagicMock(id=user_id, bot=user_id == BOT_ID) for user_id in sorted(user_ids + ([BOT_ID] if me else []))]
+  def page(limit, after=None):
+    if calls is not None:
+      calls.append(emoji)
+    async def generator():
+      for user in [user for user in users if after is None or user.id > after.id][:limit]:
+        yield user
+    return generator()
+  reaction = MagicMock(emoji=emoji, me=me, count=len(users))
+  reaction.users = page
+  return reaction
+
+def make_message(votes, missing=()):
+  message = MagicMock()
+  message.reactions = [make_reaction(emoji, user_ids, me=emoji not in missing) for emoji, user_ids in votes.items()]
+  return message
+
+@pytest.mark.asyncio
+async def test_counts_unique_human_voters_across_pages():
+  calls = []
+  message = MagicMock()
+  message.reactions = [make_reaction("👻", list(range(10, 260)), calls=calls), make_reaction("🚀", [10, 11])]
+  count = await count_ballots(message, ["👻", "🚀", "🦌"], page_size=100)
+  assert count.counts == {"👻": 250, "🚀": 2, "🦌": 0}
+  assert count.voters == 250
+  assert calls == ["👻"] * 3
+  assert count.missing == ["🦌"]
+
+@pytest.mark.asyncio
+async def test_vote_limit_spoils_ballots_voting_for_everything():
+  message = make_message({"👻": [10, 11, 12], "🚀": [10, 12], "🦌": [10]}, missing=["🦌"])
+  count = await count_ballots(message, ["👻", "🚀", "🦌"], VotePolicy(max_votes=2))
+  assert count.counts == {"👻": 2, "🚀": 1, "🦌": 0}
+  assert count.spoiled == 1
+  assert count.missing == ["🦌"]
+
+@pytest.mark.asyncio
+async def test_split_votes_share_one_vote_per_voter():
+  message = make_message({"👻": [10, 11, 12], "🚀": [10, 11, 12], "🦌": [10]})
+  count = await count_ballots(message, ["👻", "🚀", "🦌"], VotePolicy(split=True))
+  assert count.counts == {"👻": pytest.approx(4 / 3), "🚀": pytest.approx(4 / 3), "🦌": pytest.approx(1 / 3)}
+  assert sum(count.counts.values()) == pytest.approx(3)
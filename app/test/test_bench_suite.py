@@ -0,0 +1,21 @@
+import json
+from app.benchmarks.suite import compare, load_baseline, measure, save_baseline
+
+def test_compare_flags_slowdowns_beyond_threshold():
+  baseline = {"fast": 10.0, "steady": 10.0, "slow": 10.0, "new": None}
+  results = {"fast": 5.0, "steady": 12.0, "slow": 20.0, "missing": 1.0}
+  regressions = compare(baseline, results, threshold=0.25)
+  assert regressions == [("slow", 10.0, 20.0, 1.0)]
+
+def test_baseline_round_trip(tmp_path):
+  path = str(tmp_path / "baseline.json")
+  save_baseline({"bench": 1.5}, path)
+  assert load_baseline(path) == {"bench": 1.5}
+  assert "python" in json.load(open(path))
+
+def test_measure_awaits_coroutines():
+  calls = []
+  async def work():
+    calls.append(1)
+  assert measure(lambda: work(), number=10, repeat=2) >= 0
+  assert len(calls) == 21
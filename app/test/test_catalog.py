@@ -0,0 +1,67 @@
+import json
+import os
+import pytest
+from unittest.mock import MagicMock
+from app.catalog import CatalogError, OptionCatalog, compile_lineup
+from app.poll import Poll
+from app.poll_state import GuildPoll
+from app.storage import PollStore
+
+OLD = {"Phasmophobia 👻": "👻", "Lethal Company 🚀": "🚀"}
+NEW = {"Oh deer 🦌": "🦌", "GTFO 😶": "😶"}
+
+def write_catalog(path, default, guilds=None, mtime=None):
+  with open(path, "w", encoding="utf-8") as f:
+    json.dump({"default": default, "guilds": guilds or {}}, f)
+  if mtime is not None:
+    os.utime(path, (mtime, mtime))
+
+def test_lineups_are_validated_and_shared():
+  assert compile_lineup(dict(OLD)) is compile_lineup(dict(OLD))
+  assert list(compile_lineup(OLD).values()) == ["👻", "🚀"]
+  with pytest.raises(CatalogError):
+    compile_lineup({"Phasmophobia": "👻", "Also Phasmophobia": "👻"})
+  with pytest.raises(CatalogError):
+    compile_lineup({})
+
+def test_invalid_file_keeps_the_current_catalog(tmp_path):
+  path = tmp_path / "options.json"
+  write_catalog(path, OLD, {"5": NEW}, mtime=1)
+  catalog = OptionCatalog(str(path))
+  assert dict(catalog.lineup(5)) == NEW
+  assert dict(catalog.lineup(6)) == OLD
+
+  path.write_text('{"default": {}}')
+  os.utime(path, (2, 2))
+  assert not catalog.reload()
+  assert dict(catalog.lineup()) == OLD
+
+  write_catalog(path, NEW, mtime=3)
+  assert catalog.reload()
+  assert dict(catalog.lineup(5)) == NEW
+  assert catalog.version == 2
+
+@pytest.mark.asyncio
+async def test_active_polls_keep_their_lineup_across_reloads_and_restarts(tmp_path):
+  path = tmp_path / "options.json"
+  write_catalog(path, OLD, mtime=1)
+  store = PollStore(str(tmp_path / "polls.db"), flush_delay=0)
+  poll = Poll(MagicMock(), store=store, catalog=OptionCatalog(str(path)))
+  active = poll.poll[1] = GuildPoll(1, poll.catalog.lineup(1))
+  idle = poll.poll[2] = GuildPoll(2, poll.catalog.lineup(2))
+  active.start(10, 100)
+  poll.save_poll(1)
+  poll.save_poll(2)
+
+  write_catalog(path, NEW, mtime=2)
+  assert poll.catalog.reload()
+  poll.apply_catalog()
+  assert dict(active.options) == OLD
+  assert dict(idle.options) == NEW
+
+  await store.flush()
+  restarted = Poll(MagicMock(), store=store, catalog=OptionCatalog(str(path)))
+  await restarted.cog_load()
+  assert dict(restarted.poll[1].options) == OLD
+  assert dict(restarted.poll[2].options) == NEW
+  store.close()
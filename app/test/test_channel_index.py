@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+from discord import TextChannel
+from app.channel_index import ChannelIndex
+
+def make_guild(guild_id, names):
+  guild = MagicMock()
+  guild.id = guild_id
+  guild.text_channels = []
+  for index, name in enumerate(names):
+    add_channel(guild, guild_id * 100 + index, name)
+  return guild
+
+def add_channel(guild, channel_id, name):
+  channel = MagicMock(spec=TextChannel)
+  channel.id = channel_id
+  channel.name = name
+  channel.guild = guild
+  guild.text_channels.append(channel)
+  return channel
+
+def by_name(guild_id):
+  return None, "spooky-saturday"
+
+def test_index_guild_finds_channel_by_name():
+  index = ChannelIndex(by_name)
+  assert index.index_guild(make_guild(1, ["general", "spooky-saturday"])) == 101
+  assert index.index_guild(make_guild(2, ["general"])) is None
+  assert index.get(1) == 101
+  assert index.get(2) is None
+
+def test_configured_channel_overrides_name():
+  index = ChannelIndex(lambda guild_id: (100, "spooky-saturday"))
+  index.index_guild(make_guild(1, ["general", "spooky-saturday"]))
+  assert index.get(1) == 100
+
+def test_channel_events_keep_index_current():
+  index = ChannelIndex(by_name)
+  guild = make_guild(1, ["general"])
+  index.index_guild(guild)
+
+  created = add_channel(guild, 150, "spooky-saturday")
+  index.channel_created(created)
+  assert index.get(1) == 150
+
+  before = MagicMock(spec=TextChannel)
+  before.name = "spooky-saturday"
+  created.name = "archive"
+  index.channel_updated(before, created)
+  assert index.get(1) is None
+
+  before.name = "archive"
+  created.name = "spooky-saturday"
+  index.channel_updated(before, created)
+  assert index.get(1) == 150
+
+  guild.text_channels.remove(created)
+  index.channel_deleted(created)
+  assert index.get(1) is None
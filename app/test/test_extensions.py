@@ -0,0 +1,116 @@
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch
+from discord.ext.commands import ExtensionFailed
+from app.extensions import POLL_EXTENSION, reload_poll_extension
+from app.fake_discord import FakeDiscordServer, create_bot, start_bot, stop_bot
+from app.storage import PollStore
+
+FETCH_MESSAGE = "GET /api/v10/channels/{channel_id}/messages/{message_id}"
+
+def results_messages(channel):
+  return [message for message in channel.messages.values() if message.embeds]
+
+def test_startup_imports_only_what_it_needs():
+  root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  def loaded(imports, modules):
+    script = f"import sys, {imports}; print('loaded:', ','.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, timeout=60,
+                            env={**os.environ, "PYTHONPATH": root}, check=True)
+    return result.stdout.strip().splitlines()[-1]
+
+  assert loaded("app.main", ("app.poll", "app.profiler", "app.sharding", "aiohttp.web")) == "loaded:"
+
+@pytest.mark.asyncio
+async def test_reload_keeps_polls_tallies_and_deadlines(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Reloaded Guild")
+    channel = server.channel_named(guild, "spooky-saturday")
+    voter = server.add_member(guild, "voter")
+
+    bot = create_bot(PollStore(str(tmp_path / "polls.db"), flush_delay=0))
+    task = await start_bot(bot, server)
+    old = bot.get_cog("Poll")
+    old.seeder.interval = 0
+    old.outbox.interval = 0
+    await server.wait_for(lambda: old.poll[guild.id].active)
+    message = server.messages[old.poll[guild.id].message_id]
+    await server.wait_for(lambda: len(message.reactions) == 16)
+    server.react(voter, message, "👻")
+    await server.wait_for(lambda: old.tallies[message.id].counts["👻"] == 1)
+    await server.wait_for(lambda: (old.scheduler.pending(guild.id) or (0, None))[1] == "results")
+    pending, sessions, fetches = old.scheduler.pending(guild.id), len(server.sessions), server.requests[FETCH_MESSAGE]
+
+    await reload_poll_extension(bot)
+    poll = bot.get_cog("Poll")
+    assert poll is not old and type(poll) is not type(old)  # The cog runs the freshly imported code
+    assert POLL_EXTENSION in bot.extensions
+    assert poll.poll is old.poll and poll.tallies is old.tallies
+    assert poll.scheduler.pending(guild.id) == pending
+    assert poll.scheduler.handler == poll.run_job
+    assert len(server.sessions) == sessions  # No reconnect
+    assert server.requests[FETCH_MESSAGE] == fetches  # Nothing refetched
+
+    server.react(voter, message, "🚀")  # Counted by the reloaded cog's listener
+    await server.wait_for(lambda: poll.tallies[message.id].counts["🚀"] == 1)
+    poll.scheduler.advance(60)
+    await server.wait_for(lambda: results_messages(channel))
+    assert "Tie: Phasmophobia 👻" in results_messages(channel)[0].embeds[0]["description"]
+    await server.wait_for(lambda: not poll.poll[guild.id].active)
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_failed_reload_keeps_the_old_code_and_state(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Broken Deploy Guild")
+    bot = create_bot(PollStore(str(tmp_path / "polls.db"), flush_delay=0))
+    task = await start_bot(bot, server)
+    old = bot.get_cog("Poll")
+    old.seeder.interval = 0
+    old.outbox.interval = 0
+    await server.wait_for(lambda: (old.scheduler.pending(guild.id) or (0, None))[1] == "results")
+    pending = old.scheduler.pending(guild.id)
+
+    with patch.object(bot, "load_extension", side_effect=ImportError("broken")):
+      with pytest.raises(ImportError):
+        await reload_poll_extension(bot)
+    poll = bot.get_cog("Poll")
+    assert type(poll) is type(old)
+    assert poll.poll is old.poll and poll.store is old.store
+    assert poll.scheduler.pending(guild.id) == pending
+    assert not bot.poll_reloading and bot.poll_handoff is None
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_reload_whose_setup_fails_keeps_the_old_state(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Half Deployed Guild")
+    channel = server.channel_named(guild, "spooky-saturday")
+    voter = server.add_member(guild, "voter")
+    bot = create_bot(PollStore(str(tmp_path / "polls.db"), flush_delay=0))
+    task = await start_bot(bot, server)
+    old = bot.get_cog("Poll")
+    old.seeder.interval = 0
+    old.outbox.interval = 0
+    await server.wait_for(lambda: (old.scheduler.pending(guild.id) or (0, None))[1] == "results")
+    message = server.messages[old.poll[guild.id].message_id]
+    server.react(voter, message, "👻")
+    await server.wait_for(lambda: old.tallies[message.id].counts["👻"] == 1)
+    pending = old.scheduler.pending(guild.id)
+
+    with patch("app.reconcile.Reconciler", side_effect=RuntimeError("broken")):  # Breaks the new Poll.__init__
+      with pytest.raises(ExtensionFailed):
+        await reload_poll_extension(bot)
+    poll = bot.get_cog("Poll")
+    assert type(poll) is type(old)
+    assert poll.poll is old.poll and poll.tallies is old.tallies and poll.store is old.store
+    assert poll.scheduler is old.scheduler and poll.scheduler.handler == poll.run_job
+    assert poll.scheduler.pending(guild.id) == pending
+    assert bot.poll_handoff is None
+
+    poll.scheduler.advance(60)  # The running scheduler loop announces the results with the kept tally
+    await server.wait_for(lambda: results_messages(channel))
+    assert "Winner: Phasmophobia 👻" in results_messages(channel)[0].embeds[0]["description"]
+    await stop_bot(bot, task)
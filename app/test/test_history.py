@@ -0,0 +1,46 @@
+import datetime
+import pytest
+from app.storage import PollStore
+from app.history import PollHistory, week_of
+
+MONDAY = datetime.date(2025, 3, 3)
+
+def finished(weeks_ago):
+  return datetime.datetime.combine(MONDAY - datetime.timedelta(weeks=weeks_ago), datetime.time(20)) + datetime.timedelta(days=5)
+
+def test_week_of_starts_on_monday():
+  assert week_of(MONDAY) == week_of(MONDAY + datetime.timedelta(days=6))
+  assert week_of(MONDAY) + 1 == week_of(MONDAY + datetime.timedelta(days=7))
+
+@pytest.mark.asyncio
+async def test_stats_from_rollups(tmp_path):
+  history = PollHistory(PollStore(str(tmp_path / "polls.db")))
+  await history.record(1, {"A": 1, "B": 3}, finished(3))
+  await history.record(1, {"A": 2, "B": 2}, finished(2))
+  await history.record(1, {"A": 5, "B": 0}, finished(1))
+  await history.record(1, {"A": 6, "B": 1}, finished(0))
+  await history.record(2, {"A": 0, "B": 0}, finished(0))
+
+  stats = await history.stats(1, today=MONDAY + datetime.timedelta(days=6))
+  assert stats.polls == 4
+  assert stats.average_turnout == 5
+  assert [(option.option, option.wins, option.votes) for option in stats.options] == [("A", 3, 14), ("B", 2, 6)]
+
+  recent = await history.stats(1, weeks=2, today=MONDAY + datetime.timedelta(days=6))
+  assert recent.polls == 2
+  assert recent.options[0].option == "A"
+  assert recent.options[0].win_rate == 1.0
+  assert recent.options[0].trend == 1
+
+  empty = await history.stats(2)
+  assert empty.options[0].wins == 0
+
+@pytest.mark.asyncio
+async def test_rerecording_a_week_replaces_it(tmp_path):
+  history = PollHistory(PollStore(str(tmp_path / "polls.db")))
+  await history.record(1, {"A": 1}, finished(0))
+  await history.record(1, {"A": 4}, finished(0))
+  stats = await history.stats(1)
+  assert stats.polls == 1
+  assert stats.options[0].votes == 4
+  assert stats.options[0].polls == 1
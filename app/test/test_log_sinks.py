@@ -0,0 +1,76 @@
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+from app.logger import INFO_LOG, configure_logging, shutdown_logging
+from app.logger.sinks import BatchedSink, RotatingFile
+
+def teardown_function():
+  configure_logging()
+
+def test_json_lines_carry_the_context_field():
+  stream = io.StringIO()
+  configure_logging(level="INFO", json_lines=True, enqueue=False, stream=stream)
+  INFO_LOG("Hello", context="TEST")
+  entry = json.loads(stream.getvalue().splitlines()[-1])
+  assert entry["context"] == "TEST"
+  assert entry["message"] == "Hello"
+  assert entry["level"] == "INFO"
+
+def test_batched_sink_writes_everything_on_shutdown():
+  stream = io.StringIO()
+  configure_logging(level="INFO", enqueue=True, stream=stream)
+  for index in range(100):
+    INFO_LOG(f"Message {index}", context="TEST")
+  shutdown_logging()
+  lines = stream.getvalue().splitlines()
+  assert len(lines) == 100
+  assert "[TEST] Message 99" in lines[-1]
+
+def test_batched_sink_keeps_record_order():
+  writes = []
+  class Target:
+    def write(self, text):
+      writes.append(text)
+    def flush(self):
+      pass
+  sink = BatchedSink(Target())
+  sink.write("a\n")
+  sink.write("b\n")
+  sink.stop()
+  assert "".join(writes) == "a\nb\n"
+
+def test_rotating_file_compresses_and_keeps_retention(tmp_path):
+  path = tmp_path / "bot.log"
+  log_file = RotatingFile(str(path), rotation="10 B", retention=2)
+  for index in range(5):
+    log_file.write(f"line {index} is long\n")
+    log_file.flush()
+  log_file.stop()
+  rotated = sorted(file for file in tmp_path.iterdir() if file.name != "bot.log")
+  assert len(rotated) == 2
+  assert all(file.suffix == ".gz" for file in rotated)
+  assert gzip.open(rotated[-1], "rt").read() == "line 3 is long\n"
+  assert path.read_text() == "line 4 is long\n"
+
+def test_rotation_parses_sizes_and_ages():
+  assert RotatingFile._parse_rotation("10 MB") == (10 * 1024 ** 2, None)
+  assert RotatingFile._parse_rotation("2 days") == (None, 172800)
+
+def test_importing_the_logger_keeps_existing_sinks():
+  root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  script = ("import sys; from loguru import logger; logger.add(sys.stdout, format='{message}'); "
+            "from app.logger import INFO_LOG; INFO_LOG('kept', context='TEST')")
+  result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, timeout=60,
+                          env={**os.environ, "PYTHONPATH": root}, check=True)
+  assert "kept" in result.stdout
+
+def test_logs_carry_their_context_before_logging_is_configured():
+  root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+  script = "from app.logger import INFO_LOG; INFO_LOG('unconfigured', context='TEST')"
+  result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True, timeout=60,
+                          env={**os.environ, "PYTHONPATH": root}, check=True)
+  assert "[TEST] unconfigured" in result.stderr
+  assert result.stderr.count("unconfigured") == 1
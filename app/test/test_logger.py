@@ -2,7 +2,8 @@ import pytest
 from unittest.mock import patch
 import logging
 from colorist import BrightColor as BColour
-from app.logger import log, INFO_LOG, WARN_LOG, DEBUG_LOG, ERROR_LOG, CRITICAL_LOG
+from app.logger import log, INFO_LOG, WARN_LOG, DEBUG_LOG, ERROR_LOG, CRITICAL_LOG, set_level, is_enabled
+from app.logger.logger import get_context
 
 @patch('app.logger.logger.logging.log')
 def test_log_info(mock_log):
@@ -52,4 +53,20 @@ def test_error_log_partial(mock_log):
 @patch('app.logger.logger.logging.log')
 def test_critical_log_partial(mock_log):
   CRITICAL_LOG("This is a critical message")
-  mock_log.assert_called_once_with(logging.CRITICAL, f'{BColour.MAGENTA}CRITICAL{BColour.OFF} \t {BColour.CYAN}APP{BColour.OFF} This is a critical message')
\ No newline at end of file
+  mock_log.assert_called_once_with(logging.CRITICAL, f'{BColour.MAGENTA}CRITICAL{BColour.OFF} \t {BColour.CYAN}APP{BColour.OFF} This is a critical message')
+
+@patch('app.logger.logger.get_context')
+@patch('app.logger.logger.logger')
+def test_filtered_level_skips_context_and_formatting(mock_logger, mock_get_context):
+  set_level("INFO")
+  try:
+    DEBUG_LOG(lambda: pytest.fail("message built for a filtered level"))
+    mock_get_context.assert_not_called()
+    mock_logger.opt.assert_not_called()
+    assert not is_enabled("DEBUG")
+    assert is_enabled("WARNING")
+  finally:
+    set_level("DEBUG")
+
+def test_get_context_skips_logger_frames():
+  assert get_context() == "test_logger.py"
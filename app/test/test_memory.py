@@ -0,0 +1,72 @@
+import gc
+import tracemalloc
+import pytest
+from discord import Intents
+from app.fake_discord import FakeDiscordServer, create_bot, start_bot, stop_bot
+from app.memory import MemoryReport, lean_intents, lean_options, memory_report
+from app.poll_state import DEFAULT_SCHEDULE, GuildPoll
+from app.storage import PollStore
+
+BUDGET_PER_GUILD = 16 * 1024 # Bytes of Python heap per guild, measured at about 4 KiB
+FILTERS = [tracemalloc.Filter(False, "*fake_discord*"), tracemalloc.Filter(False, "*aiohttp*")]
+
+def test_lean_intents_only_receive_what_the_bot_uses():
+  intents = lean_intents()
+  assert intents.guilds and intents.guild_messages and intents.message_content
+  assert intents.guild_reactions and intents.guild_polls
+  assert not intents.members and not intents.presences and not intents.typing
+  assert intents.value < (Intents.default() | Intents(message_content=True)).value
+
+def test_lean_options_turn_off_member_and_message_caches():
+  options = lean_options()
+  assert options["member_cache_flags"].value == 0
+  assert options["chunk_guilds_at_startup"] is False
+  assert options["max_messages"] is None
+
+def test_guild_polls_are_compact_and_share_defaults():
+  first = GuildPoll(1, {})
+  second = GuildPoll.from_dict(2, {}, GuildPoll(2, {}).to_dict())
+  third = GuildPoll.from_dict(3, {}, {"schedule": {"post_day": "friday"}, "votes": {"max_votes": 2}})
+  fourth = GuildPoll.from_dict(4, {}, third.to_dict())
+  assert not hasattr(first, "__dict__")
+  assert first.schedule is second.schedule is DEFAULT_SCHEDULE
+  assert first.votes is second.votes
+  assert third.schedule is fourth.schedule and third.votes is fourth.votes
+
+def test_memory_report_per_guild():
+  report = MemoryReport(rss=12 * 2**20, baseline=10 * 2**20, guilds=4, members=4, messages=0, polls=4, tallies=1)
+  assert report.per_guild == 2**19
+  assert "512.0 KiB per guild" in report.render()
+  assert MemoryReport(None, None, 0, 0, 0, 0, 0).per_guild is None
+
+def traced() -> int:
+  gc.collect()
+  return sum(stat.size for stat in tracemalloc.take_snapshot().filter_traces(FILTERS).statistics("filename"))
+
+async def guild_memory(tmp_path, guilds: int) -> int:
+  """Returns the Python heap the bot allocates to join `guilds` guilds of 25 members each."""
+  async with FakeDiscordServer() as server:
+    for index in range(guilds):
+      server.add_guild(f"Guild {index}", members=25)
+    tracemalloc.start()
+    try:
+      before = traced()
+      bot = create_bot(PollStore(str(tmp_path / f"polls-{guilds}.db"), flush_delay=0), testing=False)
+      task = await start_bot(bot, server, timeout=30)
+      poll = bot.get_cog("Poll")
+      await server.wait_for(lambda: len(poll.scheduler) == guilds, 30)
+      used = traced() - before
+    finally:
+      tracemalloc.stop()
+    report = memory_report(bot)
+    assert report.guilds == report.polls == guilds
+    assert report.members <= guilds # Only the bot itself is cached
+    assert report.messages == 0
+    await stop_bot(bot, task)
+    return used
+
+@pytest.mark.asyncio
+async def test_memory_per_guild_stays_under_budget(tmp_path):
+  small = await guild_memory(tmp_path, 20)
+  large = await guild_memory(tmp_path, 120)
+  assert (large - small) / 100 < BUDGET_PER_GUILD
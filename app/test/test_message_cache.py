@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock, patch
+from app.message_cache import MessageCache
+
+def make_message(message_id):
+  message = MagicMock()
+  message.id = message_id
+  return message
+
+def test_evicts_least_recently_used():
+  cache = MessageCache(maxsize=2)
+  cache.put(make_message(1))
+  cache.put(make_message(2))
+  cache.get(1)
+  cache.put(make_message(3))
+  assert 1 in cache
+  assert 2 not in cache
+  assert 3 in cache
+
+@patch('app.message_cache.time.monotonic')
+def test_entries_expire(mock_monotonic):
+  cache = MessageCache(ttl=10)
+  mock_monotonic.return_value = 100
+  cache.put(make_message(1))
+  mock_monotonic.return_value = 109
+  assert cache.get(1) is not None
+  mock_monotonic.return_value = 111
+  assert cache.get(1) is None
+  assert len(cache) == 0
+
+def test_invalidate():
+  cache = MessageCache()
+  cache.put(make_message(1))
+  cache.invalidate(1)
+  cache.invalidate(2)
+  assert cache.get(1) is None
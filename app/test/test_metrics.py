@@ -0,0 +1,70 @@
+import asyncio
+import aiohttp
+import pytest
+from app.metrics import Counter, Gauge, Histogram, Registry, MetricsServer
+from app.loop_lag import LoopLagMonitor
+
+def test_counter_renders_labelled_samples():
+  counter = Counter("votes_total", "Votes", ("action",))
+  counter.inc("add")
+  counter.inc("add", amount=2)
+  counter.inc("remove")
+  assert counter.value("add") == 3
+  assert counter.render() == ["# HELP votes_total Votes", "# TYPE votes_total counter",
+                              'votes_total{action="add"} 3', 'votes_total{action="remove"} 1']
+
+def test_gauge_reads_functions_when_rendered():
+  sizes = {}
+  gauge = Gauge("polls", "Polls", ("state",))
+  gauge.set_function(lambda: len(sizes), "tracked")
+  sizes[1] = True
+  assert gauge.render()[-1] == 'polls{state="tracked"} 1'
+  gauge.set(0.5, "lag")
+  assert gauge.value("lag") == 0.5
+
+def test_histogram_buckets_are_cumulative():
+  histogram = Histogram("latency_seconds", "Latency", ("call",), buckets=(0.1, 1.0))
+  for value in (0.05, 0.1, 0.5, 5.0):
+    histogram.observe(value, "send")
+  assert histogram.count("send") == 4
+  assert histogram.render()[2:] == ['latency_seconds_bucket{call="send",le="0.1"} 2',
+                                    'latency_seconds_bucket{call="send",le="1.0"} 3',
+                                    'latency_seconds_bucket{call="send",le="+Inf"} 4',
+                                    'latency_seconds_sum{call="send"} 5.65',
+                                    'latency_seconds_count{call="send"} 4']
+
+@pytest.mark.asyncio
+async def test_histogram_times_awaits_and_errors():
+  histogram = Histogram("latency_seconds", "Latency", ("call",))
+  with histogram.time("fetch_message"):
+    await asyncio.sleep(0.01)
+  with pytest.raises(RuntimeError):
+    with histogram.time("fetch_message"):
+      raise RuntimeError("404")
+  assert histogram.count("fetch_message") == 2
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_sets_gauge():
+  gauge = Gauge("lag", "Lag")
+  gauge.set(-1)
+  monitor = LoopLagMonitor(0.01, on_sample=gauge.set)
+  task = asyncio.create_task(monitor.run())
+  await asyncio.sleep(0.05)
+  task.cancel()
+  assert monitor.samples > 0
+  assert gauge.value() == monitor.last >= 0
+
+@pytest.mark.asyncio
+async def test_server_serves_metrics():
+  registry = Registry()
+  registry.register(Counter("polls_posted_total", "Polls posted")).inc()
+  server = MetricsServer(port=0, registry=registry)
+  await server.start()
+  try:
+    async with aiohttp.ClientSession() as session:
+      async with session.get(f"http://127.0.0.1:{server.port}/metrics") as response:
+        assert response.status == 200
+        assert response.content_type == "text/plain"
+        assert "polls_posted_total 1\n" in await response.text()
+  finally:
+    await server.stop()
@@ -0,0 +1,50 @@
+import datetime
+from unittest.mock import MagicMock
+from app.native_poll import split_options, build_polls, answer_emoji, count_votes, _answer_parts
+
+OPTIONS = {f"Game {index} {chr(0x1F600 + index)}": chr(0x1F600 + index) for index in range(16)}
+
+def test_split_is_even_and_ordered():
+  parts = split_options(OPTIONS)
+  assert [len(part) for part in parts] == [8, 8]
+  assert [emoji for part in parts for emoji in part.values()] == list(OPTIONS.values())
+  assert [len(part) for part in split_options(dict(list(OPTIONS.items())[:10]))] == [10]
+  assert split_options({}) == []
+
+def test_build_polls_numbers_parts():
+  polls = build_polls("Spooky Saturday", OPTIONS, datetime.datetime.now() + datetime.timedelta(days=5))
+  assert [poll.question for poll in polls] == ["Spooky Saturday (1/2)", "Spooky Saturday (2/2)"]
+  assert polls[0].answers[0].text == "Game 0"
+  assert polls[0].duration == datetime.timedelta(hours=120)
+
+def test_answer_emoji_maps_across_parts():
+  assert answer_emoji(OPTIONS, 0, 1) == chr(0x1F600)
+  assert answer_emoji(OPTIONS, 1, 1) == chr(0x1F608)
+  assert answer_emoji(OPTIONS, 1, 9) is None
+  assert answer_emoji(OPTIONS, 2, 1) is None
+
+def test_answer_emoji_follows_the_split_and_splits_once_per_option_set():
+  for count in (1, 10, 11, 16, 20):
+    options = {f"Game {index}": chr(0x1F600 + index) for index in range(count)}
+    for part_index, part in enumerate(split_options(options)):
+      assert [answer_emoji(options, part_index, answer_id) for answer_id in range(1, len(part) + 1)] == list(part.values())
+  _answer_parts.cache_clear()
+  for answer_id in range(1, 9):
+    answer_emoji(OPTIONS, 1, answer_id)
+  assert _answer_parts.cache_info().misses == 1
+
+def test_count_votes_merges_parts():
+  messages = []
+  for part_votes in ([3, 0], [0, 5]):
+    message = MagicMock()
+    message.poll.answers = []
+    for answer_id, votes in enumerate(part_votes, start=1):
+      answer = MagicMock()
+      answer.id = answer_id
+      answer.vote_count = votes
+      message.poll.answers.append(answer)
+    messages.append(message)
+  counts = count_votes(messages, OPTIONS)
+  assert counts[chr(0x1F600)] == 3
+  assert counts[chr(0x1F609)] == 5
+  assert sum(counts.values()) == 8
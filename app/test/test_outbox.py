@@ -0,0 +1,98 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+from discord import Forbidden, HTTPException
+from app.outbox import Outbox, Priority
+
+class FakeChannel:
+  def __init__(self, channel_id, sent, gate=None, errors=()):
+    self.id = channel_id
+    self.sent = sent
+    self.gate = gate
+    self.errors = list(errors)
+
+  async def send(self, content=None, **kwargs):
+    if self.gate is not None:
+      await self.gate.wait()
+    if self.errors:
+      raise self.errors.pop(0)
+    self.sent.append((time.monotonic(), self.id, content, kwargs))
+    return MagicMock(id=len(self.sent), content=content)
+
+def http_error(status, error=HTTPException):
+  response = MagicMock()
+  response.status = status
+  return error(response, "error")
+
+@pytest.mark.asyncio
+async def test_results_outrank_chatter():
+  sent, gate = [], asyncio.Event()
+  outbox = Outbox(rate=1000, interval=0, concurrency=1)
+  blocker = outbox.send(FakeChannel(1, sent, gate), "first")
+  await asyncio.sleep(0.01)
+  chatter = outbox.send(FakeChannel(2, sent), "results will be announced")
+  poll = outbox.send(FakeChannel(3, sent), "poll", priority=Priority.POLL)
+  results = outbox.send(FakeChannel(4, sent), embed="results", priority=Priority.RESULTS)
+  gate.set()
+  await asyncio.gather(blocker, chatter, poll, results)
+  assert [channel_id for _, channel_id, _, _ in sent] == [1, 4, 3, 2]
+  outbox.close()
+
+@pytest.mark.asyncio
+async def test_consecutive_text_to_a_channel_is_merged():
+  sent, gate = [], asyncio.Event()
+  channel = FakeChannel(1, sent, gate)
+  outbox = Outbox(rate=1000, interval=0)
+  first = outbox.send(channel, "poll", priority=Priority.POLL)
+  await asyncio.sleep(0.01)
+  replies = [outbox.send(channel, f"reply {index}", merge=True) for index in range(3)]
+  embed = outbox.send(channel, embed="stats")
+  after = outbox.send(channel, "after the embed", merge=True)
+  gate.set()
+  messages = await asyncio.gather(first, *replies, embed, after)
+
+  assert [content for _, _, content, _ in sent] == ["poll", "reply 0\nreply 1\nreply 2", None, "after the embed"]
+  assert messages[1] is messages[2] is messages[3]
+  assert outbox.merged == 2
+  assert outbox.sent == 4
+  outbox.close()
+
+@pytest.mark.asyncio
+async def test_messages_are_paced_per_channel_and_overall():
+  sent = []
+  outbox = Outbox(rate=50, interval=0.1)
+  channel = FakeChannel(1, sent)
+  await asyncio.gather(outbox.send(channel, "a"), outbox.send(channel, "b"),
+                       *(outbox.send(FakeChannel(index, sent), "c") for index in range(2, 6)))
+  same_channel = [at for at, channel_id, _, _ in sent if channel_id == 1]
+  assert same_channel[1] - same_channel[0] >= 0.1
+  starts = sorted(at for at, _, _, _ in sent)
+  assert starts[-1] - starts[0] >= 4 * (1 / 50) * 0.9
+  outbox.close()
+
+@pytest.mark.asyncio
+async def test_server_errors_are_retried_and_other_errors_raised():
+  sent = []
+  outbox = Outbox(rate=1000, interval=0, backoff=0)
+  message = await outbox.send(FakeChannel(1, sent, errors=[http_error(503)]), "retried")
+  assert message.content == "retried"
+  with pytest.raises(Forbidden):
+    await outbox.send(FakeChannel(2, sent, errors=[http_error(403, Forbidden)]), "denied")
+  assert outbox.sent == 1
+  outbox.close()
+
+@pytest.mark.asyncio
+async def test_close_cancels_queued_and_in_flight_messages():
+  sent, gate = [], asyncio.Event()
+  channel = FakeChannel(1, sent, gate)
+  outbox = Outbox(rate=1000, interval=0)
+  in_flight = outbox.send(channel, "in flight")
+  queued = outbox.send(channel, "queued")
+  await asyncio.sleep(0.01)
+  outbox.close()
+  await asyncio.sleep(0)
+  assert queued.cancelled()
+  with pytest.raises(asyncio.CancelledError):
+    await asyncio.wait_for(in_flight, timeout=1.0)
+  assert len(outbox) == 0
@@ -0,0 +1,230 @@
+import asyncio
+import aiohttp
+import time
+import pytest
+from unittest.mock import patch
+from app.fake_discord import FakeDiscordServer, create_bot, start_bot, stop_bot
+from app.storage import PollStore
+from app import metrics
+from app.poll import RESULTS_ATTEMPTS, RESULTS_RETRY_DELAY
+
+def results_messages(channel):
+  return [message for message in channel.messages.values() if message.embeds]
+
+async def run_poll(server, tmp_path):
+  store = PollStore(str(tmp_path / "polls.db"), flush_delay=0)
+  bot = create_bot(store)
+  task = await start_bot(bot, server)
+  poll = bot.get_cog("Poll")
+  poll.seeder.interval = 0
+  poll.outbox.interval = 0
+  return bot, task, poll
+
+@pytest.mark.asyncio
+async def test_reaction_poll_end_to_end(tmp_path):
+  async with FakeDiscordServer(reaction_interval=0.01) as server:
+    guild = server.add_guild("Spooky Guild")
+    channel = server.channel_named(guild, "spooky-saturday")
+    voters = [server.add_member(guild, f"voter-{index}") for index in range(3)]
+    rate_limited, votes_added = metrics.RATE_LIMITED.value(), metrics.VOTES.value("add")
+    posted, reactions_added = metrics.POLLS_POSTED.value("reaction"), metrics.DISCORD_LATENCY.count("add_reaction")
+
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: poll.poll[guild.id].active)
+    message = server.messages[poll.poll[guild.id].message_id]
+    await server.wait_for(lambda: len(message.reactions) == 16)
+
+    for voter in voters:
+      server.react(voter, message, "👻")
+    server.react(voters[0], message, "🚀")
+    server.unreact(voters[0], message, "🚀")
+    await server.wait_for(lambda: poll.tallies[message.id].counts["👻"] == 3)
+    assert poll.tallies[message.id].counts["🚀"] == 0
+
+    await server.wait_for(lambda: (poll.scheduler.pending(guild.id) or (0, None))[1] == "results")
+    poll.scheduler.advance(60)
+    await server.wait_for(lambda: results_messages(channel))
+    assert "Winner: Phasmophobia 👻" in results_messages(channel)[0].embeds[0]["description"]
+    await server.wait_for(lambda: not poll.poll[guild.id].active)
+    assert server.rate_limited > 0
+    assert server.requests["GET /api/v10/channels/{channel_id}/messages/{message_id}/reactions/{emoji}"] == 1
+    assert metrics.RATE_LIMITED.value() - rate_limited == server.rate_limited
+    assert metrics.VOTES.value("add") - votes_added == 4
+    assert metrics.POLLS_POSTED.value("reaction") - posted == 1
+    assert metrics.DISCORD_LATENCY.count("add_reaction") - reactions_added == 16
+
+    stats = await poll.history.stats(guild.id)
+    assert stats.polls == 1
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_native_poll_end_to_end(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Native Guild")
+    channel = server.channel_named(guild, "spooky-saturday")
+    owner = server.owner
+
+    store = PollStore(str(tmp_path / "polls.db"), flush_delay=0)
+    store.save(guild.id, {"mode": "native"})
+    await store.flush()
+    bot = create_bot(store)
+    task = await start_bot(bot, server)
+    poll = bot.get_cog("Poll")
+
+    await server.wait_for(lambda: poll.poll[guild.id].active)
+    first, second = [server.messages[message_id] for message_id in poll.poll[guild.id].parts]
+    server.vote(owner, second, 5)
+    await server.wait_for(lambda: poll.tallies[first.id].counts["😶"] == 1)
+
+    server.send_message(channel, owner, "!pollresult")
+    await server.wait_for(lambda: results_messages(channel))
+    assert "Winner: GTFO 😶" in results_messages(channel)[0].embeds[0]["description"]
+    assert poll.poll[guild.id].active
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_pollresult_spam_shares_one_count(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Busy Guild")
+    channel = server.channel_named(guild, "spooky-saturday")
+    voter = server.add_member(guild, "voter")
+
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: poll.poll[guild.id].active)
+    message = server.messages[poll.poll[guild.id].message_id]
+    await server.wait_for(lambda: len(message.reactions) == 16)
+    server.react(voter, message, "🦌")
+    await server.wait_for(lambda: poll.tallies[message.id].counts["🦌"] == 1)
+
+    for _ in range(10):
+      server.send_message(channel, server.owner, "!pollresult")
+    await server.wait_for(lambda: poll.results.hits + poll.results.shared == 9 and results_messages(channel))
+    assert len(results_messages(channel)) == 1
+    assert "Winner: Oh deer 🦌" in results_messages(channel)[0].embeds[0]["description"]
+    assert server.requests["GET /api/v10/channels/{channel_id}/messages/{message_id}/reactions/{emoji}"] == 0
+    assert server.requests["GET /api/v10/channels/{channel_id}/messages/{message_id}"] == 0  # Read from the live tally
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_resume_marks_tallies_stale_and_reconciles(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Resumed Guild")
+    voter = server.add_member(guild, "voter")
+
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: poll.poll[guild.id].active)
+    message = server.messages[poll.poll[guild.id].message_id]
+    await server.wait_for(lambda: len(message.reactions) == 16)
+
+    resumed = len(server.sessions)
+    server.request_reconnect()
+    message.react(voter.id, "🦌")  # A vote cast while the bot was disconnected
+    await server.wait_for(lambda: poll.tallies[message.id].counts["🦌"] == 1)  # Reconciled without a command
+    assert not poll.tallies[message.id].stale
+    assert poll.reconciler.last.changed == 1
+    assert len(server.sessions) == resumed
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_repeated_ready_starts_one_scheduler(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Reconnecting Guild")
+    channel = server.channel_named(guild, "spooky-saturday")
+
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: poll.poll[guild.id].active)
+    for _ in range(3):
+      bot.dispatch("ready")
+    await asyncio.sleep(0.1)
+
+    assert bot.get_cog("Poll") is poll
+    assert len([other for other in asyncio.all_tasks() if other.get_name() == "poll-scheduler"]) == 1
+    assert len([message for message in channel.messages.values() if "Spooky Saturday" in message.content]) == 1
+    await stop_bot(bot, task)
+    assert bot.supervisor.states()[0].status == "cancelled"
+
+@pytest.mark.asyncio
+async def test_failed_results_are_retried_with_backoff_then_closed(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Forbidden Guild")
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: (poll.scheduler.pending(guild.id) or (0, None))[1] == "results")
+    attempts = 0
+
+    async def fail(guild_id):
+      nonlocal attempts
+      attempts += 1
+      raise RuntimeError("Missing Permissions")
+
+    with patch.object(poll, "automatic_check_poll_results", fail):
+      delays = []
+      for attempt in range(1, RESULTS_ATTEMPTS):
+        poll.scheduler.advance(10**6)
+        await server.wait_for(lambda: attempts == attempt and poll.scheduler.pending(guild.id)[0] > time.time())
+        when, job = poll.scheduler.pending(guild.id)
+        assert job == "results" and poll.poll[guild.id].active
+        delays.append(round((when - time.time()) / RESULTS_RETRY_DELAY))
+      assert delays == [1, 2, 4, 8]
+
+      poll.scheduler.advance(10**6)
+      await server.wait_for(lambda: not poll.poll[guild.id].active)
+      await server.wait_for(lambda: (poll.scheduler.pending(guild.id) or (0, None))[1] == "post")
+    assert attempts == RESULTS_ATTEMPTS
+    assert poll.scheduler.pending(guild.id)[0] > time.time() + 3600  # Not posted again straight away
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_running_results_without_retrying(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Closing Guild")
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: (poll.scheduler.pending(guild.id) or (0, None))[1] == "results")
+    due = poll.poll[guild.id].due
+    started = asyncio.Event()
+
+    async def hang(guild_id):
+      started.set()
+      await asyncio.Event().wait()
+
+    with patch.object(poll, "automatic_check_poll_results", hang):
+      poll.scheduler.advance(10**6)
+      await asyncio.wait_for(started.wait(), timeout=5.0)
+      await stop_bot(bot, task)
+
+    assert not poll.scheduler._running
+    assert poll._results_failures == {}
+    saved = PollStore(str(tmp_path / "polls.db")).load()[guild.id]
+    assert saved["job"] == "results" and saved["due"] == due  # Runs again after the restart
+
+@pytest.mark.asyncio
+async def test_testing_mode_only_bypasses_the_testing_guild(tmp_path):
+  async with FakeDiscordServer() as server:
+    testing, production = server.add_guild("Testing Guild"), server.add_guild("Production Guild")
+    bot = create_bot(PollStore(str(tmp_path / "polls.db"), flush_delay=0))
+    bot.testing_guild = testing.id
+    task = await start_bot(bot, server)
+    poll = bot.get_cog("Poll")
+
+    await server.wait_for(lambda: poll.poll[testing.id].active)
+    assert not poll.poll[production.id].active
+    when, job = poll.scheduler.pending(production.id)
+    assert job == "post" and when > time.time() + 60  # Waits for its post day
+    await stop_bot(bot, task)
+
+@pytest.mark.asyncio
+async def test_startup_serves_metrics_and_close_stops_every_task(tmp_path):
+  async with FakeDiscordServer() as server:
+    guild = server.add_guild("Observed Guild")
+    bot, task, poll = await run_poll(server, tmp_path)
+    await server.wait_for(lambda: poll.poll[guild.id].active and bot.metrics is not None)
+    assert {state.name for state in bot.supervisor.states()} == {"poll-scheduler", "loop-lag"}
+
+    async with aiohttp.ClientSession() as session:
+      async with session.get(f"http://{bot.metrics.host}:{bot.metrics.port}/metrics") as response:
+        assert 'spooky_poll_guilds{state="active"} 1' in await response.text()
+
+    metrics_server = bot.metrics
+    await stop_bot(bot, task)
+    assert all(state.status == "cancelled" for state in bot.supervisor.states())
+    assert metrics_server._runner is None
+    assert bot.get_cog("Poll") is None
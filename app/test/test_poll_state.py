@@ -0,0 +1,37 @@
+import datetime
+from zoneinfo import ZoneInfo
+from app.poll_state import GuildPoll, PollSchedule, next_occurrence
+
+ADELAIDE = ZoneInfo("Australia/Adelaide")
+
+def test_next_occurrence_keeps_the_hour_across_dst():
+  # Daylight saving in Adelaide starts on the first Sunday of October 2025
+  now = datetime.datetime(2025, 10, 3, 12, tzinfo=ADELAIDE)
+  results = next_occurrence("saturday", 20, ADELAIDE, now)
+  post = next_occurrence("monday", 0, ADELAIDE, now)
+
+  assert (results.hour, results.utcoffset()) == (20, datetime.timedelta(hours=9, minutes=30))
+  assert (post.hour, post.utcoffset()) == (0, datetime.timedelta(hours=10, minutes=30))
+  assert post.timestamp() - now.timestamp() == 2 * 86400 + 12 * 3600 - 3600
+
+def test_next_occurrence_is_today_on_the_day():
+  now = datetime.datetime(2025, 10, 4, 21, tzinfo=ADELAIDE)
+  assert next_occurrence("saturday", 20, ADELAIDE, now).date() == now.date()
+
+def test_guild_poll_round_trips_its_job_and_timezone():
+  guild_poll = GuildPoll(1, {}, schedule=PollSchedule(timezone="Europe/London"), job="results", due=1234.5)
+  restored = GuildPoll.from_dict(1, {}, guild_poll.to_dict())
+  assert (restored.job, restored.due) == ("results", 1234.5)
+  assert restored.schedule.zone == ZoneInfo("Europe/London")
+
+def test_default_schedule_is_not_saved():
+  data = GuildPoll(1, {}).to_dict()
+  assert "schedule" not in data
+  assert GuildPoll.from_dict(1, {}, data).schedule.to_dict() == PollSchedule().to_dict()
+
+def test_default_vote_policy_is_not_saved():
+  data = GuildPoll(1, {}).to_dict()
+  assert "votes" not in data
+  restored = GuildPoll.from_dict(1, {}, {**data, "votes": {"max_votes": 2}})
+  assert (restored.votes.max_votes, restored.votes.split) == (2, False)
+  assert GuildPoll.from_dict(2, {}, restored.to_dict()).votes is restored.votes
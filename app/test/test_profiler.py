@@ -0,0 +1,53 @@
+import asyncio
+import os
+import pytest
+from app.profiler import Profiler, save_report
+
+async def waiting_for_votes(event):
+  await event.wait()
+
+def spin(seconds):
+  end = asyncio.get_running_loop().time() + seconds
+  while asyncio.get_running_loop().time() < end:
+    pass
+
+async def busy_scheduler():
+  while True:
+    spin(0.005)
+    await asyncio.sleep(0.005)
+
+@pytest.mark.asyncio
+async def test_capture_attributes_wall_time_to_coroutines_and_awaits():
+  event = asyncio.Event()
+  tasks = [asyncio.create_task(waiting_for_votes(event)), asyncio.create_task(busy_scheduler())]
+  report = await Profiler(interval=0.005).capture(0.2)
+  event.set()
+  tasks[1].cancel()
+  await asyncio.gather(*tasks, return_exceptions=True)
+
+  assert report.samples > 1
+  assert report.coroutines["waiting_for_votes"] == pytest.approx(report.seconds, abs=0.05)
+  assert any(name.startswith("waiting_for_votes (test_profiler.py") for name in report.awaits)
+  text = report.render()
+  assert "## Slowest awaits" in text
+  assert "spin" in text
+
+@pytest.mark.asyncio
+async def test_one_capture_at_a_time():
+  profiler = Profiler()
+  capture = asyncio.create_task(profiler.capture(0.05))
+  await asyncio.sleep(0)
+  assert profiler.active
+  with pytest.raises(RuntimeError):
+    await profiler.capture(0.05)
+  await capture
+  assert not profiler.active
+
+@pytest.mark.asyncio
+async def test_save_report_writes_text_and_stats(tmp_path):
+  report = await Profiler().capture(0.02)
+  path = save_report(report, str(tmp_path))
+  assert path.endswith(".txt")
+  assert os.path.exists(path.replace(".txt", ".pstats"))
+  with open(path, encoding="utf-8") as f:
+    assert f.read().startswith("Profiled")
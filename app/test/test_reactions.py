@@ -0,0 +1,48 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+from discord import HTTPException
+from app.reactions import ReactionSeeder
+
+def make_message(existing=()):
+  message = MagicMock()
+  message.id = 1
+  message.channel.id = 10
+  message.reactions = []
+  for emoji in existing:
+    reaction = MagicMock()
+    reaction.emoji = emoji
+    reaction.me = True
+    message.reactions.append(reaction)
+  message.add_reaction = AsyncMock()
+  return message
+
+def http_error(status):
+  response = MagicMock()
+  response.status = status
+  return HTTPException(response, "error")
+
+@pytest.mark.asyncio
+async def test_seeds_in_order_and_skips_existing():
+  message = make_message(existing=["🚀"])
+  report = await ReactionSeeder(interval=0).seed(message, ["👻", "🚀", "🦌"])
+  assert [call.args[0] for call in message.add_reaction.await_args_list] == ["👻", "🦌"]
+  assert report.added == 2
+  assert report.skipped == 1
+  assert report.complete
+
+@pytest.mark.asyncio
+async def test_retries_single_emoji_without_aborting_others():
+  message = make_message()
+  message.add_reaction.side_effect = [http_error(429), None, None]
+  report = await ReactionSeeder(interval=0, backoff=0).seed(message, ["👻", "🚀"])
+  assert report.added == 2
+  assert message.add_reaction.await_count == 3
+
+@pytest.mark.asyncio
+async def test_reports_failed_emoji():
+  message = make_message()
+  message.add_reaction.side_effect = [http_error(500), http_error(500), None]
+  report = await ReactionSeeder(interval=0, backoff=0, max_attempts=2).seed(message, ["👻", "🚀"])
+  assert report.failed == ["👻"]
+  assert report.added == 1
+  assert not report.complete
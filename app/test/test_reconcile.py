@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+from app.fake_discord import FakeDiscordServer, create_bot, start_bot, stop_bot
+from app.reconcile import Reconciler
+from app.storage import PollStore
+from app import metrics
+
+@pytest.mark.asyncio
+async def test_reconciler_bounds_concurrency_and_counts_outcomes():
+  running, peak = 0, 0
+  outcomes = {1: "changed", 2: "dropped", 3: "unchanged"}
+
+  async def refresh(guild_id):
+    nonlocal running, peak
+    running += 1
+    peak = max(peak, running)
+    await asyncio.sleep(0.01)
+    running -= 1
+    if guild_id == 4:
+      raise RuntimeError("boom")
+    return outcomes.get(guild_id, "unchanged")
+
+  reconciler = Reconciler(refresh, concurrency=3)
+  report = await reconciler.run(range(1, 21))
+  assert peak == 3
+  assert (report.checked, report.changed, report.dropped, report.failed) == (20, 1, 1, 1)
+  assert reconciler.last is report
+
+@pytest.mark.asyncio
+async def test_reconciler_runs_again_when_started_while_running():
+  gate, runs = asyncio.Event(), []
+
+  async def refresh(guild_id):
+    runs.append(guild_id)
+    await gate.wait()
+    return "unchanged"
+
+  reconciler = Reconciler(refresh)
+  first = reconciler.start(lambda: [1])
+  await asyncio.sleep(0)
+  assert reconciler.start(lambda: [1]) is first
+  assert reconciler.start(lambda: [1]) is first
+  gate.set()
+  await reconciler.wait()
+  assert runs == [1, 1]
+  assert not reconciler.running
+
+@pytest.mark.asyncio
+async def test_restart_reconciles_active_polls_concurrently(tmp_path, saved_active_polls):
+  async with FakeDiscordServer() as server:
+    guilds = [server.add_guild(f"Guild {index}") for index in range(16)]
+    voter = server.add_member(guilds[0], "voter")
+    db_path = str(tmp_path / "polls.db")
+
+    bot = create_bot(PollStore(db_path, flush_delay=0))
+    task = await start_bot(bot, server)
+    poll = bot.get_cog("Poll")
+    poll.seeder.interval = 0
+    poll.outbox.interval = 0
+    await server.wait_for(lambda: all(guild.id in poll.poll and poll.poll[guild.id].active for guild in guilds))
+    messages = [server.messages[poll.poll[guild.id].message_id] for guild in guilds]
+    await server.wait_for(lambda: all(len(message.reactions) == 16 for message in messages))
+    await server.wait_for(lambda: saved_active_polls(db_path) == len(guilds))
+    await stop_bot(bot, task)
+
+    for message in messages[:3]:
+      message.react(voter.id, "👻")  # Votes cast while the bot was offline
+    deleted = messages[3]
+    del deleted.channel.messages[deleted.id], server.messages[deleted.id]
+    server.latency = 0.05
+    fetches = server.requests["GET /api/v10/channels/{channel_id}/messages/{message_id}"]
+
+    bot = create_bot(PollStore(db_path, flush_delay=0))
+    task = await start_bot(bot, server)
+    poll = bot.get_cog("Poll")
+    await server.wait_for(lambda: poll.reconciler.last is not None)
+    report = poll.reconciler.last
+
+    assert (report.checked, report.changed, report.dropped, report.failed) == (16, 3, 1, 0)
+    assert report.seconds < 16 * server.latency  # Faster than fetching the polls one at a time
+    assert metrics.RECONCILE_SECONDS.value() == report.seconds
+    assert server.requests["GET /api/v10/channels/{channel_id}/messages/{message_id}"] - fetches == 16
+    assert not poll.poll[guilds[3].id].active
+    assert poll.tallies[messages[0].id].counts["👻"] == 1
+    assert not any(tally.stale for tally in poll.tallies.values())
+    await stop_bot(bot, task)
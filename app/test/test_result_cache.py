@@ -0,0 +1,53 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from app.result_cache import ResultCache
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_build():
+  cache = ResultCache()
+  builds = []
+  async def build():
+    builds.append(1)
+    await asyncio.sleep(0.01)
+    return "results"
+
+  results = await asyncio.gather(*(cache.get(1, ("poll", 0), build) for _ in range(20)))
+  assert results == ["results"] * 20
+  assert len(builds) == 1
+  assert cache.shared == 19
+
+@pytest.mark.asyncio
+async def test_rebuilds_only_when_the_key_changes():
+  cache = ResultCache()
+  versions = iter(range(10))
+  async def build():
+    return next(versions)
+
+  assert await cache.get(1, ("poll", 0), build) == 0
+  assert await cache.get(1, ("poll", 0), build) == 0
+  assert await cache.get(1, ("poll", 1), build) == 1
+  cache.invalidate(1)
+  assert await cache.get(1, ("poll", 1), build) == 2
+  assert (cache.hits, cache.builds) == (1, 3)
+
+def test_coalesces_identical_replies_within_the_window():
+  cache = ResultCache(window=60)
+  assert cache.coalesce(10, ("poll", 0))
+  assert not cache.coalesce(10, ("poll", 0))
+  assert cache.coalesce(11, ("poll", 0))
+  assert cache.coalesce(10, ("poll", 1))
+
+def test_replies_older_than_the_window_are_dropped():
+  cache = ResultCache(window=5)
+  now = time.monotonic()
+  with patch("app.result_cache.time.monotonic", return_value=now):
+    for channel_id in range(100):
+      cache.coalesce(channel_id, ("poll", 0))
+  with patch("app.result_cache.time.monotonic", return_value=now + 3):
+    assert not cache.coalesce(0, ("poll", 0))
+    assert cache.coalesce(100, ("poll", 0))
+  with patch("app.result_cache.time.monotonic", return_value=now + 6):
+    assert cache.coalesce(0, ("poll", 0))
+  assert list(cache._replies) == [100, 0]
@@ -0,0 +1,98 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch
+from app.scheduler import PollScheduler
+
+@pytest.mark.asyncio
+async def test_runs_jobs_in_deadline_order():
+  ran = []
+  async def handler(guild_id, job):
+    ran.append((guild_id, job))
+
+  scheduler = PollScheduler(handler)
+  now = time.time()
+  scheduler.schedule(2, "results", now + 0.02)
+  scheduler.schedule(1, "post", now)
+  scheduler.schedule(3, "post", now + 60)
+
+  closed = False
+  runner = asyncio.create_task(scheduler.run(lambda: closed))
+  await asyncio.sleep(0.1)
+  closed = True
+  runner.cancel()
+
+  assert ran == [(1, "post"), (2, "results")]
+  assert scheduler.pending(3) == (pytest.approx(now + 60), "post")
+
+@pytest.mark.asyncio
+async def test_reschedule_and_cancel_skip_stale_entries():
+  ran = []
+  async def handler(guild_id, job):
+    ran.append((guild_id, job))
+
+  scheduler = PollScheduler(handler)
+  now = time.time()
+  scheduler.schedule(1, "post", now)
+  scheduler.schedule(1, "results", now + 0.01)
+  scheduler.schedule(2, "post", now)
+  scheduler.cancel(2)
+
+  runner = asyncio.create_task(scheduler.run(lambda: False))
+  await asyncio.sleep(0.05)
+  runner.cancel()
+
+  assert ran == [(1, "results")]
+  assert len(scheduler) == 0
+
+def test_scheduling_does_not_walk_every_guild():
+  async def handler(guild_id, job):
+    pass
+
+  scheduler = PollScheduler(handler)
+  for guild_id in range(5000):
+    scheduler.schedule(guild_id, "post", time.time() + guild_id)
+  assert len(scheduler) == 5000
+  assert scheduler._peek()[2] == 0
+
+def test_restore_applies_the_catch_up_policy():
+  async def handler(guild_id, job):
+    pass
+
+  scheduler = PollScheduler(handler)
+  now = time.time()
+  assert scheduler.restore(1, "post", now - 3600, now)
+  assert not scheduler.restore(2, "post", now - 7 * 86400, now)
+  assert scheduler.restore(3, "results", now - 7 * 86400, now)
+  assert scheduler.restore(4, "post", now + 3600, now)
+  assert scheduler.pending(2) is None
+  assert scheduler.pending(3) == (now - 7 * 86400, "results")
+
+@pytest.mark.asyncio
+async def test_sleeps_in_slices_so_clock_jumps_are_noticed():
+  ran = []
+  async def handler(guild_id, job):
+    ran.append((guild_id, job))
+
+  scheduler = PollScheduler(handler, max_sleep=0.01)
+  scheduler.schedule(1, "results", time.time() + 3600)
+  runner = asyncio.create_task(scheduler.run(lambda: False))
+  await asyncio.sleep(0.02)
+  assert ran == []
+
+  with patch("app.scheduler.time.time", return_value=time.time() + 3601):
+    await asyncio.sleep(0.05)
+  runner.cancel()
+  assert ran == [(1, "results")]
+
+@pytest.mark.asyncio
+async def test_stops_once_closed_with_nothing_scheduled():
+  async def handler(guild_id, job):
+    pass
+
+  scheduler = PollScheduler(handler, max_sleep=0.01)
+  closed = False
+  runner = asyncio.create_task(scheduler.run(lambda: closed))
+  await asyncio.sleep(0.02)
+  closed = True
+  await asyncio.wait_for(runner, timeout=1.0)
@@ -0,0 +1,97 @@
+import asyncio
+import functools
+import json
+import os
+import time
+import pytest
+from unittest.mock import MagicMock
+from discord import AutoShardedClient
+from app.fake_discord import FakeDiscordServer
+from app.fake_discord.harness import run_shard_worker
+from app.poll import Poll
+from app.sharding import ShardCoordinator, shard_of, shard_ranges
+from app.storage import PollStore
+
+def exit_straight_away(index, shard_ids, shard_count):
+  os._exit(3)
+
+def test_shard_ranges_split_evenly():
+  assert shard_ranges(4, 2) == [[0, 1], [2, 3]]
+  assert shard_ranges(5, 3) == [[0, 1], [2, 3], [4]]
+  assert shard_ranges(1, 1) == [[0]]
+  with pytest.raises(ValueError):
+    shard_ranges(2, 3)
+
+def test_shard_of_matches_discord():
+  guild_id = 81384788765712384
+  assert shard_of(guild_id, 1) == 0
+  assert shard_of(guild_id, 4) == (guild_id >> 22) % 4
+
+def test_crashed_workers_restart_with_backoff():
+  coordinator = ShardCoordinator(exit_straight_away, 2, 2, backoff=1.0, healthy_after=60.0)
+  coordinator.start()
+  delays = []
+  for _ in range(2):
+    for worker in coordinator.workers:
+      worker.process.join(10)
+    now = time.monotonic()
+    coordinator.check()
+    delays.append([worker.restart_at - now for worker in coordinator.workers])
+    for worker in coordinator.workers:
+      worker.restart_at = now  # Skip the wait
+    coordinator.check()
+
+  assert all(worker.restarts == 2 and worker.failures == 2 for worker in coordinator.workers)
+  assert [[round(delay) for delay in attempt] for attempt in delays] == [[1, 1], [2, 2]]
+  coordinator.stop()
+
+def poll_messages(server, guild):
+  channel = server.channel_named(guild, "spooky-saturday")
+  return [message for message in channel.messages.values() if message.content.startswith("Spooky Saturday")]
+
+@pytest.mark.asyncio
+async def test_each_guild_is_polled_by_one_worker(tmp_path, saved_active_polls):
+  async with FakeDiscordServer() as server:
+    guilds = []
+    while {shard_of(guild.id, 2) for guild in guilds} != {0, 1}:
+      guilds.append(server.add_guild(f"Guild {len(guilds)}"))
+      await asyncio.sleep(0.002)
+
+    db_path = str(tmp_path / "polls.db")
+    target = functools.partial(run_shard_worker, server.url, db_path)
+    coordinator = ShardCoordinator(target, shard_count=2, workers=2, backoff=0.05, interval=0.05)
+    task = asyncio.create_task(coordinator.run())
+    try:
+      await server.wait_for(lambda: all(poll_messages(server, guild) for guild in guilds), timeout=30)
+      await server.wait_for(lambda: saved_active_polls(db_path) == len(guilds))
+      assert sorted(session.shard for session in server.sessions) == [(0, 2), (1, 2)]
+
+      coordinator.workers[0].process.kill()
+      await server.wait_for(lambda: coordinator.workers[0].restarts == 1 and len(server.sessions) == 2, timeout=30)
+      await asyncio.sleep(0.5)  # The restarted worker restores its active polls instead of posting again
+      assert all(len(poll_messages(server, guild)) == 1 for guild in guilds)
+    finally:
+      task.cancel()
+      await asyncio.gather(task, return_exceptions=True)
+    assert not any(worker.alive for worker in coordinator.workers)
+
+@pytest.mark.asyncio
+async def test_workers_leave_legacy_polls_in_channels_they_do_not_see(tmp_path):
+  with open(tmp_path / "polls.json", "w") as f:
+    json.dump({"10": 1000, "20": 2000}, f)
+  store = PollStore(str(tmp_path / "polls.db"), flush_delay=0)
+  store.import_legacy_json()
+  bot = MagicMock(spec=AutoShardedClient)
+  bot.shard_ids, bot.shard_count = [0], 2
+  channel = MagicMock()
+  channel.guild.id = 1
+  bot.get_channel = lambda channel_id: channel if channel_id == 10 else None
+
+  poll = Poll(bot, store=store)
+  await poll.cog_load()
+  poll.resolve_legacy_polls()
+  await store.flush()
+  saved = store.load()
+  assert saved[1]["message_id"] == 1000
+  assert 10 not in saved and saved[20] == 2000  # Left for the worker that sees channel 20
+  store.close()
@@ -0,0 +1,82 @@
+import json
+import sqlite3
+import threading
+import pytest
+from unittest.mock import patch
+from app.storage import PollStore
+
+def test_save_without_event_loop_writes_immediately(tmp_path):
+  store = PollStore(str(tmp_path / "polls.db"))
+  store.save(1, {"channel_id": 10, "message_id": 100})
+  store.close()
+  assert PollStore(str(tmp_path / "polls.db")).load() == {1: {"channel_id": 10, "message_id": 100}}
+
+@pytest.mark.asyncio
+async def test_writes_are_batched_per_guild(tmp_path):
+  store = PollStore(str(tmp_path / "polls.db"), flush_delay=0)
+  store.save(1, {"message_id": 100})
+  store.save(1, {"message_id": 101})
+  store.save(2, {"message_id": 200})
+  assert len(store._pending) == 2
+  await store.flush()
+  store.save(2, None)
+  await store.flush()
+  assert store.load() == {1: {"message_id": 101}}
+  store.close()
+
+def test_imports_legacy_json_once(tmp_path):
+  with open(tmp_path / "polls.json", "w") as f:
+    json.dump({"1": {"message_id": 100}, "10": 1000}, f)
+  store = PollStore(str(tmp_path / "polls.db"))
+  assert store.load() == {1: {"message_id": 100}, 10: 1000}
+  assert (tmp_path / "polls.json.bak").exists()
+  assert store.load() == {1: {"message_id": 100}, 10: 1000}  # Kept until moved to its guild
+  store.forget_legacy(10)
+  store.close()
+  assert PollStore(str(tmp_path / "polls.db")).load() == {1: {"message_id": 100}}
+
+def test_imported_legacy_json_is_synced_before_the_rename(tmp_path):
+  with open(tmp_path / "polls.json", "w") as f:
+    json.dump({"1": {"message_id": 100}}, f)
+  store = PollStore(str(tmp_path / "polls.db"))
+  statements = []
+  def trace(statement):
+    statements.append((statement, (tmp_path / "polls.json").exists()))
+  store._db().set_trace_callback(trace)
+  store.load()
+  committed = next(index for index, (statement, _) in enumerate(statements) if statement == "COMMIT")
+  assert ("PRAGMA synchronous=FULL", True) in statements[:committed]
+  assert statements[committed + 1] == ("PRAGMA synchronous=NORMAL", True)  # Renamed only after the synced commit
+  assert (tmp_path / "polls.json.bak").exists()
+  store.close()
+
+@pytest.mark.asyncio
+async def test_store_is_opened_and_loaded_on_its_worker_thread(tmp_path):
+  threads = []
+  connect = sqlite3.connect
+  def spy(*args, **kwargs):
+    threads.append(threading.current_thread().name)
+    return connect(*args, **kwargs)
+
+  with patch("app.storage.sqlite3.connect", side_effect=spy):
+    store = PollStore(str(tmp_path / "polls.db"), flush_delay=0)
+    store.save(1, {"message_id": 100})
+    await store.flush()
+  assert len(threads) == 1 and threads[0].startswith("poll-store")
+  assert await store.load_state() == ({}, {1: {"message_id": 100}})
+  store.close()
+
+def test_legacy_import_is_shared_by_stores_opened_after_it(tmp_path):
+  with open(tmp_path / "polls.json", "w") as f:
+    json.dump({"1": {"message_id": 100}, "10": 1000, "20": 2000}, f)
+  coordinator = PollStore(str(tmp_path / "polls.db"))
+  coordinator.import_legacy_json()
+  coordinator.close()
+
+  workers = [PollStore(str(tmp_path / "polls.db")) for _ in range(2)]
+  assert all(worker.load() == {1: {"message_id": 100}, 10: 1000, 20: 2000} for worker in workers)
+  workers[0].save(2, {"channel_id": 10, "message_id": 1000})
+  workers[0].forget_legacy(10)
+  workers[0].close()
+  assert workers[1].load() == {1: {"message_id": 100}, 2: {"channel_id": 10, "message_id": 1000}, 20: 2000}
+  workers[1].close()
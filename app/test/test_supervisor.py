@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from app.supervisor import TaskSupervisor
+
+@pytest.mark.asyncio
+async def test_start_is_idempotent():
+  supervisor = TaskSupervisor()
+  started = []
+  async def loop():
+    started.append(1)
+    await asyncio.sleep(60)
+
+  first = supervisor.start("loop", loop)
+  assert supervisor.start("loop", loop) is first
+  await asyncio.sleep(0)
+  assert started == [1]
+  assert supervisor.running("loop")
+  await supervisor.stop()
+  assert supervisor.states()[0].status == "cancelled"
+  assert not supervisor.running("loop")
+
+@pytest.mark.asyncio
+async def test_restarts_crashed_tasks_with_backoff():
+  supervisor = TaskSupervisor(backoff=0.01)
+  runs = []
+  async def flaky():
+    runs.append(asyncio.get_running_loop().time())
+    if len(runs) < 3:
+      raise RuntimeError(f"crash {len(runs)}")
+
+  await asyncio.wait_for(supervisor.start("flaky", flaky), timeout=1)
+  state = supervisor.states()[0]
+  assert (state.status, state.restarts, state.last_error) == ("finished", 2, "RuntimeError: crash 2")
+  assert runs[1] - runs[0] >= 0.01
+  assert runs[2] - runs[1] >= 0.02  # The second restart in a row waits twice as long
+
+@pytest.mark.asyncio
+async def test_finished_tasks_can_be_started_again():
+  supervisor = TaskSupervisor()
+  runs = []
+  async def once():
+    runs.append(1)
+
+  await supervisor.start("once", once)
+  await supervisor.start("once", once)
+  assert runs == [1, 1]
@@ -0,0 +1,67 @@
+from unittest.mock import MagicMock
+from app.tally import PollTally
+
+def make_reaction(emoji, count, me=True):
+  reaction = MagicMock()
+  reaction.emoji = emoji
+  reaction.count = count
+  reaction.me = me
+  return reaction
+
+def test_add_and_remove_votes():
+  tally = PollTally(1, ["👻", "🚀"])
+  tally.add("👻")
+  tally.add("👻")
+  tally.add("🚀")
+  tally.remove("👻")
+  tally.add("🦌")  # Not an option
+  assert tally.counts == {"👻": 1, "🚀": 1}
+  assert tally.version == 4
+
+def test_remove_never_goes_negative():
+  tally = PollTally(1, ["👻"])
+  tally.remove("👻")
+  assert tally.counts == {"👻": 0}
+
+def test_reconcile_ignores_bot_reaction():
+  tally = PollTally(1, ["👻", "🚀"], stale=True)
+  tally.reconcile([make_reaction("👻", 3), make_reaction("🚀", 2, me=False)])
+  assert tally.counts == {"👻": 2, "🚀": 2}
+  assert tally.stale is False
+
+def test_clear_emoji():
+  tally = PollTally(1, ["👻", "🚀"])
+  tally.add("👻")
+  tally.add("🚀")
+  tally.clear("👻")
+  assert tally.counts == {"👻": 0, "🚀": 1}
+  tally.clear()
+  assert tally.counts == {"👻": 0, "🚀": 0}
+
+def test_leaders_follow_votes_incrementally():
+  tally = PollTally(1, ["👻", "🚀", "🦌"])
+  tally.add("🚀")
+  tally.add("🚀")
+  tally.add("👻")
+  assert (tally.max_votes, tally.leaders) == (2, [1])
+  tally.remove("🚀")
+  assert (tally.max_votes, tally.leaders) == (1, [0, 1])
+  tally.clear()
+  assert (tally.max_votes, tally.leaders) == (0, [0, 1, 2])
+
+def test_render_only_changes_lines_of_changed_options():
+  options = {"Phasmophobia 👻": "👻", "Lethal Company 🚀": "🚀"}
+  tally = PollTally(1, options.values())
+  assert tally.render(options) == "Phasmophobia 👻: 0 votes\nLethal Company 🚀: 0 votes\n\nNo Votes"
+  tally.add("🚀")
+  assert tally._dirty == {1}
+  assert tally.render(options) == "Phasmophobia 👻: 0 votes\nLethal Company 🚀: 1 votes\n\nWinner: Lethal Company 🚀"
+  tally.add("👻")
+  assert tally.render(options).endswith("\nTie: Phasmophobia 👻, Lethal Company 🚀")
+  assert tally.render({"Phasmophobia 👻": "👻"}) == "Phasmophobia 👻: 1 votes\n\nWinner: Phasmophobia 👻"
+
+def test_weighted_counts():
+  tally = PollTally(1, ["👻", "🚀"])
+  tally.set_counts({"👻": 1.5, "🚀": 0.5})
+  assert tally.counts == {"👻": 1.5, "🚀": 0.5}
+  assert tally.leaders == [0]